@@ -0,0 +1,7 @@
+def percentile(values: list[float], p: float) -> float:
+    # Nearest-rank percentile of sorted values
+    if not values:
+        return 0
+
+    k = max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))
+    return values[k]
@@ -0,0 +1,689 @@
+"""
+Synthetic InterPro dataset for benchmarks.
+
+Generates the tables of the `interpro` PostgreSQL schema read by Pronto
+(databases, signatures and their comparisons, proteins and their matches,
+taxonomy, GO terms, proteomes, etc.), with family sizes following a
+power law (`skew`), so a few signatures match many proteins, as in
+real data. Signatures are grouped in clusters whose members match
+overlapping sets of proteins, so signatures have realistic comparisons.
+
+The same dataset provides the curation data of the Oracle stand-in
+(see `benchmarks.oracle`): entries integrating some signatures,
+and signature comments.
+
+Usage:
+    python -m benchmarks.dataset user/password@localhost:5432/pronto \\
+        --proteins 200000 --signatures 10000 --skew 1.1
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import psycopg
+
+
+RANKS = ("domain", "kingdom", "phylum", "class", "order", "family", "genus",
+         "species")
+
+# name, long name, accession format, signature type
+DATABASES = [
+    ("pfam", "Pfam", "PF{:05d}", "Family"),
+    ("panther", "PANTHER", "PTHR{:05d}", "Family"),
+    ("cathgene3d", "CATH-Gene3D", "G3DSA:3.40.{}.10",
+     "Homologous_superfamily"),
+    ("ncbifam", "NCBIfam", "NF{:06d}", "Family"),
+    ("smart", "SMART", "SM{:05d}", "Domain"),
+    ("profile", "PROSITE profiles", "PS{:05d}", "Domain"),
+    ("cdd", "CDD", "cd{:05d}", "Domain"),
+    ("superfamily", "SUPERFAMILY", "SSF{:05d}", "Homologous_superfamily"),
+]
+
+ASPECTS = ("biological_process", "molecular_function", "cellular_component")
+
+ENTRY_TYPES = {
+    "Family": "F",
+    "Domain": "D",
+    "Homologous_superfamily": "H",
+}
+
+SCHEMA = """
+DROP SCHEMA IF EXISTS interpro CASCADE;
+CREATE SCHEMA interpro;
+SET search_path TO interpro;
+
+CREATE TABLE database (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_long TEXT NOT NULL,
+    version TEXT NOT NULL,
+    updated DATE NOT NULL
+);
+CREATE TABLE signature (
+    accession TEXT PRIMARY KEY,
+    database_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    name TEXT,
+    description TEXT,
+    abstract TEXT,
+    llm_name TEXT,
+    llm_description TEXT,
+    llm_abstract TEXT,
+    num_sequences INTEGER NOT NULL,
+    num_complete_sequences INTEGER NOT NULL,
+    num_reviewed_sequences INTEGER NOT NULL,
+    num_complete_reviewed_sequences INTEGER NOT NULL,
+    num_complete_single_domain_sequences INTEGER NOT NULL,
+    num_residues BIGINT NOT NULL,
+    num_50pc_overlapped_complete_sequences INTEGER NOT NULL,
+    num_50pc_overlapped_complete_reviewed_sequences INTEGER NOT NULL
+);
+CREATE TABLE comparison (
+    signature_acc_1 TEXT NOT NULL,
+    signature_acc_2 TEXT NOT NULL,
+    num_collocations INTEGER NOT NULL,
+    num_res_overlaps BIGINT NOT NULL,
+    num_reviewed_res_overlaps BIGINT NOT NULL,
+    num_50pc_overlaps INTEGER NOT NULL,
+    num_reviewed_50pc_overlaps INTEGER NOT NULL,
+    num_65pc_overlaps INTEGER NOT NULL,
+    num_reviewed_65pc_overlaps INTEGER NOT NULL,
+    num_80pc_overlaps INTEGER NOT NULL,
+    num_reviewed_80pc_overlaps INTEGER NOT NULL
+);
+CREATE TABLE taxon (
+    id INTEGER PRIMARY KEY,
+    parent_id INTEGER,
+    name TEXT NOT NULL,
+    rank TEXT NOT NULL,
+    left_number INTEGER NOT NULL,
+    right_number INTEGER NOT NULL
+);
+CREATE TABLE lineage (
+    child_id INTEGER NOT NULL,
+    parent_id INTEGER NOT NULL,
+    parent_rank TEXT NOT NULL
+);
+CREATE TABLE protein (
+    accession TEXT PRIMARY KEY,
+    identifier TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    taxon_id INTEGER NOT NULL,
+    is_fragment BOOLEAN NOT NULL,
+    is_reviewed BOOLEAN NOT NULL
+);
+CREATE TABLE protein_name (
+    name_id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE protein2name (
+    protein_acc TEXT NOT NULL,
+    name_id INTEGER NOT NULL
+);
+CREATE TABLE protein_similarity (
+    comment_id INTEGER NOT NULL,
+    comment_text TEXT NOT NULL,
+    protein_acc TEXT NOT NULL
+);
+CREATE TABLE signature2protein (
+    signature_acc TEXT NOT NULL,
+    protein_acc TEXT NOT NULL,
+    is_reviewed BOOLEAN NOT NULL,
+    taxon_left_num INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    md5 TEXT NOT NULL,
+    model_acc TEXT
+);
+CREATE TABLE match (
+    protein_acc TEXT NOT NULL,
+    signature_acc TEXT NOT NULL,
+    database_id INTEGER NOT NULL,
+    fragments TEXT NOT NULL
+);
+CREATE TABLE signature2structure (
+    signature_acc TEXT NOT NULL,
+    protein_acc TEXT NOT NULL,
+    structure_id TEXT NOT NULL
+);
+CREATE TABLE term (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    num_constraints INTEGER NOT NULL,
+    is_obsolete BOOLEAN NOT NULL,
+    definition TEXT,
+    replaced_id TEXT
+);
+CREATE TABLE protein2go (
+    protein_acc TEXT NOT NULL,
+    term_id TEXT NOT NULL,
+    ref_db_code TEXT NOT NULL,
+    ref_db_id TEXT NOT NULL
+);
+CREATE TABLE go2constraints (
+    go_id TEXT NOT NULL,
+    relationship TEXT NOT NULL,
+    taxon INTEGER NOT NULL
+);
+CREATE TABLE publication (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    published DATE NOT NULL
+);
+CREATE TABLE proteome (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    taxon_id INTEGER NOT NULL
+);
+CREATE TABLE proteome2protein (
+    id TEXT NOT NULL,
+    protein_acc TEXT NOT NULL
+);
+"""
+
+# Created after loading, as in the production database
+INDEXES = """
+CREATE INDEX ON signature (database_id);
+CREATE INDEX ON signature (UPPER(accession));
+CREATE INDEX ON signature (UPPER(name));
+CREATE INDEX ON comparison (signature_acc_1);
+CREATE INDEX ON comparison (signature_acc_2);
+CREATE INDEX ON taxon (left_number);
+CREATE INDEX ON lineage (child_id, parent_rank);
+CREATE INDEX ON lineage (parent_id);
+CREATE INDEX ON protein (identifier);
+CREATE INDEX ON protein2name (protein_acc);
+CREATE INDEX ON protein_similarity (comment_id);
+CREATE INDEX ON protein_similarity (protein_acc);
+CREATE INDEX ON signature2protein (signature_acc);
+CREATE INDEX ON signature2protein (protein_acc);
+CREATE INDEX ON match (protein_acc);
+CREATE INDEX ON signature2structure (signature_acc);
+CREATE INDEX ON protein2go (protein_acc);
+CREATE INDEX ON protein2go (term_id);
+CREATE INDEX ON go2constraints (go_id);
+CREATE INDEX ON proteome2protein (id);
+ANALYZE;
+"""
+
+
+@dataclass
+class Taxon:
+    id: int
+    parent_id: int | None
+    name: str
+    rank: str
+    left_number: int = 0
+    right_number: int = 0
+    children: list = field(default_factory=list)
+
+
+@dataclass
+class Protein:
+    accession: str
+    length: int
+    taxon_id: int
+    is_fragment: bool
+    is_reviewed: bool
+    name_id: int
+    signatures: list = field(default_factory=list)
+
+
+@dataclass
+class Signature:
+    accession: str
+    database_id: int
+    type: str
+    cluster: int
+    proteins: list = field(default_factory=list)
+
+
+class Dataset:
+    """
+    :param proteins: number of proteins
+    :param signatures: number of signatures
+    :param species: number of species (leaves of the taxonomy)
+    :param skew: exponent of the power law of family sizes
+    :param matches_per_protein: average number of signatures per protein
+    :param integrated: fraction of signatures integrated in InterPro entries
+    :param seed: seed of the random number generator
+    """
+
+    def __init__(self, proteins: int = 100000, signatures: int = 5000,
+                 species: int = 2000, skew: float = 1.1,
+                 matches_per_protein: float = 3, integrated: float = 0.6,
+                 seed: int = 1):
+        self.rng = random.Random(seed)
+        self.num_proteins = proteins
+        self.num_signatures = signatures
+        self.num_species = species
+        self.skew = skew
+        self.matches_per_protein = matches_per_protein
+        self.integrated = integrated
+
+        self.taxa: dict[int, Taxon] = {}
+        self.species: list[Taxon] = []
+        self.proteins: list[Protein] = []
+        self.signatures: list[Signature] = []
+        self.names: list[str] = []
+        self.terms: list[str] = []
+
+        self._make_taxonomy()
+        self._make_proteins()
+        self._make_signatures()
+
+    def _make_taxonomy(self):
+        # Branching factor giving about `num_species` leaves
+        branching = max(2, round(self.num_species ** (1 / (len(RANKS) - 1))))
+        root = Taxon(1, None, "root", "no rank")
+        self.taxa[1] = root
+        level = [root]
+        for i, rank in enumerate(RANKS):
+            next_level = []
+            num_children = 3 if i == 0 else branching
+            for parent in level:
+                for j in range(num_children):
+                    taxon_id = len(self.taxa) + 1
+                    taxon = Taxon(taxon_id, parent.id,
+                                  f"{rank.capitalize()} {taxon_id}", rank)
+                    self.taxa[taxon_id] = taxon
+                    parent.children.append(taxon)
+                    next_level.append(taxon)
+            level = next_level
+
+        self.species = level
+
+        # Nested set numbering (iterative, to support deep trees)
+        number = 0
+        stack = [(root, False)]
+        while stack:
+            taxon, visited = stack.pop()
+            number += 1
+            if visited:
+                taxon.right_number = number
+            else:
+                taxon.left_number = number
+                stack.append((taxon, True))
+                stack += [(child, False) for child in reversed(taxon.children)]
+
+    def _make_proteins(self):
+        rng = self.rng
+        num_names = max(10, self.num_proteins // 50)
+        self.names = [f"Synthetic protein {i}" for i in range(num_names)]
+        species_weights = _power_law(len(self.species), 1.0)
+        species = rng.choices(self.species, weights=species_weights,
+                              k=self.num_proteins)
+        for i in range(self.num_proteins):
+            self.proteins.append(Protein(
+                accession=f"A0A{i:07d}",
+                length=rng.randint(50, 2000),
+                taxon_id=species[i].id,
+                is_fragment=rng.random() < 0.05,
+                is_reviewed=rng.random() < 0.03,
+                name_id=int(rng.paretovariate(1.2)) % num_names
+            ))
+
+    def _make_signatures(self):
+        rng = self.rng
+        total_matches = int(self.num_proteins * self.matches_per_protein)
+        weights = _power_law(self.num_signatures, self.skew)
+        scale = total_matches / sum(weights)
+        sizes = [max(1, min(self.num_proteins, int(w * scale)))
+                 for w in weights]
+        rng.shuffle(sizes)
+
+        # Signatures of a cluster match overlapping sets of proteins
+        num_clusters = max(1, self.num_signatures // 4)
+        order = list(range(self.num_proteins))
+        rng.shuffle(order)
+
+        counters = {}
+        for i, size in enumerate(sizes):
+            db_id = rng.randrange(len(DATABASES))
+            name, _, acc_format, sig_type = DATABASES[db_id]
+            counters[name] = counters.get(name, 0) + 1
+            cluster = rng.randrange(num_clusters)
+            signature = Signature(acc_format.format(counters[name]),
+                                  db_id + 1, sig_type, cluster)
+
+            # Proteins of the cluster start at the same offset
+            start = (cluster * 7919) % self.num_proteins
+            pool = int(size * rng.uniform(1.0, 1.5))
+            indices = rng.sample(range(pool), min(size, pool))
+            for j in indices:
+                protein = self.proteins[order[(start + j) % self.num_proteins]]
+                protein.signatures.append(len(self.signatures))
+                signature.proteins.append(protein)
+
+            self.signatures.append(signature)
+
+        self.terms = [f"GO:{i:07d}" for i in range(1, 2001)]
+
+    # PostgreSQL tables, as tuples
+
+    def databases(self):
+        for i, (name, name_long, _, _) in enumerate(DATABASES):
+            yield i + 1, name, name_long, "1.0", datetime(2024, 1, 1)
+
+    def signature_rows(self):
+        for s in self.signatures:
+            complete = [p for p in s.proteins if not p.is_fragment]
+            reviewed = [p for p in s.proteins if p.is_reviewed]
+            complete_reviewed = [p for p in complete if p.is_reviewed]
+            single_domain = [p for p in complete if len(p.signatures) == 1]
+            overlapped = [p for p in complete if len(p.signatures) > 1]
+            annotated = self.rng.random() < 0.7
+            yield (
+                s.accession, s.database_id, s.type,
+                f"{s.accession} family" if annotated else None,
+                f"Synthetic {s.type.lower()} {s.accession}",
+                f"<p>Abstract of {s.accession}.</p>" if annotated else None,
+                None, None, None,
+                len(s.proteins), len(complete), len(reviewed),
+                len(complete_reviewed), len(single_domain),
+                sum(p.length // 2 for p in s.proteins),
+                len(overlapped),
+                len([p for p in overlapped if p.is_reviewed])
+            )
+
+    def comparisons(self):
+        counts = {}
+        for protein in self.proteins:
+            for i in protein.signatures:
+                for j in protein.signatures:
+                    key = (i, j)
+                    try:
+                        c = counts[key]
+                    except KeyError:
+                        c = counts[key] = [0] * 9
+
+                    # Deterministic overlap, so (i, j) and (j, i) agree
+                    overlap = _overlap(protein.accession, min(i, j), max(i, j))
+                    c[0] += 1
+                    c[1] += int(overlap * protein.length / 2)
+                    for k, threshold in enumerate((0.5, 0.65, 0.8)):
+                        if overlap >= threshold:
+                            c[3 + k * 2] += 1
+                            if protein.is_reviewed:
+                                c[4 + k * 2] += 1
+
+                    if protein.is_reviewed:
+                        c[2] += int(overlap * protein.length / 2)
+
+        for (i, j), c in counts.items():
+            yield self.signatures[i].accession, self.signatures[j].accession, *c
+
+    def taxon_rows(self):
+        for t in self.taxa.values():
+            yield t.id, t.parent_id, t.name, t.rank, t.left_number, t.right_number
+
+    def lineage_rows(self):
+        for taxon in self.taxa.values():
+            node = taxon
+            while node is not None:
+                yield taxon.id, node.id, node.rank
+                node = self.taxa.get(node.parent_id)
+
+    def protein_rows(self):
+        for p in self.proteins:
+            yield (p.accession, f"{p.accession}_SYNTH", p.length, p.taxon_id,
+                   p.is_fragment, p.is_reviewed)
+
+    def protein_name_rows(self):
+        yield from enumerate(self.names)
+
+    def protein2name_rows(self):
+        for p in self.proteins:
+            yield p.accession, p.name_id
+
+    def protein_similarity_rows(self):
+        num_comments = max(10, self.num_proteins // 100)
+        for p in self.proteins:
+            if self.rng.random() < 0.3:
+                comment_id = int(self.rng.paretovariate(1.0)) % num_comments
+                yield comment_id, f"Similarity comment {comment_id}", p.accession
+
+    def signature2protein_rows(self):
+        for p in self.proteins:
+            left_num = self.taxa[p.taxon_id].left_number
+            accessions = sorted(self.signatures[i].accession
+                                for i in p.signatures)
+            md5 = hashlib.md5(",".join(accessions).encode()).hexdigest()
+            for i in p.signatures:
+                s = self.signatures[i]
+                if s.accession.startswith("PTHR"):
+                    model_acc = f"{s.accession}:SF{_digest(p.accession) % 20}"
+                else:
+                    model_acc = None
+
+                yield (s.accession, p.accession, p.is_reviewed, left_num,
+                       p.name_id, md5, model_acc)
+
+    def match_rows(self):
+        for p in self.proteins:
+            for i in p.signatures:
+                s = self.signatures[i]
+                start = self.rng.randint(1, max(1, p.length // 2))
+                end = self.rng.randint(start, p.length)
+                yield p.accession, s.accession, s.database_id, f"{start}-{end}-S"
+
+    def signature2structure_rows(self):
+        for s in self.signatures:
+            for p in s.proteins:
+                if p.is_reviewed and self.rng.random() < 0.2:
+                    yield s.accession, p.accession, f"{p.length % 9}syn"
+
+    def term_rows(self):
+        for i, term_id in enumerate(self.terms):
+            yield (term_id, f"Synthetic process {i}", ASPECTS[i % 3], 0,
+                   False, f"Definition of {term_id}.", None)
+
+    def protein2go_rows(self):
+        weights = _power_law(len(self.terms), 1.0)
+        for p in self.proteins:
+            n = self.rng.randint(0, 4)
+            for term_id in set(self.rng.choices(self.terms, weights, k=n)):
+                yield p.accession, term_id, "PMID", str(1000 + _digest(term_id) % 500)
+
+    def go2constraint_rows(self):
+        for term_id in self.terms[:50]:
+            taxon = self.rng.choice(self.species)
+            yield term_id, "never_in_taxon", taxon.id
+
+    def publication_rows(self):
+        for i in range(1000, 1500):
+            yield str(i), f"Synthetic publication {i}", datetime(2020, 1, 1)
+
+    def proteome_rows(self):
+        for i, taxon in enumerate(self.species[:50]):
+            yield f"UP{i + 1:09d}", f"{taxon.name} proteome", taxon.id
+
+    def proteome2protein_rows(self):
+        proteomes = {taxon.id: f"UP{i + 1:09d}"
+                     for i, taxon in enumerate(self.species[:50])}
+        for p in self.proteins:
+            try:
+                yield proteomes[p.taxon_id], p.accession
+            except KeyError:
+                continue
+
+    # Oracle stand-in tables
+
+    def entries(self):
+        """
+        Entries integrating signatures of the same cluster.
+
+        :return: tuples of (entry accession, entry type, name,
+                 short name, signature accessions)
+        """
+        by_cluster = {}
+        for s in self.signatures:
+            if self.rng.random() < self.integrated:
+                by_cluster.setdefault(s.cluster, []).append(s)
+
+        for i, signatures in enumerate(by_cluster.values()):
+            entry_acc = f"IPR{i + 1:06d}"
+            entry_type = ENTRY_TYPES[signatures[0].type]
+            yield (entry_acc, entry_type, f"Synthetic entry {i + 1}",
+                   f"Synth_{i + 1}", [s.accession for s in signatures])
+
+    def signature_comments(self):
+        """
+        :return: tuples of (comment ID, signature accession, text)
+        """
+        comment_id = 0
+        for s in self.signatures:
+            if self.rng.random() < 0.1:
+                comment_id += 1
+                yield comment_id, s.accession, f"Comment on {s.accession}"
+
+    def panther2go(self):
+        for s in self.signatures:
+            if s.accession.startswith("PTHR"):
+                for k in range(3):
+                    yield (f"{s.accession}:SF{k}",
+                           self.terms[_digest(f"{s.accession}:{k}") % len(self.terms)])
+
+    def tables(self) -> list[tuple[str, list[str], object]]:
+        """
+        :return: tuples of (table, types of columns, rows)
+        """
+        return [
+            ("database", ["int4", "text", "text", "text", "date"],
+             self.databases()),
+            ("taxon", ["int4", "int4", "text", "text", "int4", "int4"],
+             self.taxon_rows()),
+            ("lineage", ["int4", "int4", "text"], self.lineage_rows()),
+            ("protein", ["text", "text", "int4", "int4", "bool", "bool"],
+             self.protein_rows()),
+            ("protein_name", ["int4", "text"], self.protein_name_rows()),
+            ("protein2name", ["text", "int4"], self.protein2name_rows()),
+            ("protein_similarity", ["int4", "text", "text"],
+             self.protein_similarity_rows()),
+            ("signature", ["text", "int4", "text", "text", "text", "text",
+                           "text", "text", "text", "int4", "int4", "int4",
+                           "int4", "int4", "int8", "int4", "int4"],
+             self.signature_rows()),
+            ("comparison", ["text", "text"] + ["int4", "int8", "int8"] +
+             ["int4"] * 6, self.comparisons()),
+            ("signature2protein", ["text", "text", "bool", "int4", "int4",
+                                   "text", "text"],
+             self.signature2protein_rows()),
+            ("match", ["text", "text", "int4", "text"], self.match_rows()),
+            ("signature2structure", ["text", "text", "text"],
+             self.signature2structure_rows()),
+            ("term", ["text", "text", "text", "int4", "bool", "text", "text"],
+             self.term_rows()),
+            ("protein2go", ["text", "text", "text", "text"],
+             self.protein2go_rows()),
+            ("go2constraints", ["text", "text", "int4"],
+             self.go2constraint_rows()),
+            ("publication", ["text", "text", "date"],
+             self.publication_rows()),
+            ("proteome", ["text", "text", "int4"], self.proteome_rows()),
+            ("proteome2protein", ["text", "text"],
+             self.proteome2protein_rows()),
+        ]
+
+
+def _power_law(n: int, exponent: float) -> list[float]:
+    return [1 / (k ** exponent) for k in range(1, n + 1)]
+
+
+def _digest(value: str) -> int:
+    # Unlike hash(), stable across processes
+    return zlib.crc32(value.encode())
+
+
+def _overlap(protein_acc: str, i: int, j: int) -> float:
+    if i == j:
+        return 1.0
+
+    digest = hashlib.md5(f"{protein_acc}:{i}:{j}".encode()).digest()
+    return digest[0] / 255
+
+
+def parse_url(url: str) -> dict:
+    # Same format as the POSTGRESQL setting (see `utils.parse_pg_url()`)
+    m = re.match(r'([^/]+)/([^@]+)@([^:]+):(\d+)/(\w+)', url)
+    return {
+        "user": m.group(1),
+        "password": m.group(2),
+        "host": m.group(3),
+        "port": int(m.group(4)),
+        "dbname": m.group(5)
+    }
+
+
+def load_postgresql(dataset: Dataset, url: str, verbose: bool = True):
+    """
+    Create the `interpro` schema and load the dataset with binary COPY.
+
+    :param dataset: synthetic dataset
+    :param url: connection string (user/password@host:port/dbname)
+    :param verbose: print progress
+    """
+    with psycopg.connect(**parse_url(url)) as con:
+        with con.cursor() as cur:
+            cur.execute(SCHEMA)
+            for table, types, rows in dataset.tables():
+                num_rows = 0
+                with cur.copy(f"COPY interpro.{table} FROM STDIN "
+                              f"(FORMAT BINARY)") as copy:
+                    copy.set_types(types)
+                    for row in rows:
+                        copy.write_row(row)
+                        num_rows += 1
+
+                if verbose:
+                    print(f"{table:<24}{num_rows:>12,} rows")
+
+            cur.execute("SET search_path TO interpro")
+            cur.execute(INDEXES)
+
+            # Pronto's statements do not qualify table names
+            cur.execute("ALTER ROLE CURRENT_USER "
+                        "SET search_path TO interpro, public")
+
+        con.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load a synthetic InterPro dataset into PostgreSQL"
+    )
+    parser.add_argument("url",
+                        help="PostgreSQL connection string "
+                             "(user/password@host:port/dbname)")
+    parser.add_argument("--oracle", metavar="FILE",
+                        help="also create the Oracle stand-in database "
+                             "(SQLite) in FILE")
+    parser.add_argument("--proteins", type=int, default=100000)
+    parser.add_argument("--signatures", type=int, default=5000)
+    parser.add_argument("--species", type=int, default=2000)
+    parser.add_argument("--skew", type=float, default=1.1,
+                        help="exponent of the power law of family sizes")
+    parser.add_argument("--matches-per-protein", type=float, default=3)
+    parser.add_argument("--integrated", type=float, default=0.6,
+                        help="fraction of integrated signatures")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    dataset = Dataset(proteins=args.proteins, signatures=args.signatures,
+                      species=args.species, skew=args.skew,
+                      matches_per_protein=args.matches_per_protein,
+                      integrated=args.integrated, seed=args.seed)
+    load_postgresql(dataset, args.url)
+
+    if args.oracle:
+        from benchmarks import oracle
+        oracle.create(dataset, args.oracle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+End-to-end benchmarks of API endpoints.
+
+Drives the key endpoints through the Flask test client, against
+a PostgreSQL database loaded with `benchmarks.dataset`, and the Oracle
+stand-in (`benchmarks.oracle`). Signatures and proteins are picked
+from the dataset: the largest families, a median family, the PANTHER
+family with the most proteins, and the protein with the most matches.
+
+For each scenario, reports the number of requests, errors, throughput,
+and latency percentiles (in milliseconds). Results can be saved as JSON
+to compare runs.
+
+Usage:
+    python -m benchmarks.dataset user/password@localhost:5432/pronto \\
+        --oracle /tmp/oracle.sqlite
+    python -m benchmarks.endpoints user/password@localhost:5432/pronto \\
+        /tmp/oracle.sqlite --requests 50 --concurrency 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+import psycopg
+
+from benchmarks import dataset, percentile
+
+
+@dataclass
+class Result:
+    name: str
+    url: str
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        n = len(latencies)
+        return {
+            "url": self.url,
+            "requests": n,
+            "errors": self.errors,
+            "throughput": n / self.elapsed if self.elapsed else 0,
+            "mean": sum(latencies) / n * 1000 if n else 0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000 if n else 0,
+        }
+
+
+def get_inputs(url: str) -> dict:
+    with psycopg.connect(**dataset.parse_url(url)) as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT accession
+            FROM interpro.signature
+            ORDER BY num_sequences DESC
+            LIMIT 3
+            """
+        )
+        largest = [acc for acc, in cur.fetchall()]
+
+        cur.execute(
+            """
+            SELECT accession
+            FROM interpro.signature
+            ORDER BY num_sequences
+            OFFSET (SELECT COUNT(*) / 2 FROM interpro.signature)
+            LIMIT 1
+            """
+        )
+        median, = cur.fetchone()
+
+        cur.execute(
+            """
+            SELECT s.accession
+            FROM interpro.signature s
+            INNER JOIN interpro.database d ON s.database_id = d.id
+            WHERE d.name = 'panther'
+            ORDER BY s.num_sequences DESC
+            LIMIT 1
+            """
+        )
+        row = cur.fetchone()
+        panther = row[0] if row else largest[0]
+
+        cur.execute(
+            """
+            SELECT protein_acc
+            FROM interpro.match
+            GROUP BY protein_acc
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+            """
+        )
+        protein, = cur.fetchone()
+
+    return {
+        "largest": largest,
+        "median": median,
+        "panther": panther,
+        "protein": protein,
+    }
+
+
+def get_scenarios(inputs: dict) -> dict[str, str]:
+    largest = inputs["largest"][0]
+    family = "/".join(inputs["largest"])
+    median = inputs["median"]
+    return {
+        "signature": f"/api/signature/{median}/",
+        "proteins (largest)": f"/api/signatures/{largest}/proteins/",
+        "proteins (median)": f"/api/signatures/{median}/proteins/",
+        "matrices": f"/api/signatures/{family}/matrices/",
+        "taxonomy": f"/api/signatures/{family}/taxonomy/",
+        "taxonomy (species)": f"/api/signatures/{family}/taxonomy/species/",
+        "descriptions": f"/api/signatures/{family}/descriptions/",
+        "comments": f"/api/signatures/{family}/comments/",
+        "go": f"/api/signatures/{family}/go/",
+        "go (panther)": f"/api/signatures/{inputs['panther']}/go/",
+        "structures": f"/api/signatures/{family}/structures/",
+        "unintegrated (similar)": "/api/signatures/unintegrated/similar/",
+        "unintegrated (specific)": "/api/signatures/unintegrated/specific/",
+        "database signatures": "/api/database/pfam/signatures/",
+        "database unintegrated": "/api/database/pfam/unintegrated/",
+        "protein": f"/api/protein/{inputs['protein']}/?matches&lineage",
+    }
+
+
+def create_app(pg_url: str, oracle_path: str, use_cache: bool,
+               workdir: str):
+    """
+    Import the application with a benchmark configuration,
+    using the Oracle stand-in instead of Oracle.
+    """
+    config = os.path.join(workdir, "config.cfg")
+    with open(config, "wt") as fh:
+        fh.write(f"POSTGRESQL = {pg_url!r}\n")
+        fh.write("ORACLE_IP = 'bench/bench@localhost:1521/bench'\n")
+        fh.write("ORACLE_GOA = ''\n")
+        fh.write("MYSQL = ''\n")
+        fh.write("SECRET_KEY = 'benchmarks'\n")
+        fh.write("ORACLE_POOL_MAX = 0\n")
+        # The stand-in cannot explain statements
+        fh.write("SLOW_QUERY_THRESHOLD = 0\n")
+        if use_cache:
+            path = os.path.join(workdir, "responses.sqlite")
+            fh.write(f"RESPONSE_CACHE_PATH = {path!r}\n")
+        else:
+            fh.write("RESPONSE_CACHE_SIZE = 0\n")
+
+    os.environ["PRONTO_CONFIG"] = config
+
+    from benchmarks import oracle
+    from pronto import app, utils
+
+    utils.connect_oracle = lambda: oracle.connect(oracle_path)
+    utils.connect_oracle_info = lambda info: oracle.connect(oracle_path)
+    return app
+
+
+def run(app, name: str, url: str, requests: int, concurrency: int,
+        warmup: int) -> Result:
+    result = Result(name, url)
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def send(client) -> tuple[float, bool]:
+        start = time.perf_counter()
+        response = client.get(url)
+        # Consume streamed bodies, and run teardown callbacks
+        response.get_data()
+        response.close()
+        return time.perf_counter() - start, response.status_code < 400
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+
+            latency, ok = send(client)
+            with lock:
+                result.latencies.append(latency)
+                if not ok:
+                    result.errors += 1
+
+    client = app.test_client()
+    for _ in range(warmup):
+        send(client)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def print_results(results: list[dict]):
+    header = (f"{'scenario':<26}{'n':>6}{'err':>5}{'req/s':>9}"
+              f"{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['name']:<26}{r['requests']:>6}{r['errors']:>5}"
+              f"{r['throughput']:>9.1f}{r['mean']:>9.1f}{r['p50']:>9.1f}"
+              f"{r['p90']:>9.1f}{r['p99']:>9.1f}{r['max']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark API endpoints on a synthetic dataset"
+    )
+    parser.add_argument("url",
+                        help="PostgreSQL connection string "
+                             "(user/password@host:port/dbname)")
+    parser.add_argument("oracle", help="Oracle stand-in database (SQLite)")
+    parser.add_argument("-n", "--requests", type=int, default=20,
+                        help="requests per scenario (default: 20)")
+    parser.add_argument("-c", "--concurrency", type=int, default=1,
+                        help="concurrent clients (default: 1)")
+    parser.add_argument("-w", "--warmup", type=int, default=2,
+                        help="warmup requests per scenario (default: 2)")
+    parser.add_argument("-k", "--scenario", action="append", default=[],
+                        help="run only scenarios containing this string "
+                             "(can be repeated)")
+    parser.add_argument("--cache", action="store_true",
+                        help="enable the response cache")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="save results as JSON")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.oracle):
+        parser.error(f"{args.oracle}: no such file")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = create_app(args.url, args.oracle, args.cache, workdir)
+        scenarios = get_scenarios(get_inputs(args.url))
+        results = []
+        for name, url in scenarios.items():
+            if args.scenario and not any(s in name for s in args.scenario):
+                continue
+
+            result = run(app, name, url, args.requests, args.concurrency,
+                         args.warmup)
+            results.append({"name": name, **result.summary()})
+            print(f"{name}: {url}", file=sys.stderr)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "wt") as fh:
+            json.dump({
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "cache": args.cache,
+                "results": results,
+            }, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
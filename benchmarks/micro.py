@@ -0,0 +1,424 @@
+"""
+Micro-benchmarks of CPU-bound helpers, with a regression gate.
+
+Runs pure-Python functions on a synthetic corpus (by default 40,000
+annotations and as many entries): HTML validation and wrapping of
+annotations, sanitization of entry names and descriptions, text checks
+of annotations and entries, predictions of relationships between
+signatures, and the assembly of taxonomic trees and entry hierarchies.
+
+Results can be saved as a baseline, then compared to: benchmarks slower
+than the baseline by more than the threshold are reported as
+regressions, and the command exits with a non-zero status.
+
+Usage:
+    python -m benchmarks.micro --save
+    # ... change code ...
+    python -m benchmarks.micro --compare --threshold 0.1
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+
+DEFAULT_BASELINE = os.path.join(".benchmarks", "micro.json")
+
+WORDS = (
+    "protein family domain binding enzyme catalytic activity conserved "
+    "region residues membrane transport kinase receptor subunit complex "
+    "bacteria eukaryotes archaea structure fold helix sheet repeat motif "
+    "dehydrogenase reductase transferase hydrolase synthase regulator "
+    "transcription factor zinc finger ligand substrate cofactor metal ion"
+).split()
+
+FRAGMENTS = [
+    "N-terminal", "C-terminal", "n terminus", "C terminal", "alpha",
+    "beta-sheet", "approx. 30  kDa", "EC 2.7.11.1", "PF00001", "IPR000001",
+    "PTHR10000", "gram -", "Gram-negative", "(PUBMED:12345678)",
+    "[cite:PUB00012345]", "e.g. [cite:PUB00000001]", "et al. [",
+    "https://www.ebi.ac.uk/interpro/", "Ångström", "α-helix",
+    "family protein", "sp. [cite:PUB00000002]",
+]
+
+# Stand-ins for the terms of sanity checks, stored in Oracle
+TERMS = {
+    "abbreviation": [r"\bapprox\.", r"\bca\.", r"\bie\b", r"\beg\b"],
+    "citation": ["(PUBMED:", "PMID", "doi.org"],
+    "punctuation": [" ,", " .", ";;", ",,"],
+    "spelling": ["protien", "familly", "domian", "recieve", "seperate",
+                 "occured", "sulphur", "haem"],
+    "substitution": ["&gt;", "&lt;", "  "],
+    "forbidden": ["unknown", "hypothetical", "putative", "DUF"],
+}
+
+
+class Corpus:
+    """
+    Synthetic annotations, entries, signature overlaps, taxonomy,
+    and entry relationships.
+    """
+
+    def __init__(self, size: int = 40000, seed: int = 1):
+        self.size = size
+        self.seed = seed
+        rng = random.Random(seed)
+        self.annotations = [(f"AB{i:05d}", self._annotation(rng))
+                            for i in range(size)]
+        self.entries = [self._entry(rng, i) for i in range(size)]
+        self.descriptions = [self._sentence(rng, 4, 12)
+                             for _ in range(size)]
+        self.overlaps = []
+        for _ in range(size * 5):
+            a = rng.randint(0, 10000)
+            b = rng.randint(0, 10000)
+            self.overlaps.append((a, b, rng.randint(0, min(a, b))))
+
+        self.taxonomy_rows = self._taxonomy_rows(rng)
+        self.relationship_rows = self._relationship_rows(rng)
+
+    @staticmethod
+    def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+        words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), rng.choice(FRAGMENTS))
+
+        return " ".join(words)
+
+    def _paragraph(self, rng: random.Random) -> str:
+        sentences = [self._sentence(rng, 6, 25).capitalize()
+                     for _ in range(rng.randint(2, 6))]
+        return ". ".join(sentences) + f" [cite:PUB{rng.randint(0, 99999):08d}]."
+
+    def _annotation(self, rng: random.Random) -> str:
+        blocks = []
+        for _ in range(rng.randint(1, 4)):
+            r = rng.random()
+            if r < 0.7:
+                blocks.append(f"<p>{self._paragraph(rng)}</p>")
+            elif r < 0.85:
+                items = "".join(f"<li>{self._sentence(rng, 3, 8)}</li>"
+                                for _ in range(rng.randint(2, 5)))
+                blocks.append(f"<ul>{items}</ul>")
+            else:
+                # Unwrapped text, and malformed HTML
+                blocks.append(self._paragraph(rng))
+                if rng.random() < 0.2:
+                    blocks.append("<p><i>unclosed</p>")
+
+        return "\n".join(blocks)
+
+    def _entry(self, rng: random.Random, i: int) -> tuple[str, str, str]:
+        name = self._sentence(rng, 2, 6)
+        if rng.random() < 0.7:
+            name = name.capitalize()
+
+        short_name = "_".join(name.split()[:3])
+        if rng.random() < 0.1:
+            short_name += rng.choice(["_fam", "_like", "_bd", "_Cterm"])
+
+        return f"IPR{i:06d}", name, short_name
+
+    def _taxonomy_rows(self, rng: random.Random) -> list[tuple]:
+        from benchmarks.dataset import RANKS, Dataset
+
+        # Taxonomy of about 2,000 species
+        dataset = Dataset(proteins=1, signatures=1, species=2000,
+                          seed=self.seed)
+        signatures = [f"PF{i:05d}" for i in range(3)]
+        rows = []
+        for species in rng.sample(dataset.species,
+                                  min(len(dataset.species), 1500)):
+            lineage = []
+            node = species
+            while node is not None:
+                lineage.append(node)
+                node = dataset.taxa.get(node.parent_id)
+
+            for acc in signatures:
+                count = rng.randint(1, 100)
+                for node in lineage:
+                    if node.rank in RANKS:
+                        rows.append((acc, species.id, node.id, node.rank,
+                                     node.name, count))
+
+        return rows
+
+    def _relationship_rows(self, rng: random.Random) -> tuple[str, list]:
+        # Hierarchy of about 1,000 entries, from the point of view
+        # of a child of the root
+        children = {}
+        for i in range(1, 1000):
+            parent = rng.randrange(max(1, i // 3))
+            children.setdefault(parent, []).append(i)
+
+        def row(parent: int, child: int) -> tuple:
+            return (f"IPR{parent:06d}", f"Entry {parent}", "F",
+                    f"IPR{child:06d}", f"Entry {child}", "F")
+
+        accession = children[0][0]
+        rows = [row(0, accession)]
+        rows += [row(0, sibling) for sibling in children[0][1:]]
+        stack = list(reversed(children.get(accession, [])))
+        parents = {c: accession for c in stack}
+        while stack:
+            node = stack.pop()
+            rows.append(row(parents[node], node))
+            for child in reversed(children.get(node, [])):
+                parents[child] = node
+                stack.append(child)
+
+        return f"IPR{accession:06d}", rows
+
+
+def get_benchmarks(corpus: Corpus) -> dict[str, Callable[[], object]]:
+    from pronto.api.annotation import Annotation
+    from pronto.api.checks import annotations as ck_ann
+    from pronto.api.checks import entries as ck_ent
+    from pronto.api.entry.relationships import build_hierarchy
+    from pronto.api.entry.utils import sanitize_description, sanitize_name
+    from pronto.api.signatures.taxonomy import RANKS, build_tree, format_node
+    from pronto.utils import Prediction
+
+    cabs = corpus.annotations
+    entries = corpus.entries
+    no_exceptions = {}
+
+    def validate_html():
+        for _, text in cabs:
+            Annotation(text).validate_html()
+
+    def wrap():
+        for _, text in cabs:
+            Annotation(text).wrap()
+
+    def taxonomy_tree():
+        tree = build_tree(corpus.taxonomy_rows, RANKS)
+        return [format_node(node) for node in tree.values()]
+
+    def relationships():
+        accession, rows = corpus.relationship_rows
+        return build_hierarchy(rows, accession)
+
+    return {
+        "annotation.validate_html": validate_html,
+        "annotation.wrap": wrap,
+        "entry.sanitize_description": lambda: [
+            sanitize_description(text) for text in corpus.descriptions
+        ],
+        "entry.sanitize_name": lambda: [
+            sanitize_name(name) for _, name, _ in entries
+        ],
+        "checks.annotations.ck_abbreviations": lambda: ck_ann.ck_abbreviations(
+            cabs, TERMS["abbreviation"], no_exceptions
+        ),
+        "checks.annotations.ck_begin_uppercase":
+            lambda: ck_ann.ck_begin_uppercase(cabs, no_exceptions),
+        "checks.annotations.ck_citations": lambda: ck_ann.ck_citations(
+            cabs, TERMS["citation"], no_exceptions
+        ),
+        "checks.annotations.ck_encoding":
+            lambda: ck_ann.ck_encoding(cabs, set()),
+        "checks.annotations.ck_length": lambda: ck_ann.ck_length(cabs),
+        "checks.annotations.ck_punctuations": lambda: ck_ann.ck_punctuations(
+            cabs, TERMS["punctuation"], no_exceptions
+        ),
+        "checks.annotations.ck_spelling": lambda: ck_ann.ck_spelling(
+            cabs, TERMS["spelling"], no_exceptions
+        ),
+        "checks.annotations.ck_substitutions":
+            lambda: ck_ann.ck_substitutions(cabs, TERMS["substitution"],
+                                            no_exceptions),
+        "checks.entries.ck_abbreviations": lambda: ck_ent.ck_abbreviations(
+            entries, TERMS["abbreviation"], no_exceptions
+        ),
+        "checks.entries.ck_acc_in_name":
+            lambda: ck_ent.ck_acc_in_name(entries, no_exceptions),
+        "checks.entries.ck_double_quote":
+            lambda: ck_ent.ck_double_quote(entries),
+        "checks.entries.ck_encoding":
+            lambda: ck_ent.ck_encoding(entries, set()),
+        "checks.entries.ck_forbidden_terms":
+            lambda: ck_ent.ck_forbidden_terms(entries, TERMS["forbidden"],
+                                              no_exceptions),
+        "checks.entries.ck_gene_symbol":
+            lambda: ck_ent.ck_gene_symbol(entries, set()),
+        "checks.entries.ck_letter_case":
+            lambda: ck_ent.ck_letter_case(entries, ("cAMP", "mRNA")),
+        "checks.entries.ck_spelling": lambda: ck_ent.ck_spelling(
+            entries, TERMS["spelling"], no_exceptions
+        ),
+        "checks.entries.ck_underscore":
+            lambda: ck_ent.ck_underscore(entries, set()),
+        "utils.Prediction": lambda: [
+            Prediction(a, b, i).relationship for a, b, i in corpus.overlaps
+        ],
+        "taxonomy.build_tree": taxonomy_tree,
+        "relationships.build_hierarchy": relationships,
+    }
+
+
+def measure(fn: Callable[[], object], rounds: int) -> dict:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "rounds": rounds,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Print the comparison of results with the baseline (on the fastest
+    round, the least noisy statistic).
+
+    :return: names of benchmarks slower than the baseline
+             by more than the threshold
+    """
+    regressions = []
+    print(f"{'benchmark':<42}{'baseline':>11}{'current':>11}{'change':>9}")
+    print("-" * 73)
+    for name, result in results.items():
+        try:
+            before = baseline["results"][name]["min"]
+        except KeyError:
+            print(f"{name:<42}{'-':>11}{result['min'] * 1000:>9.2f}ms"
+                  f"{'new':>9}")
+            continue
+
+        after = result["min"]
+        change = after / before - 1 if before else 0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        print(f"{name:<42}{before * 1000:>9.2f}ms{after * 1000:>9.2f}ms"
+              f"{change:>+9.1%}{flag}")
+
+    return regressions
+
+
+def setup(workdir: str):
+    """
+    Configure the application, and replace Oracle by the stand-in
+    (for integrated signatures, and exceptions of sanity checks).
+    """
+    from benchmarks import oracle
+
+    # Importing pronto creates the application, which needs a configuration
+    if "PRONTO_CONFIG" not in os.environ:
+        config = os.path.join(workdir, "config.cfg")
+        with open(config, "wt") as fh:
+            fh.write("ORACLE_IP = ''\n")
+            fh.write("POSTGRESQL = ''\n")
+            fh.write("SECRET_KEY = 'benchmarks'\n")
+            fh.write("RESPONSE_CACHE_SIZE = 0\n")
+
+        os.environ["PRONTO_CONFIG"] = config
+
+    path = os.path.join(workdir, "oracle.sqlite")
+    con = oracle.init(path)
+    con.execute("INSERT INTO ENTRY VALUES ('IPR000001', 'F', 'Synthetic', "
+                "'Synthetic', 'Y', 'N')")
+    con.executemany("INSERT INTO ENTRY2METHOD VALUES ('IPR000001', ?)",
+                    [("PF00001",), ("PTHR10000",)])
+    con.executemany("INSERT INTO PRONTO_SANITY_EXCEPTION (CHECK_TYPE, TERM) "
+                    "VALUES ('lower_case_name', ?)",
+                    [("cAMP",), ("mRNA",), ("tRNA",)])
+    con.commit()
+    con.close()
+
+    from pronto import utils
+
+    # Not `from pronto.api.entry import utils`: the package's `utils`
+    # attribute is `pronto.utils`
+    entry_utils = importlib.import_module("pronto.api.entry.utils")
+    utils.connect_oracle = lambda: oracle.connect(path)
+    entry_utils.connect_oracle = utils.connect_oracle
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks of CPU-bound helpers"
+    )
+    parser.add_argument("-k", "--benchmark", action="append", default=[],
+                        help="run only benchmarks containing this string "
+                             "(can be repeated)")
+    parser.add_argument("-r", "--rounds", type=int, default=5,
+                        help="rounds per benchmark (default: 5)")
+    parser.add_argument("--size", type=int, default=40000,
+                        help="number of annotations and entries "
+                             "(default: 40000)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help=f"baseline file (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--save", action="store_true",
+                        help="save results as the baseline")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare results with the baseline")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression "
+                             "(default: 0.1)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.baseline, "rt") as fh:
+                baseline = json.load(fh)
+        except FileNotFoundError:
+            parser.error(f"{args.baseline}: no such file (use --save)")
+
+        if baseline["corpus"] != {"size": args.size, "seed": args.seed}:
+            parser.error(f"{args.baseline}: baseline created "
+                         f"with a different corpus")
+
+    corpus = Corpus(args.size, args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        setup(workdir)
+        for name, fn in get_benchmarks(corpus).items():
+            if args.benchmark and not any(k in name for k in args.benchmark):
+                continue
+
+            results[name] = measure(fn, args.rounds)
+            if baseline is None:
+                r = results[name]
+                print(f"{name:<42}{r['min'] * 1000:>9.2f}ms "
+                      f"(median: {r['median'] * 1000:.2f}ms)")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "wt") as fh:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "corpus": {"size": args.size, "seed": args.seed},
+                "results": results,
+            }, fh, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above "
+                  f"{args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+Oracle stand-in for benchmarks, backed by SQLite.
+
+Covers the curation tables read by the benchmarked endpoints (ENTRY,
+ENTRY2METHOD, METHOD_COMMENT, audit tables, etc.). Statements written
+for Oracle are translated on the fly: schema prefixes and `FROM DUAL`
+are removed, collections bound with `utils.oracle_array()` are passed
+as JSON arrays, and `TABLE(:n)` becomes `json_each(:n)`.
+
+Statements are reported to `pronto.instrumentation` like those of
+real Oracle connections, so they appear in metrics and traces.
+"""
+
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE CV_DATABASE (
+    DBCODE TEXT PRIMARY KEY,
+    DBNAME TEXT NOT NULL,
+    DBSHORT TEXT NOT NULL
+);
+CREATE TABLE CV_ENTRY_TYPE (
+    CODE TEXT PRIMARY KEY,
+    ABBREV TEXT NOT NULL
+);
+CREATE TABLE METHOD (
+    METHOD_AC TEXT PRIMARY KEY,
+    DBCODE TEXT NOT NULL,
+    NAME TEXT,
+    DESCRIPTION TEXT,
+    SIG_TYPE TEXT
+);
+CREATE TABLE METHOD_AUDIT (
+    METHOD_AC TEXT NOT NULL,
+    ACTION TEXT NOT NULL,
+    TIMESTAMP TIMESTAMP NOT NULL
+);
+CREATE TABLE ENTRY (
+    ENTRY_AC TEXT PRIMARY KEY,
+    ENTRY_TYPE TEXT NOT NULL,
+    NAME TEXT NOT NULL,
+    SHORT_NAME TEXT NOT NULL,
+    CHECKED TEXT NOT NULL,
+    LLM TEXT NOT NULL
+);
+CREATE TABLE ENTRY2METHOD (
+    ENTRY_AC TEXT NOT NULL,
+    METHOD_AC TEXT PRIMARY KEY
+);
+CREATE TABLE ENTRY2ENTRY (
+    ENTRY_AC TEXT NOT NULL,
+    PARENT_AC TEXT NOT NULL
+);
+CREATE TABLE ENTRY_AUDIT (
+    ENTRY_AC TEXT NOT NULL,
+    DBUSER TEXT NOT NULL,
+    ACTION TEXT NOT NULL,
+    TIMESTAMP TIMESTAMP NOT NULL
+);
+CREATE TABLE ENTRY2METHOD_AUDIT (
+    ENTRY_AC TEXT NOT NULL,
+    METHOD_AC TEXT NOT NULL,
+    DBUSER TEXT NOT NULL,
+    ACTION TEXT NOT NULL,
+    TIMESTAMP TIMESTAMP NOT NULL
+);
+CREATE TABLE ENTRY2ENTRY_AUDIT (
+    ENTRY_AC TEXT NOT NULL,
+    PARENT_AC TEXT NOT NULL,
+    DBUSER TEXT NOT NULL,
+    ACTION TEXT NOT NULL,
+    TIMESTAMP TIMESTAMP NOT NULL
+);
+CREATE TABLE DB_VERSION_AUDIT (
+    DBCODE TEXT NOT NULL,
+    VERSION TEXT NOT NULL,
+    TIMESTAMP TIMESTAMP NOT NULL
+);
+CREATE TABLE PRONTO_USER (
+    USERNAME TEXT PRIMARY KEY,
+    NAME TEXT NOT NULL,
+    DB_USER TEXT NOT NULL,
+    IS_ACTIVE TEXT NOT NULL,
+    LAST_ACTIVITY TIMESTAMP
+);
+CREATE TABLE PRONTO_STATES (
+    NAME TEXT PRIMARY KEY,
+    ACTIVE TEXT NOT NULL,
+    ACTIVE_FROM TIMESTAMP
+);
+CREATE TABLE METHOD_COMMENT (
+    ID INTEGER PRIMARY KEY,
+    METHOD_AC TEXT NOT NULL,
+    VALUE TEXT NOT NULL,
+    USERNAME TEXT NOT NULL,
+    CREATED_ON TIMESTAMP NOT NULL,
+    STATUS TEXT NOT NULL
+);
+CREATE TABLE CITATION (
+    PUB_ID TEXT PRIMARY KEY,
+    TITLE TEXT,
+    YEAR INTEGER,
+    VOLUME TEXT,
+    ISSUE TEXT,
+    RAWPAGES TEXT,
+    DOI_URL TEXT,
+    PUBMED_ID INTEGER,
+    ISO_JOURNAL TEXT,
+    MEDLINE_JOURNAL TEXT,
+    AUTHORS TEXT
+);
+CREATE TABLE METHOD2PUB (
+    METHOD_AC TEXT NOT NULL,
+    PUB_ID TEXT NOT NULL
+);
+CREATE TABLE PANTHER2GO (
+    SUBFAMILY_AC TEXT NOT NULL,
+    GO_ID TEXT NOT NULL
+);
+CREATE TABLE FUNFAM2GO (
+    METHOD_AC TEXT NOT NULL,
+    PROTEIN_AC TEXT NOT NULL,
+    GO_ID TEXT NOT NULL
+);
+CREATE TABLE PRONTO_SANITY_CHECK (
+    CHECK_TYPE TEXT NOT NULL,
+    TERM TEXT NOT NULL
+);
+CREATE TABLE PRONTO_SANITY_EXCEPTION (
+    CHECK_TYPE TEXT NOT NULL,
+    TERM TEXT,
+    ANN_ID TEXT,
+    ENTRY_AC TEXT,
+    ENTRY_AC2 TEXT
+);
+CREATE INDEX I_ENTRY2METHOD_ENTRY ON ENTRY2METHOD (ENTRY_AC);
+CREATE INDEX I_METHOD_COMMENT ON METHOD_COMMENT (METHOD_AC);
+CREATE INDEX I_METHOD2PUB ON METHOD2PUB (METHOD_AC);
+CREATE INDEX I_PANTHER2GO ON PANTHER2GO (SUBFAMILY_AC);
+CREATE INDEX I_FUNFAM2GO ON FUNFAM2GO (PROTEIN_AC);
+"""
+
+# Codes of member databases in CV_DATABASE
+DBCODES = {
+    "pfam": "H",
+    "panther": "V",
+    "cathgene3d": "X",
+    "ncbifam": "N",
+    "smart": "R",
+    "profile": "M",
+    "cdd": "J",
+    "superfamily": "Y",
+}
+
+ENTRY_TYPES = [
+    ("A", "Active_site"),
+    ("B", "Binding_site"),
+    ("C", "Conserved_site"),
+    ("D", "Domain"),
+    ("F", "Family"),
+    ("H", "Homologous_superfamily"),
+    ("P", "PTM"),
+    ("R", "Repeat"),
+    ("U", "Unknown"),
+]
+
+CURATOR = ("curator", "Synthetic Curator", "CURATOR")
+
+_SUBSTITUTIONS = [
+    (re.compile(r"\b(?:INTERPRO|UNIPARC)\.", re.I), ""),
+    (re.compile(r"\bFROM\s+DUAL\b", re.I), ""),
+    (re.compile(r"\bTABLE\s*\(\s*(:\w+)\s*\)", re.I), r"json_each(\1)"),
+    (re.compile(r"\bCOLUMN_VALUE\b", re.I), "value"),
+    (re.compile(r"\bSYSDATE\b", re.I), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bNVL\s*\(", re.I), "IFNULL("),
+]
+
+
+def translate(statement: str) -> str:
+    for pattern, repl in _SUBSTITUTIONS:
+        statement = pattern.sub(repl, statement)
+
+    return statement
+
+
+class Collection:
+    """
+    Stand-in for SYS.ODCI*LIST objects, bound as JSON arrays.
+    """
+
+    def __init__(self, obj_type: "ObjectType", values: list):
+        self.type = obj_type
+        self.values = list(values)
+
+    def size(self) -> int:
+        return len(self.values)
+
+    def aslist(self) -> list:
+        return list(self.values)
+
+
+class ObjectType:
+    def __init__(self, name: str):
+        self.name = name
+
+    def newobject(self, values: list | None = None) -> Collection:
+        return Collection(self, values or [])
+
+
+def _bind(params):
+    if params is None:
+        return {}
+    elif isinstance(params, dict):
+        items = params.items()
+    else:
+        # Positional binds (:1, :2, ...)
+        items = ((str(i + 1), value) for i, value in enumerate(params))
+
+    binds = {}
+    for name, value in items:
+        if isinstance(value, Collection):
+            value = json.dumps(value.values)
+
+        binds[name] = value
+
+    return binds
+
+
+class Cursor:
+    """
+    DB-API cursor over SQLite. Rows are fetched when the statement
+    is executed (SQLite is local), then served from memory.
+    """
+
+    def __init__(self, connection: "Connection"):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self._cur = connection._con.cursor()
+        self._rows = []
+        self._pos = 0
+
+    def execute(self, statement: str, parameters=None, **kwargs):
+        if kwargs:
+            parameters = kwargs
+
+        started = time.time()
+        start = time.perf_counter()
+        self._cur.execute(translate(statement), _bind(parameters))
+        self._load()
+        self._notify(statement, parameters, started,
+                     time.perf_counter() - start)
+
+    def executemany(self, statement: str, parameters: list):
+        started = time.time()
+        start = time.perf_counter()
+        self._cur.executemany(translate(statement),
+                              [_bind(p) for p in parameters])
+        self._load()
+        self._notify(statement, parameters, started,
+                     time.perf_counter() - start)
+
+    def _notify(self, statement: str, parameters, started: float,
+                duration: float):
+        # Imported here: importing `pronto` creates the application
+        from pronto import instrumentation
+
+        instrumentation.notify(instrumentation.QueryEvent(
+            "oracle", statement, parameters, started, duration, 0.0,
+            self.rowcount, self
+        ))
+
+    def _load(self):
+        self.description = self._cur.description
+        if self.description is not None:
+            self._rows = self._cur.fetchall()
+            self.rowcount = len(self._rows)
+        else:
+            self._rows = []
+            self.rowcount = self._cur.rowcount
+
+        self._pos = 0
+
+    def fetchone(self):
+        if self._pos < len(self._rows):
+            self._pos += 1
+            return self._rows[self._pos - 1]
+
+        return None
+
+    def fetchmany(self, size: int = 100):
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+
+        return row
+
+    def close(self):
+        self._cur.close()
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Connection:
+    def __init__(self, path: str):
+        self._con = sqlite3.connect(path,
+                                    detect_types=sqlite3.PARSE_DECLTYPES)
+
+    def cursor(self) -> Cursor:
+        return Cursor(self)
+
+    def gettype(self, name: str) -> ObjectType:
+        return ObjectType(name)
+
+    def commit(self):
+        self._con.commit()
+
+    def rollback(self):
+        self._con.rollback()
+
+    def close(self):
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect(path: str) -> Connection:
+    return Connection(path)
+
+
+def init(path: str) -> sqlite3.Connection:
+    """
+    Create the tables of the stand-in database, dropping existing ones.
+    """
+    con = sqlite3.connect(path)
+    con.executescript("".join(f"DROP TABLE IF EXISTS {name};"
+                              for name in re.findall(r"CREATE TABLE (\w+)",
+                                                     SCHEMA)))
+    con.executescript(SCHEMA)
+    return con
+
+
+def create(dataset, path: str):
+    """
+    Create the stand-in database from a synthetic dataset.
+
+    :param dataset: `benchmarks.dataset.Dataset` object
+    :param path: path of the SQLite database (replaced if it exists)
+    """
+    now = datetime.now()
+    con = init(path)
+    cur = con.cursor()
+
+    cur.executemany("INSERT INTO CV_DATABASE VALUES (?, ?, ?)",
+                    [(code, name, name) for name, code in DBCODES.items()])
+    cur.executemany("INSERT INTO CV_ENTRY_TYPE VALUES (?, ?)", ENTRY_TYPES)
+
+    databases = {i: name for i, name, *_ in dataset.databases()}
+    cur.executemany(
+        "INSERT INTO METHOD VALUES (?, ?, ?, ?, ?)",
+        [(s.accession, DBCODES[databases[s.database_id]], None, None,
+          s.type[0])
+         for s in dataset.signatures]
+    )
+
+    username, name, db_user = CURATOR
+    cur.execute("INSERT INTO PRONTO_USER VALUES (?, ?, ?, 'Y', ?)",
+                (username, name, db_user, now))
+    cur.executemany("INSERT INTO PRONTO_STATES VALUES (?, 'N', NULL)",
+                    [("FROZEN",), ("UPDATING",)])
+
+    for entry_acc, entry_type, entry_name, short_name, signatures \
+            in dataset.entries():
+        cur.execute("INSERT INTO ENTRY VALUES (?, ?, ?, ?, 'Y', 'N')",
+                    (entry_acc, entry_type, entry_name, short_name))
+        cur.execute("INSERT INTO ENTRY_AUDIT VALUES (?, ?, 'I', ?)",
+                    (entry_acc, db_user, now))
+        for signature_acc in signatures:
+            cur.execute("INSERT INTO ENTRY2METHOD VALUES (?, ?)",
+                        (entry_acc, signature_acc))
+            cur.execute(
+                "INSERT INTO ENTRY2METHOD_AUDIT VALUES (?, ?, ?, 'I', ?)",
+                (entry_acc, signature_acc, db_user, now)
+            )
+
+    cur.executemany(
+        "INSERT INTO METHOD_COMMENT VALUES (?, ?, ?, ?, ?, 'Y')",
+        [(comment_id, signature_acc, text, username, now)
+         for comment_id, signature_acc, text in dataset.signature_comments()]
+    )
+    cur.executemany("INSERT INTO PANTHER2GO VALUES (?, ?)",
+                    dataset.panther2go())
+    cur.execute("INSERT INTO DB_VERSION_AUDIT VALUES ('I', '1.0', ?)", (now,))
+    con.commit()
+    con.close()
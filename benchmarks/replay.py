@@ -0,0 +1,267 @@
+"""
+Replay of captured traffic against a Pronto instance.
+
+Reads request logs written by Pronto when REQUEST_LOG is set, and sends
+the same requests, in the same order and with the same mix of endpoints,
+to a target instance. Requests are sent at the times they were captured,
+divided by the speed-up factor (0 to send them as fast as possible),
+by a fixed number of concurrent clients.
+
+Only GET requests are replayed by default: captured logs do not contain
+request bodies, and replaying writes would modify curation data.
+Requests of logged-in curators are sent with the session cookie given
+with --session, or anonymously otherwise (and may then fail with 401).
+
+Reports, per endpoint, the number of requests, their share of the
+traffic, the error rate (failed requests and 5xx responses), and
+latency percentiles, as well as how late requests were sent compared
+to their schedule: a large lag means the clients could not keep up,
+and the concurrency should be increased.
+
+Usage:
+    python -m benchmarks.replay requests.log --target http://localhost:5000 \\
+        --concurrency 16 --speedup 4
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks import percentile
+
+
+@dataclass
+class Request:
+    time: float
+    method: str
+    url: str
+    endpoint: str
+    user: str
+
+
+@dataclass
+class Stats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+def load(paths: list[str], methods: set[str]) -> list[Request]:
+    requests = []
+    for path in paths:
+        with open(path, "rt") as fh:
+            for line in fh:
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    # Truncated line (e.g. log being written)
+                    continue
+
+                if obj["method"] not in methods:
+                    continue
+
+                url = obj["path"]
+                if obj["args"]:
+                    url += "?" + urlencode([(k, v) for k, v in obj["args"]])
+
+                requests.append(Request(obj["time"], obj["method"], url,
+                                        obj["endpoint"] or "none",
+                                        obj["user"]))
+
+    # Logs of several workers or servers are merged
+    requests.sort(key=lambda r: r.time)
+    return requests
+
+
+class Client:
+    """
+    Send requests to the target, with one persistent connection per thread.
+    """
+
+    def __init__(self, target: str, session: str | None, timeout: float):
+        url = urlsplit(target)
+        if url.scheme == "https":
+            self._class = http.client.HTTPSConnection
+        else:
+            self._class = http.client.HTTPConnection
+
+        self.netloc = url.netloc
+        self.prefix = url.path.rstrip("/")
+        self.session = session
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = self._class(self.netloc,
+                                                timeout=self.timeout)
+        return con
+
+    def send(self, req: Request) -> int:
+        headers = {"Accept-Encoding": "gzip, br"}
+        if req.user == "curator" and self.session:
+            headers["Cookie"] = f"session={self.session}"
+
+        con = self._connection()
+        try:
+            con.request(req.method, self.prefix + req.url, headers=headers)
+            response = con.getresponse()
+            response.read()
+            return response.status
+        except Exception:
+            con.close()
+            self._local.con = None
+            raise
+
+
+def replay(requests: list[Request], client: Client, concurrency: int,
+           speedup: float) -> tuple[dict[str, Stats], list[float], float]:
+    stats: dict[str, Stats] = {}
+    lags = []
+    lock = threading.Lock()
+
+    def run(req: Request, scheduled: float):
+        start = time.perf_counter()
+        try:
+            status = client.send(req)
+        except Exception:
+            status = None
+
+        latency = time.perf_counter() - start
+        with lock:
+            s = stats.setdefault(req.endpoint, Stats())
+            s.latencies.append(latency)
+            lags.append(start - scheduled)
+            if status is None or status >= 500:
+                s.errors += 1
+
+            if status is not None:
+                s.statuses[status] = s.statuses.get(status, 0) + 1
+
+    origin = requests[0].time if requests else 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for req in requests:
+            if speedup > 0:
+                scheduled = start + (req.time - origin) / speedup
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+
+            executor.submit(run, req, scheduled)
+
+    return stats, lags, time.perf_counter() - start
+
+
+def summarize(stats: dict[str, Stats], lags: list[float],
+              elapsed: float) -> dict:
+    total = sum(len(s.latencies) for s in stats.values())
+    endpoints = []
+    for endpoint, s in stats.items():
+        latencies = sorted(s.latencies)
+        n = len(latencies)
+        endpoints.append({
+            "endpoint": endpoint,
+            "requests": n,
+            "share": n / total,
+            "error_rate": s.errors / n,
+            "statuses": s.statuses,
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000,
+        })
+
+    endpoints.sort(key=lambda e: e["requests"], reverse=True)
+    lags = sorted(lags)
+    return {
+        "requests": total,
+        "elapsed": elapsed,
+        "throughput": total / elapsed if elapsed else 0,
+        "lag": {
+            "p50": percentile(lags, 50) * 1000,
+            "p99": percentile(lags, 99) * 1000,
+            "max": lags[-1] * 1000 if lags else 0,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_summary(summary: dict):
+    header = (f"{'endpoint':<44}{'n':>7}{'share':>8}{'err':>8}"
+              f"{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    print(header)
+    print("-" * len(header))
+    for e in summary["endpoints"]:
+        print(f"{e['endpoint']:<44}{e['requests']:>7}{e['share']:>8.1%}"
+              f"{e['error_rate']:>8.1%}{e['p50']:>9.1f}{e['p90']:>9.1f}"
+              f"{e['p99']:>9.1f}{e['max']:>9.1f}")
+
+    lag = summary["lag"]
+    print(f"\n{summary['requests']} requests in {summary['elapsed']:.1f}s "
+          f"({summary['throughput']:.1f} req/s); "
+          f"lag (ms): p50={lag['p50']:.1f}, p99={lag['p99']:.1f}, "
+          f"max={lag['max']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay captured requests against a Pronto instance"
+    )
+    parser.add_argument("logs", nargs="+", metavar="LOG",
+                        help="request log (REQUEST_LOG setting)")
+    parser.add_argument("-t", "--target", default="http://localhost:5000",
+                        help="base URL of the instance "
+                             "(default: http://localhost:5000)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="concurrent clients (default: 8)")
+    parser.add_argument("-s", "--speedup", type=float, default=1,
+                        help="speed-up factor of the captured timeline, "
+                             "0 to send requests without delay (default: 1)")
+    parser.add_argument("-m", "--method", action="append",
+                        help="replay requests with this method "
+                             "(default: GET, can be repeated)")
+    parser.add_argument("-n", "--limit", type=int,
+                        help="replay at most this number of requests")
+    parser.add_argument("--session", metavar="COOKIE",
+                        help="value of the session cookie of a logged-in "
+                             "user, for requests captured from curators")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="seconds to wait for a response (default: 300)")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="save results as JSON")
+    args = parser.parse_args()
+
+    methods = set(args.method or ["GET"])
+    requests = load(args.logs, methods)
+    if args.limit is not None:
+        requests = requests[:args.limit]
+
+    if not requests:
+        parser.error("no requests to replay")
+
+    duration = requests[-1].time - requests[0].time
+    print(f"replaying {len(requests)} requests captured over "
+          f"{duration:.0f}s", file=sys.stderr)
+
+    client = Client(args.target, args.session, args.timeout)
+    stats, lags, elapsed = replay(requests, client, args.concurrency,
+                                  args.speedup)
+    summary = summarize(stats, lags, elapsed)
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "wt") as fh:
+            json.dump(summary, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
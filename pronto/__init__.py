@@ -4,12 +4,38 @@ from flask import Flask, render_template
 
 from . import api
 from . import auth
+from . import cache
+from . import capture
+from . import comparisons
+from . import diskcache
+from . import httpcache
+from . import metrics
+from . import profiling
+from . import proteinindex
+from . import serialization
+from . import singleflight
+from . import slowlog
+from . import tracing
+from . import utils
 
 
 app = Flask(__name__)
 app.config.from_envvar("PRONTO_CONFIG")
+app.json = serialization.ProntoJSONProvider(app)
 app.permanent_session_lifetime = timedelta(days=7)
 app.url_map.strict_slashes = True
+utils.init_pools(app)
+cache.init_app(app)
+diskcache.init_app(app)
+proteinindex.init_app(app)
+comparisons.init_app(app)
+singleflight.init_app(app)
+httpcache.init_app(app)
+metrics.init_app(app)
+tracing.init_app(app)
+profiling.init_app(app)
+slowlog.init_app(app)
+capture.init_app(app)
 
 
 @app.route("/")
@@ -1,7 +1,11 @@
 import importlib.metadata
 from flask import Blueprint, jsonify, request
 
-from pronto import auth, utils
+from pronto import auth, cache, metrics, utils
+from pronto.profiling import profiler
+from pronto.tracing import traces
+from pronto.diskcache import disk_cache
+from pronto.proteinindex import protein_index
 from . import annotation
 from . import checks
 from . import database
@@ -22,6 +26,16 @@ blueprints = [bp, annotation.bp, checks.bp, database.bp, databases.bp,
               signature.bp, signatures.bp, proteome.bp]
 
 
+@bp.app_errorhandler(utils.QueryTimeout)
+def handle_query_timeout(exc):
+    return jsonify({
+        "error": {
+            "title": "Gateway Timeout",
+            "message": str(exc)
+        }
+    }), 504
+
+
 @bp.route("/")
 def api_index():
     user = auth.get_user()
@@ -42,7 +56,7 @@ def api_index():
         "oracle": utils.get_oracle_dsn().rsplit('/')[-1],
         "postgresql": utils.get_pg_url().rsplit('/')[-1],
         "uniprot": uniprot_version,
-        "states": utils.get_states().as_dict(),
+        "states": cache.states.get().as_dict(),
         "user": user,
         "version": pronto_version,
     })
@@ -101,6 +115,174 @@ def get_activity():
     return jsonify(activity)
 
 
+@bp.route("/states/", methods=["POST"])
+def refresh_states():
+    # Reload states, e.g. after an administrator changed PRONTO_STATES
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to perform this action."
+            }
+        }), 401
+
+    cache.states.invalidate()
+    return jsonify({
+        "status": True,
+        "states": cache.states.get().as_dict()
+    })
+
+
+@bp.route("/pools/")
+def get_pools():
+    # Names of proxy pools are database users
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to view pool statistics."
+            }
+        }), 401
+
+    return jsonify(utils.get_pool_stats())
+
+
+@bp.route("/metrics")
+def get_metrics():
+    return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
+@bp.route("/cache/")
+def get_cache_stats():
+    return jsonify(disk_cache.get_stats())
+
+
+@bp.route("/cache/", methods=["DELETE"])
+def clear_cache():
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to perform this action."
+            }
+        }), 401
+
+    disk_cache.clear()
+    return jsonify({"status": True})
+
+
+@bp.route("/index/")
+def get_index_stats():
+    return jsonify(protein_index.get_stats())
+
+
+@bp.route("/traces/")
+def get_traces():
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to view request traces."
+            }
+        }), 401
+
+    return jsonify({
+        "enabled": traces.enabled,
+        "size": traces.size,
+        "results": [trace.summary() for trace in traces.get_traces()]
+    })
+
+
+@bp.route("/traces/<int:trace_id>/")
+def get_trace(trace_id):
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to view request traces."
+            }
+        }), 401
+
+    trace = traces.get_trace(trace_id)
+    if trace is None:
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Not found",
+                "message": f"Trace {trace_id} does not exist "
+                           f"or has been discarded."
+            }
+        }), 404
+
+    return jsonify(trace.as_dict())
+
+
+@bp.route("/traces/", methods=["DELETE"])
+def clear_traces():
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to perform this action."
+            }
+        }), 401
+
+    traces.clear()
+    return jsonify({"status": True})
+
+
+@bp.route("/profiles/")
+def get_profiles():
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to view request profiles."
+            }
+        }), 401
+
+    return jsonify({
+        "enabled": profiler.enabled,
+        "size": profiler.size,
+        "results": [p.summary() for p in profiler.get_profiles()]
+    })
+
+
+@bp.route("/profiles/<int:profile_id>/")
+@bp.route("/profiles/<int:profile_id>/collapsed")
+def get_profile(profile_id):
+    if not auth.get_user():
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Access denied",
+                "message": "Please log in to view request profiles."
+            }
+        }), 401
+
+    profile = profiler.get_profile(profile_id)
+    if profile is None:
+        return jsonify({
+            "status": False,
+            "error": {
+                "title": "Not found",
+                "message": f"Profile {profile_id} does not exist "
+                           f"or has been discarded."
+            }
+        }), 404
+    elif request.path.endswith("/collapsed"):
+        return profile.collapsed(), 200, {"Content-Type": "text/plain"}
+
+    return jsonify(profile.as_dict())
+
+
 @bp.route("/tasks/")
 def get_tasks():
     return jsonify(utils.executor.get_tasks(
@@ -7,7 +7,7 @@ import oracledb
 from oracledb import Cursor, DatabaseError, STRING
 from flask import Blueprint, jsonify, request
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from pronto.api.checks.utils import load_global_exceptions
 
 bp = Blueprint("api_annotation", __name__, url_prefix="/api/annotation")
@@ -467,7 +467,7 @@ def create_annotation():
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -659,7 +659,7 @@ def update_annotation(ann_id):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -1020,7 +1020,7 @@ def approve_annotation(ann_id):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -1102,7 +1102,7 @@ def delete_annotations(ann_id):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -9,7 +9,7 @@ from .annotations import check as check_annotations
 from .entries import check as check_entries
 from .go_terms import check as check_go
 from .utils import CHECKS
-from pronto import auth, utils
+from pronto import auth, cache, utils
 
 
 @bp.route("/")
@@ -106,7 +106,7 @@ def submit_checks():
             ),
             401,
         )
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return (
             jsonify(
                 {
@@ -137,7 +137,7 @@ def submit_checks():
 def run_checks(info: dict, pg_url: str, ora_goa_url: str):
     run_id = uuid.uuid1().hex
 
-    con = oracledb.connect(**info)
+    con = utils.connect_oracle_info(info)
     cur = con.cursor()
 
     counts = {}
@@ -339,7 +339,7 @@ def resolve_error(run_id, err_id):
             ),
             401,
         )
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return (
             jsonify(
                 {
@@ -475,7 +475,7 @@ def add_term():
             ),
             401,
         )
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return (
             jsonify(
                 {
@@ -580,7 +580,7 @@ def delete_term():
             ),
             401,
         )
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return (
             jsonify(
                 {
@@ -662,7 +662,7 @@ def add_exception():
             ),
             401,
         )
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return (
             jsonify(
                 {
@@ -735,7 +735,7 @@ def delete_exception():
             ),
             401,
         )
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return (
             jsonify(
                 {
@@ -2,8 +2,8 @@ import re
 
 from oracledb import Cursor
 
-from pronto.utils import connect_pg, SIGNATURES
-from pronto.api.signatures.matrices import get_comparisons
+from pronto.utils import connect_pg, oracle_arrays, SIGNATURES
+from pronto.api.signatures.matrices import get_stored_comparisons
 from .utils import load_exceptions, load_global_exceptions, load_terms
 
 DoS = dict[str, set[str]]
@@ -416,7 +416,8 @@ def ck_child_matches(cur: Cursor, pg_url: str, exceptions: DoS) -> Err:
         for item in info.values():
             all_sign = all_sign.union(item)
         
-        signatures, comparisons, _ = get_comparisons(pg_cur, tuple(all_sign))
+        signatures, comparisons = get_stored_comparisons(pg_cur,
+                                                         list(all_sign))
         no_overlap = {}
 
         for sign1, coloc in comparisons.items():
@@ -496,23 +497,20 @@ def ck_fragments(cur: Cursor, sign_frag_only: list[str]) -> Err:
     errors = []
 
     if len(sign_frag_only) > 0:
-        binds = [":" + str(i + 1) for i in range(len(sign_frag_only))]
-
-        cur.execute(
-            f"""
-            SELECT E.ENTRY_AC, E2M.METHOD_AC
-            FROM INTERPRO.ENTRY E
-            JOIN INTERPRO.ENTRY2METHOD E2M ON E.ENTRY_AC=E2M.ENTRY_AC
-            WHERE E.CHECKED='Y' AND E2M.METHOD_AC IN ({",".join(binds)})
-            GROUP BY E.ENTRY_AC, E2M.METHOD_AC
-            """,
-            sign_frag_only
-        )
-
-        for row in cur:
-            entry_ac, sign = row
-            if sign in sign_frag_only:
-                errors.append((entry_ac, sign))
+        for signatures in oracle_arrays(cur, sign_frag_only):
+            cur.execute(
+                """
+                SELECT E.ENTRY_AC, E2M.METHOD_AC
+                FROM INTERPRO.ENTRY E
+                JOIN INTERPRO.ENTRY2METHOD E2M ON E.ENTRY_AC=E2M.ENTRY_AC
+                WHERE E.CHECKED='Y'
+                  AND E2M.METHOD_AC IN (SELECT COLUMN_VALUE FROM TABLE(:1))
+                GROUP BY E.ENTRY_AC, E2M.METHOD_AC
+                """,
+                [signatures]
+            )
+
+            errors += cur.fetchall()
 
     return errors
 
@@ -3,6 +3,7 @@
 from oracledb import Cursor
 import oracledb
 
+from pronto.instrumentation import OracleConnection
 from .utils import load_terms
 
 
@@ -108,7 +109,7 @@ def check(ora_cur: Cursor,  ora_goa_url: str):
     for item in ck_forbidden_go(ora_cur, terms):
         yield "generic_go", item
 
-    con_goa = oracledb.connect(ora_goa_url)
+    con_goa = oracledb.connect(ora_goa_url, conn_class=OracleConnection)
     goa_cur = con_goa.cursor()
 
     for item in ck_secondary_go(ora_cur, goa_cur):
@@ -2,12 +2,90 @@ import json
 
 from flask import Blueprint, jsonify, request
 
-from pronto import utils
+from pronto import cache, utils
+from pronto.comparisons import on_demand
+from pronto.diskcache import disk_cache
+from pronto.httpcache import conditional, mark_incomplete
+from pronto.singleflight import coalesce
+from pronto.serialization import Stream, stream_jsonify
 
 
 bp = Blueprint("api_database", __name__, url_prefix="/api/database")
 
 
+def _get_comparisons_on_demand(cur, unintegrated: dict) -> list[tuple]:
+    """
+    Get the comparisons of unintegrated signatures missing from
+    interpro.comparison (e.g. new signatures) with other signatures,
+    and return the same rows as the query of `get_unintegrated()`.
+
+    Only comparisons already cached are returned: the others are computed
+    in the background, for later requests.
+    """
+    if not disk_cache.enabled:
+        return []
+
+    cur.execute(
+        """
+        SELECT q.accession
+        FROM UNNEST(%s::text[]) AS q(accession)
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM interpro.comparison c
+            WHERE c.signature_acc_1 = q.accession
+        )
+        """,
+        [[acc for acc, (_, q_proteins, _, _) in unintegrated.items()
+          if q_proteins]]
+    )
+
+    queries = {}
+    pending = []
+    for q_acc, in cur.fetchall():
+        comparisons = on_demand.get_cached_signature(q_acc)
+        if comparisons is None:
+            pending.append(q_acc)
+        else:
+            queries[q_acc] = comparisons
+
+    if pending:
+        on_demand.schedule_signatures(pending)
+        mark_incomplete()
+
+    t_accessions = {t_acc for c in queries.values() for t_acc in c}
+    if not t_accessions:
+        return []
+
+    cur.execute(
+        """
+        SELECT s.accession, s.type, s.num_complete_sequences,
+               s.num_residues, s.database_id, d.name, d.name_long
+        FROM interpro.signature s
+        INNER JOIN interpro.database d
+            ON s.database_id = d.id
+        WHERE s.accession = ANY(%s)
+        """,
+        [list(t_accessions)]
+    )
+    targets = {row[0]: row for row in cur.fetchall()}
+
+    rows = []
+    for q_acc, comparisons in queries.items():
+        q_proteins = unintegrated[q_acc][1]
+        for t_acc, c in comparisons.items():
+            try:
+                target = targets[t_acc]
+            except KeyError:
+                continue
+
+            min_proteins = min(q_proteins, target[2])
+            if min_proteins and c["overlaps"] / min_proteins >= 0.5:
+                rows.append((q_acc, *target, c["collocations"],
+                             c["overlaps"], c["res_overlaps"]))
+
+    return rows
+
+
 def get_latest_freeze(cur):
     """
     Get the date of the last time a record for InterPro was inserted into the
@@ -36,6 +114,7 @@ def get_latest_freeze(cur):
 
 
 @bp.route("/<db_name>/signatures/")
+@conditional()
 def get_signatures(db_name):
     db_name = db_name.lower()
     try:
@@ -116,28 +195,6 @@ def get_signatures(db_name):
     else:
         abstract_filter = ""
 
-    pg_con = utils.connect_pg()
-    pg_cur = pg_con.cursor()
-    pg_cur.execute(
-        """
-        SELECT id, name_long, version
-        FROM database
-        WHERE name = %s
-        """,
-        [db_name]
-    )
-    row = pg_cur.fetchone()
-    if not row:
-        pg_cur.close()
-        pg_con.close()
-        return jsonify({
-            "results": [],
-            "count": 0,
-            "database": None
-        }), 404
-
-    db_identifier, db_full_name, db_version = row
-
     sql = f"""
         SELECT accession, name, type, num_sequences
         FROM interpro.signature
@@ -146,11 +203,10 @@ def get_signatures(db_name):
 
     if search_query:
         sql += " AND (LOWER(accession) LIKE %s OR LOWER(name) LIKE %s)"
-        params = [db_identifier,
-                  f"{search_query.lower()}%",
+        params = [f"{search_query.lower()}%",
                   f"{search_query.lower()}%"]
     else:
-        params = [db_identifier]
+        params = []
 
     if llm is True:
         sql += """
@@ -174,96 +230,53 @@ def get_signatures(db_name):
         sql += (f" ORDER BY num_reviewed_sequences {order_dir}, "
                 f"num_sequences {order_dir}")
 
-    pg_cur.execute(sql, params)
-    pg_signatures = pg_cur.fetchall()
-    pg_cur.close()
-    pg_con.close()
+    # PostgreSQL and Oracle queries are independent: run them concurrently
+    pg_results, ora_results = utils.fan_out(
+        utils.Query(_get_pg_signatures, db_name, sql, params),
+        utils.Query(_get_ora_signatures, db_name,
+                    new_since_prev_release is not None)
+    )
 
-    ora_con = utils.connect_oracle()
-    ora_cur = ora_con.cursor()
-    if new_since_prev_release is not None:
-        date = get_latest_freeze(ora_cur)
-        ora_cur.execute(
-            """
-            SELECT METHOD_AC
-            FROM INTERPRO.METHOD_AUDIT
-            WHERE TIMESTAMP >= :1 AND ACTION = 'I'
-            """,
-            [date]
-        )
-        new_signatures = {acc for acc, in ora_cur.fetchall()}
+    row, pg_signatures = pg_results
+    if not row:
+        return jsonify({
+            "results": [],
+            "count": 0,
+            "database": None
+        }), 404
 
-        if new_since_prev_release:
-            pg_signatures = [s for s in pg_signatures if s[0] in new_signatures]
-        else:
-            pg_signatures = [s for s in pg_signatures if s[0] not in new_signatures]
+    db_identifier, db_full_name, db_version = row
+    new_signatures, code2type, ora_signatures = ora_results
 
-    ora_cur.execute("SELECT CODE, ABBREV FROM INTERPRO.CV_ENTRY_TYPE")
-    code2type = dict(ora_cur.fetchall())
+    if new_since_prev_release:
+        pg_signatures = [s for s in pg_signatures if s[0] in new_signatures]
+    elif new_since_prev_release is False:
+        pg_signatures = [s for s in pg_signatures if s[0] not in new_signatures]
 
-    ora_cur.execute(
-        """
-        SELECT 
-          M.METHOD_AC, 
-          E.ENTRY_AC, 
-          E.ENTRY_TYPE,
-          E.SHORT_NAME,
-          E.CHECKED,
-          C.VALUE,
-          C.NAME,
-          C.CREATED_ON, 
-          NVL(EA.NUM_ENTRIES, 0)
-        FROM INTERPRO.CV_DATABASE D
-        INNER JOIN INTERPRO.METHOD M
-          ON D.DBCODE = M.DBCODE
-        LEFT OUTER JOIN INTERPRO.ENTRY2METHOD EM 
-          ON M.METHOD_AC = EM.METHOD_AC
-        LEFT OUTER JOIN INTERPRO.ENTRY E 
-          ON E.ENTRY_AC = EM.ENTRY_AC
-        LEFT OUTER JOIN (
-          SELECT METHOD_AC, COUNT(DISTINCT ENTRY_AC) AS NUM_ENTRIES
-          FROM INTERPRO.ENTRY2METHOD_AUDIT
-          GROUP BY METHOD_AC
-        ) EA ON M.METHOD_AC = EA.METHOD_AC
-        LEFT OUTER JOIN (
-          SELECT
-            C.METHOD_AC,
-            C.VALUE,
-            P.NAME,
-            C.CREATED_ON,
-            ROW_NUMBER() OVER (
-              PARTITION BY METHOD_AC 
-              ORDER BY C.CREATED_ON DESC
-            ) R
-            FROM INTERPRO.METHOD_COMMENT C
-            INNER JOIN INTERPRO.PRONTO_USER P 
-              ON C.USERNAME = P.USERNAME
-            WHERE C.STATUS='Y'
-        ) C ON (M.METHOD_AC = C.METHOD_AC AND C.R = 1)
-        WHERE LOWER(D.DBSHORT) = :1
-        """,
-        [db_name]
-    )
-    ora_signatures = {row[0]: row[1:] for row in ora_cur}
-    ora_cur.close()
-    ora_con.close()
+    sig_comments = cache.comments.get()
 
     results = []
     for acc, name, type_name, cnt in pg_signatures:
         try:
             info = ora_signatures[acc]
         except KeyError:
-            info = [None] * 8
+            info = [None] * 5
 
         entry_acc = info[0]
         type_code = info[1]
         entry_type_name = code2type[type_code] if entry_acc else None
         entry_name = info[2]
         is_checked = info[3] == "Y"
-        comment_text = info[4]
-        comment_author = info[5]
-        comment_date = info[6]
-        is_past_integrated = info[7] is not None and info[7] > 0
+        is_past_integrated = info[4] is not None and info[4] > 0
+
+        try:
+            latest_comment = sig_comments[acc].latest
+        except KeyError:
+            comment_text = comment_author = comment_date = None
+        else:
+            comment_text = latest_comment.text
+            comment_author = latest_comment.author
+            comment_date = latest_comment.date
 
         if past_integrated is True and not is_past_integrated:
             continue
@@ -352,7 +365,84 @@ def get_signatures(db_name):
     })
 
 
+def _get_pg_signatures(db_name: str, sql: str,
+                       params: list) -> tuple[tuple | None, list[tuple]]:
+    con = utils.connect_pg()
+    cur = con.cursor()
+    cur.execute(
+        """
+        SELECT id, name_long, version
+        FROM database
+        WHERE name = %s
+        """,
+        [db_name]
+    )
+    row = cur.fetchone()
+    if row:
+        cur.execute(sql, [row[0]] + params)
+        signatures = cur.fetchall()
+    else:
+        signatures = []
+
+    cur.close()
+    con.close()
+    return row, signatures
+
+
+def _get_ora_signatures(db_name: str, get_new: bool):
+    con = utils.connect_oracle()
+    cur = con.cursor()
+    if get_new:
+        date = get_latest_freeze(cur)
+        cur.execute(
+            """
+            SELECT METHOD_AC
+            FROM INTERPRO.METHOD_AUDIT
+            WHERE TIMESTAMP >= :1 AND ACTION = 'I'
+            """,
+            [date]
+        )
+        new_signatures = {acc for acc, in cur.fetchall()}
+    else:
+        new_signatures = set()
+
+    cur.execute("SELECT CODE, ABBREV FROM INTERPRO.CV_ENTRY_TYPE")
+    code2type = dict(cur.fetchall())
+
+    cur.execute(
+        """
+        SELECT 
+          M.METHOD_AC, 
+          E.ENTRY_AC, 
+          E.ENTRY_TYPE,
+          E.SHORT_NAME,
+          E.CHECKED,
+          NVL(EA.NUM_ENTRIES, 0)
+        FROM INTERPRO.CV_DATABASE D
+        INNER JOIN INTERPRO.METHOD M
+          ON D.DBCODE = M.DBCODE
+        LEFT OUTER JOIN INTERPRO.ENTRY2METHOD EM 
+          ON M.METHOD_AC = EM.METHOD_AC
+        LEFT OUTER JOIN INTERPRO.ENTRY E 
+          ON E.ENTRY_AC = EM.ENTRY_AC
+        LEFT OUTER JOIN (
+          SELECT METHOD_AC, COUNT(DISTINCT ENTRY_AC) AS NUM_ENTRIES
+          FROM INTERPRO.ENTRY2METHOD_AUDIT
+          GROUP BY METHOD_AC
+        ) EA ON M.METHOD_AC = EA.METHOD_AC
+        WHERE LOWER(D.DBSHORT) = :1
+        """,
+        [db_name]
+    )
+    ora_signatures = {row[0]: row[1:] for row in cur}
+    cur.close()
+    con.close()
+    return new_signatures, code2type, ora_signatures
+
+
 @bp.route("/<db_name>/unintegrated/")
+@conditional()
+@coalesce
 def get_unintegrated(db_name):
     try:
         page = int(request.args["page"])
@@ -449,36 +539,7 @@ def get_unintegrated(db_name):
     else:
         abstract_filter = ""
 
-    con = utils.connect_oracle()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT METHOD_AC, COUNT(*)
-        FROM INTERPRO.METHOD_COMMENT
-        WHERE STATUS = 'Y'
-        GROUP BY METHOD_AC
-        """
-    )
-    num_comments = dict(cur.fetchall())
-
-    cur.execute(
-        """
-        SELECT EM.METHOD_AC, E.ENTRY_AC, E.NAME, E.ENTRY_TYPE, E.CHECKED
-        FROM INTERPRO.ENTRY2METHOD EM
-        INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
-        """
-    )
-    integrated = {}
-    for row in cur.fetchall():
-        integrated[row[0]] = {
-            "accession": row[1],
-            "name": row[2],
-            "type": row[3],
-            "checked": row[4] == "Y"
-        }
-
-    cur.close()
-    con.close()
+    integrated = cache.integration.get()
 
     con = utils.connect_pg(utils.get_pg_url())
     cur = con.cursor()
@@ -541,8 +602,10 @@ def get_unintegrated(db_name):
         """,
         [db_identifier]
     )
+    rows = cur.fetchall()
+    rows += _get_comparisons_on_demand(cur, unintegrated)
 
-    for row in cur.fetchall():
+    for row in rows:
         q_acc = row[0]
 
         try:
@@ -560,7 +623,17 @@ def get_unintegrated(db_name):
         collocations = row[8]
         protein_overlaps = row[9]
         residue_overlaps = row[10]
-        t_entry = integrated.get(t_acc)
+        try:
+            e = integrated[t_acc]
+        except KeyError:
+            t_entry = None
+        else:
+            t_entry = {
+                "accession": e.entry_acc,
+                "name": e.entry_name,
+                "type": e.entry_type,
+                "checked": e.checked
+            }
 
         # if not check_types(q_type, t_type):
         #     # Invalid type pair (HS can only be together)
@@ -604,7 +677,7 @@ def get_unintegrated(db_name):
 
     results = []
     for q_acc, obj in unintegrated.items():
-        q_comments = num_comments.get(q_acc, 0)
+        q_comments = cache.comments.count(q_acc)
         if comment_filter is not None:
             if comment_filter:
                 if not q_comments:
@@ -633,9 +706,9 @@ def get_unintegrated(db_name):
     results.sort(key=lambda x: x[sort_col.replace("-", "_")],
                  reverse=sort_order == "desc")
 
-    return jsonify({
+    return stream_jsonify({
         "page_info": {"page": page, "page_size": page_size},
-        "results": results[(page - 1) * page_size:page * page_size],
+        "results": Stream(results[(page - 1) * page_size:page * page_size]),
         "count": len(results),
         "database": {"name": db_full_name, "version": db_version},
         "parameters": {
@@ -36,12 +36,12 @@ def get_member_databases():
     num_signatures = dict(cur.fetchall())
 
     cur.execute(
-        f"""
+        """
         SELECT id, name, name_long, version, updated
         FROM interpro.database
-        WHERE id IN ({','.join(['%s' for _ in num_signatures])})
+        WHERE id = ANY(%s)
         """,
-        list(num_signatures.keys())
+        [list(num_signatures.keys())]
     )
     databases = {}
     for dbid, name, name_long, version, updated in cur:
@@ -10,7 +10,7 @@ from pronto.api.entry.utils import sanitize_domain_description, sanitize_domain_
 
 bp = Blueprint("api_entry", __name__, url_prefix="/api/entry")
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from pronto.api import annotation
 from pronto.api.entry.annotations import relate_entry_to_anno
 from pronto.api.signature import is_amr
@@ -110,7 +110,7 @@ def update_entry(accession):
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -358,13 +358,13 @@ def update_entry(accession):
         con2 = utils.connect_pg(utils.get_pg_url())
         cur2 = con2.cursor()
         cur2.execute(
-            f"""
+            """
             SELECT COUNT(*)
             FROM interpro.signature
-            WHERE accession IN ({','.join('%s' for _ in integrated)})
+            WHERE accession = ANY(%s)
             AND num_sequences = 0
             """,
-            integrated
+            [integrated]
         )
         cnt, = cur2.fetchone()
         cur2.close()
@@ -418,6 +418,7 @@ def update_entry(accession):
         }), 500
     else:
         con.commit()
+        cache.integration.update(cur, entries=[accession])
         return jsonify({"status": True})
     finally:
         cur.close()
@@ -436,7 +437,7 @@ def delete_entry(accession):
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -479,7 +480,7 @@ def delete_entry(accession):
 
 
 def _delete_entry(info: dict, accession: str, delete_annotations: bool):
-    con = oracledb.connect(**info)
+    con = utils.connect_oracle_info(info)
     cur = con.cursor()
 
     if delete_annotations:
@@ -515,6 +516,7 @@ def _delete_entry(info: dict, accession: str, delete_annotations: bool):
         raise exc
     else:
         con.commit()
+        cache.integration.update(cur, entries=[accession])
     finally:
         cur.close()
         con.close()
@@ -531,7 +533,7 @@ def create_entry():
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -959,6 +961,7 @@ def create_entry():
         }), 500
     else:
         con.commit()
+        cache.integration.update(cur, entries=[entry_acc])
         return jsonify({
             "status": True,
             "accession": entry_acc
@@ -5,7 +5,7 @@ import oracledb
 from flask import jsonify
 from oracledb import Cursor, DatabaseError
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from . import bp
 
 
@@ -177,7 +177,7 @@ def link_annotation(accession, ann_id):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -222,7 +222,7 @@ def unlink_annotation(accession, ann_id):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -293,7 +293,7 @@ def move_annotation(accession: str, ann_id: str, x: int):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
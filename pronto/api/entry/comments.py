@@ -5,7 +5,7 @@ import re
 from oracledb import DatabaseError
 from flask import jsonify, request
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from . import bp
 
 
@@ -97,7 +97,7 @@ def add_entry_comment(accession):
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -166,7 +166,7 @@ def delete_entry_comment(accession, commentid):
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -3,7 +3,7 @@
 from flask import jsonify
 from oracledb import DatabaseError
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from . import bp
 
 
@@ -26,13 +26,13 @@ def get_terms(accession):
         con = utils.connect_pg(utils.get_pg_url())
         cur = con.cursor()
         cur.execute(
-            f"""
+            """
             SELECT id, name, category, num_constraints, is_obsolete,
                    definition, replaced_id
             FROM interpro.term
-            WHERE id IN ({','.join('%s' for _ in terms)})
+            WHERE id = ANY(%s)
             ORDER BY id
-            """, terms
+            """, [terms]
         )
         terms = []
         for row in cur:
@@ -63,7 +63,7 @@ def add_term(accession, term_id):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -161,7 +161,7 @@ def delete_term(accession, term_id):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -251,12 +251,12 @@ def get_term_constraints(accession, term_id):
         lr_numbers.append((left_num, right_num))
 
     pg_cur.execute(
-        f"""
+        """
         SELECT DISTINCT protein_acc, is_reviewed, taxon_left_num
         FROM signature2protein
-        WHERE signature_acc IN ({','.join(['%s' for _ in signatures])})
+        WHERE signature_acc = ANY(%s)
         """,
-        signatures
+        [signatures]
     )
 
     proteins = {"total": 0, "reviewed": 0}
@@ -3,7 +3,7 @@
 from flask import jsonify, request
 from oracledb import DatabaseError
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from ..annotation import get_citations, insert_citations
 from . import bp
 
@@ -53,7 +53,7 @@ def link_reference(accession, pmid):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -169,7 +169,7 @@ def unlink_references(accession):
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -234,7 +234,7 @@ def update_entry_citations(accession):
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -293,17 +293,17 @@ def update_signature_citations(
     :param orc_con: open connection to IPPRO oracle db
     """
     invalid_pmids, failed_pub_ids, inserted_pub_ids = [], [], []
-    pmid_query = f"""
+    pmid_query = """
         SELECT DISTINCT P.pubmed_id
         FROM protein2publication P
         INNER JOIN signature2protein S ON P.protein_acc = S.protein_acc
-        WHERE S.signature_acc IN ({','.join(['%s'] * len(sig_accs))})
+        WHERE S.signature_acc = ANY(%s)
     """
 
     pg_con = utils.connect_pg(utils.get_pg_url())
 
     with pg_con.cursor() as pg_cur:
-        pg_cur.execute(pmid_query, sig_accs)
+        pg_cur.execute(pmid_query, [sig_accs])
         while pmid_batch := pg_cur.fetchmany(size=1000):
             citations, new_citations, pub_ids = {}, {}, []
             not_in_oracle, in_oracle = check_pmid_in_citations([_[0] for _ in pmid_batch], orc_con)
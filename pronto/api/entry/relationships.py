@@ -3,7 +3,7 @@
 from flask import jsonify
 from oracledb import DatabaseError
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from . import bp
 
 
@@ -46,9 +46,26 @@ def get_relationships(accession):
         dict(accession=accession)
     )
 
+    hierarchy = build_hierarchy(cur, accession)
+    cur.close()
+    con.close()
+    return jsonify(hierarchy), 200
+
+
+def build_hierarchy(rows, accession: str) -> dict:
+    """
+    Assemble the relationships of an entry into trees.
+
+    :param rows: tuples of (parent accession, parent name, parent type,
+                 child accession, child name, child type), for the
+                 ancestors, siblings, then descendants of the entry,
+                 each parent before its children
+    :param accession: entry accession
+    :return: root entries, indexed by accession
+    """
     child2parent = {}
     hierarchy = {}
-    for row in cur:
+    for row in rows:
         parent_acc = row[0]
         parent_name = row[1]
         parent_type = row[2]
@@ -102,9 +119,7 @@ def get_relationships(accession):
 
         node["children"][child_acc] = child
 
-    cur.close()
-    con.close()
-    return jsonify(hierarchy), 200
+    return hierarchy
 
 
 @bp.route("/<parent_acc>/relationship/<child_acc>/", methods=["PUT"])
@@ -118,7 +133,7 @@ def add_relationship(parent_acc, child_acc):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -216,7 +231,7 @@ def delete_relationship(accession1, accession2):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -1,7 +1,7 @@
 from oracledb import Cursor, DatabaseError
 from flask import jsonify, request
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
 from pronto.api.signature import is_amr
 from pronto.api.entry.utils import sanitize_description
 from . import bp
@@ -14,16 +14,10 @@ def get_signatures(accession):
     cur.execute(
         """
         SELECT EM.METHOD_AC, EM.TIMESTAMP, NVL(U.NAME, EM.USERSTAMP), 
-               NVL(MC.CNT, 0), MU.METHOD_AC
+               MU.METHOD_AC
         FROM INTERPRO.ENTRY2METHOD EM
         LEFT OUTER JOIN INTERPRO.PRONTO_USER U 
             ON EM.USERSTAMP = U.DB_USER
-        LEFT OUTER JOIN (
-            SELECT METHOD_AC, COUNT(*) CNT
-            FROM INTERPRO.METHOD_COMMENT
-            WHERE STATUS = 'Y'
-            GROUP BY METHOD_AC
-        ) MC ON EM.METHOD_AC = MC.METHOD_AC
         LEFT OUTER JOIN INTERPRO.METHOD_UNIRULE MU
             ON MU.METHOD_AC = EM.METHOD_AC
         WHERE EM.ENTRY_AC = :1
@@ -41,21 +35,21 @@ def get_signatures(accession):
         con = utils.connect_pg(utils.get_pg_url())
         cur = con.cursor()
         cur.execute(
-            f"""
+            """
             SELECT s.accession, s.num_sequences, s.num_complete_sequences,
                    s.name, s.llm_name, d.name, d.name_long 
             FROM interpro.signature s
             INNER JOIN interpro.database d
             ON s.database_id = d.id
-            WHERE s.accession IN ({','.join('%s' for _ in accessions)})
+            WHERE s.accession = ANY(%s)
             ORDER BY accession
             """,
-            accessions
+            [accessions]
         )
 
         for row in cur:
             acc = row[0]
-            timestamp, userstamp, num_comments, unirule = integrated[acc]
+            timestamp, userstamp, unirule = integrated[acc]
             db = utils.get_database_obj(row[5])
             signatures.append({
                 "accession": acc,
@@ -70,7 +64,7 @@ def get_signatures(accession):
                     "name": row[6]
                 },
                 "date": f"{userstamp} ({timestamp:%d %b %Y})",
-                "comments": num_comments,
+                "comments": cache.comments.count(acc),
                 "unirule": unirule is not None
             })
 
@@ -93,7 +87,7 @@ def integrate_signature(e_acc, s_acc):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -281,6 +275,7 @@ def integrate_signature(e_acc, s_acc):
         }), 500
     else:
         con.commit()
+        cache.integration.update(cur, signatures=[s_acc])
         annotation_match = check_annotation([e_acc, s_acc], cur)
         return jsonify({
             "status": True,
@@ -302,7 +297,7 @@ def unintegrate_signature(e_acc, s_acc):
                 "message": "Please log in to perform this operation."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -376,6 +371,7 @@ def unintegrate_signature(e_acc, s_acc):
         }), 500
     else:
         con.commit()
+        cache.integration.update(cur, signatures=[s_acc])
         annotation_match = check_annotation([e_acc, s_acc], cur)
         return jsonify({
             "status": True,
@@ -409,13 +405,13 @@ def get_signatures_annotations(accession):
     con = utils.connect_pg(utils.get_pg_url())
     cur = con.cursor()
     cur.execute(
-        f"""
+        """
         SELECT accession, name, abstract, llm_abstract
         FROM interpro.signature
-        WHERE accession IN ({','.join('%s' for _ in signatures)})
+        WHERE accession = ANY(%s)
         ORDER BY accession
         """,
-        signatures
+        [signatures]
     )
 
     signatures = []
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, make_response, request
 
 from pronto import utils
+from pronto.diskcache import cached
 
 bp = Blueprint("api_protein", __name__, url_prefix="/api/protein")
 
@@ -11,9 +12,9 @@ def get_protein(protein_acc):
     inc_matches = "matches" in request.args
     signature_acc = request.args.get("signature")
 
-    con = utils.connect_pg()
-    cur = con.cursor()
     if protein_acc.lower() == "random":
+        con = utils.connect_pg()
+        cur = con.cursor()
         cur.execute(
             """
             SELECT accession 
@@ -22,7 +23,62 @@ def get_protein(protein_acc):
             """
         )
         (protein_acc,) = cur.fetchone()
+        cur.close()
+        con.close()
+
+    queries = [utils.Query(_get_protein, protein_acc)]
+    if inc_matches:
+        queries.append(utils.Query(_get_matches, protein_acc, signature_acc))
+    if inc_lineage:
+        queries.append(utils.Query(_get_lineage, protein_acc))
+
+    results = utils.fan_out(*queries)
+    protein = results.pop(0)
+    if not protein:
+        return jsonify({}), 404
+
+    matches = results.pop(0) if inc_matches else {}
+    if inc_lineage:
+        protein["organism"]["lineage"] = results.pop(0)
+
+    if matches:
+        con = utils.connect_oracle()
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT EM.METHOD_AC, E.ENTRY_AC, E.NAME, ET.CODE, ET.ABBREV
+            FROM INTERPRO.ENTRY2METHOD EM
+            INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
+            INNER JOIN INTERPRO.CV_ENTRY_TYPE ET ON E.ENTRY_TYPE = ET.CODE
+            WHERE EM.METHOD_AC IN (SELECT COLUMN_VALUE FROM TABLE(:1))
+            """,
+            [utils.oracle_array(cur, matches.keys())],
+        )
 
+        for row in cur:
+            matches[row[0]]["entry"] = {
+                "accession": row[1],
+                "name": row[2],
+                "type": row[3],
+                "type_long": row[4].replace("_", " "),
+            }
+
+        cur.close()
+        con.close()
+
+    for s in sorted(matches.values(), key=lambda x: x["accession"]):
+        # Sort by the leftmost fragment of each match
+        s["matches"].sort(key=lambda m: _repr_location(m[0]))
+
+        protein["signatures"].append(s)
+
+    return jsonify(protein)
+
+
+@cached
+def _get_protein(protein_acc: str) -> dict | None:
+    con = utils.connect_pg()
+    cur = con.cursor()
     cur.execute(
         """
             SELECT COUNT(*) 
@@ -48,12 +104,13 @@ def get_protein(protein_acc):
         (protein_acc,),
     )
     row = cur.fetchone()
+    cur.close()
+    con.close()
+
     if not row:
-        cur.close()
-        con.close()
-        return jsonify({}), 404
+        return None
 
-    protein = {
+    return {
         "accession": row[0],
         "identifier": row[1],
         "length": row[2],
@@ -64,118 +121,97 @@ def get_protein(protein_acc):
         "is_spurious": is_spurious,
         "signatures": [],
     }
-    taxon_id = row[5]
 
-    matches = {}
-    if inc_matches:
-        if signature_acc:
-            sql = "m.protein_acc = %s AND m.signature_acc = %s"
-            params = (protein_acc, signature_acc)
-        else:
-            sql = "m.protein_acc = %s"
-            params = (protein_acc,)
 
-        cur.execute(
-            f"""
-            SELECT m.signature_acc, s.name, d.name, d.name_long, m.fragments, 
-                   s.accession
-            FROM match m 
-            INNER JOIN database d ON m.database_id = d.id
-            LEFT OUTER JOIN signature s ON m.signature_acc = s.accession
-            WHERE {sql}
-            """,
-            params,
-        )
+@cached
+def _get_matches(protein_acc: str, signature_acc: str | None) -> dict:
+    if signature_acc:
+        sql = "m.protein_acc = %s AND m.signature_acc = %s"
+        params = (protein_acc, signature_acc)
+    else:
+        sql = "m.protein_acc = %s"
+        params = (protein_acc,)
 
-        for row in cur:
-            try:
-                s = matches[row[0]]
-            except KeyError:
-                db = utils.get_database_obj(row[2])
-                if isinstance(db, utils.MobiDbLite):
-                    link = db.gen_link(protein_acc)
-                else:
-                    link = db.gen_link(row[0])
-
-                s = matches[row[0]] = {
-                    "accession": row[0],
-                    "name": row[1],
-                    "database": row[3],
-                    "color": db.color,
-                    "link": link,
-                    "matches": [],
-                    "entry": None,
-                    "is_signature": row[5] is not None,
-                }
-
-            fragments = []
-            for frag in row[4].split(","):
-                start, end, status = frag.split("-")
-                fragments.append(
-                    {"start": int(start), "end": int(end), "status": status}
-                )
-
-            s["matches"].append(sorted(fragments, key=_repr_location))
+    con = utils.connect_pg()
+    cur = con.cursor()
+    cur.execute(
+        f"""
+        SELECT m.signature_acc, s.name, d.name, d.name_long, m.fragments, 
+               s.accession
+        FROM match m 
+        INNER JOIN database d ON m.database_id = d.id
+        LEFT OUTER JOIN signature s ON m.signature_acc = s.accession
+        WHERE {sql}
+        """,
+        params,
+    )
 
-    if inc_lineage:
-        cur.execute(
-            """
-            WITH RECURSIVE ancestors AS (
-                SELECT id, name, parent_id, 1 AS level
-                FROM interpro.taxon
-                WHERE id = %s
-                UNION
-                SELECT t.id, t.name, t.parent_id, a.level+1
-                FROM interpro.taxon t
-                INNER JOIN ancestors a
-                ON t.id = a.parent_id
+    matches = {}
+    for row in cur:
+        try:
+            s = matches[row[0]]
+        except KeyError:
+            db = utils.get_database_obj(row[2])
+            if isinstance(db, utils.MobiDbLite):
+                link = db.gen_link(protein_acc)
+            else:
+                link = db.gen_link(row[0])
+
+            s = matches[row[0]] = {
+                "accession": row[0],
+                "name": row[1],
+                "database": row[3],
+                "color": db.color,
+                "link": link,
+                "matches": [],
+                "entry": None,
+                "is_signature": row[5] is not None,
+            }
+
+        fragments = []
+        for frag in row[4].split(","):
+            start, end, status = frag.split("-")
+            fragments.append(
+                {"start": int(start), "end": int(end), "status": status}
             )
-            SELECT name
-            FROM ancestors
-            ORDER BY level DESC            
-            """,
-            (taxon_id,),
-        )
-        protein["organism"]["lineage"] = [name for name, in cur]
+
+        s["matches"].append(sorted(fragments, key=_repr_location))
 
     cur.close()
     con.close()
+    return matches
 
-    if matches:
-        params = tuple(matches.keys())
-        con = utils.connect_oracle()
-        cur = con.cursor()
-        cur.execute(
-            f"""
-            SELECT EM.METHOD_AC, E.ENTRY_AC, E.NAME, ET.CODE, ET.ABBREV
-            FROM INTERPRO.ENTRY2METHOD EM
-            INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
-            INNER JOIN INTERPRO.CV_ENTRY_TYPE ET ON E.ENTRY_TYPE = ET.CODE
-            WHERE EM.METHOD_AC IN (
-                {','.join(':' + str(i + 1) for i in range(len(params)))}
+
+@cached
+def _get_lineage(protein_acc: str) -> list[str]:
+    con = utils.connect_pg()
+    cur = con.cursor()
+    cur.execute(
+        """
+        WITH RECURSIVE ancestors AS (
+            SELECT id, name, parent_id, 1 AS level
+            FROM interpro.taxon
+            WHERE id = (
+                SELECT taxon_id
+                FROM interpro.protein
+                WHERE accession = UPPER(%s)
             )
-            """,
-            params,
+            UNION
+            SELECT t.id, t.name, t.parent_id, a.level+1
+            FROM interpro.taxon t
+            INNER JOIN ancestors a
+            ON t.id = a.parent_id
         )
-
-        for row in cur:
-            matches[row[0]]["entry"] = {
-                "accession": row[1],
-                "name": row[2],
-                "type": row[3],
-                "type_long": row[4].replace("_", " "),
-            }
-
-        cur.close()
-        con.close()
-
-    for s in sorted(matches.values(), key=lambda x: x["accession"]):
-        # Sort by the leftmost fragment of each match
-        s["matches"].sort(key=lambda m: _repr_location(m[0]))
-
-        protein["signatures"].append(s)
-
-    return jsonify(protein)
+        SELECT name
+        FROM ancestors
+        ORDER BY level DESC            
+        """,
+        (protein_acc,),
+    )
+    lineage = [name for name, in cur]
+    cur.close()
+    con.close()
+    return lineage
 
 
 def _repr_location(x: dict) -> tuple:
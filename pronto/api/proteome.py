@@ -1,28 +1,16 @@
 import re
 
-import oracledb
 from flask import Blueprint, jsonify, request
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
+from pronto.serialization import Stream, stream_jsonify
 
 bp = Blueprint("api_proteome", __name__, url_prefix="/api/proteome")
 
 
 def _process_proteome(info: dict, pg_url: str, proteome_id: str,
                       proteome_name: str):
-    con = oracledb.connect(**info)
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT EM.METHOD_AC 
-        FROM INTERPRO.ENTRY2METHOD EM
-        INNER JOIN INTERPRO.ENTRY E
-            ON EM.ENTRY_AC = E.ENTRY_AC
-        """
-    )
-    integrated = {acc for acc, in cur.fetchall()}
-    cur.close()
-    con.close()
+    integrated = cache.integration.get(info)
 
     con = utils.connect_pg(pg_url)
     cur = con.cursor()
@@ -39,7 +27,7 @@ def _process_proteome(info: dict, pg_url: str, proteome_id: str,
 
     # Get proteins
     sql = """
-        SELECT p.accession, p.is_reviewed
+        SELECT p.accession::text, p.is_reviewed::bool
         FROM interpro.protein p
         JOIN interpro.proteome2protein p2p ON p2p.protein_acc=p.accession
         WHERE p2p.id= %s 
@@ -47,28 +35,30 @@ def _process_proteome(info: dict, pg_url: str, proteome_id: str,
     """
     params = (proteome_id,)
 
-    cur.execute(sql, params)
-
     num_proteins = 0
     reviewed = set()
-    for protein_acc, is_reviewed in cur.fetchall():
+    for protein_acc, is_reviewed in utils.copy_rows(cur, sql, params,
+                                                    ["text", "bool"]):
         num_proteins += 1
         if is_reviewed:
             reviewed.add(protein_acc)
 
-    # Now get matches
-    cur.execute(
+    # Now get matches (binary COPY: millions of rows for large proteomes)
+    rows = utils.copy_rows(
+        cur,
         f"""
         WITH proteins AS ({sql})
-        SELECT DISTINCT protein_acc, signature_acc
+        SELECT DISTINCT protein_acc::text, signature_acc::text
         FROM interpro.match
         WHERE protein_acc IN (SELECT accession FROM proteins)
-        """, params
+        """,
+        params,
+        ["text", "text"]
     )
 
     matches = {}
     protein_counts = {}
-    for protein_acc, signature_acc in cur.fetchall():
+    for protein_acc, signature_acc in rows:
         try:
             matches[protein_acc].append(signature_acc)
         except KeyError:
@@ -194,7 +184,7 @@ def submit_proteome(proteome_id):
                 "message": "Please log in to perform this action."
             }
         }), 401
-    elif utils.get_states().frozen:
+    elif cache.states.get().frozen:
         return jsonify({
             "status": False,
             "error": {
@@ -231,22 +221,8 @@ def add_comments(task):
     if not task["success"]:
         return
 
-    con = utils.connect_oracle()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT METHOD_AC, COUNT(*)
-        FROM INTERPRO.METHOD_COMMENT
-        WHERE STATUS = 'Y'
-        GROUP BY METHOD_AC
-        """
-    )
-    comments = dict(cur.fetchall())
-    cur.close()
-    con.close()
-
     for sig in task["result"]["signatures"]:
-        sig["comments"] = comments.get(sig["accession"], 0)
+        sig["comments"] = cache.comments.count(sig["accession"])
 
 
 @bp.route("/<proteome_id>/")
@@ -276,12 +252,16 @@ def get_proteome(proteome_id):
         }), 404
     else:
         add_comments(task)
-        return jsonify({
+        if task["success"]:
+            result = task["result"]
+            result["signatures"] = Stream(result["signatures"])
+
+        return stream_jsonify({
             "status": task and task["result"] is not None,
             "id": proteome_id,
             "name": proteome_name,
             "task": task
-        }), 200
+        })
 
 
 @bp.route("/")
@@ -301,15 +281,14 @@ def get_proteomes():
 
     con = utils.connect_pg(utils.get_pg_url())
     cur = con.cursor()
-    for i in range(0, len(proteome_ids), 100):
-        params = proteome_ids[i:i+100]
+    if proteome_ids:
         cur.execute(
-            F"""
+            """
             SELECT id, name
             FROM interpro.proteome
-            WHERE id IN ({','.join(['%s' for _ in params])})
+            WHERE id = ANY(%s)
             """,
-            params
+            [proteome_ids]
         )
 
         for proteome_id, proteome_name in cur.fetchall():
@@ -1,48 +1,28 @@
+from datetime import datetime
+
 import oracledb
 from oracledb import DatabaseError
 from flask import Blueprint, jsonify, request
 
-from pronto import auth, utils
+from pronto import auth, cache, utils
+from pronto.comparisons import on_demand
+from pronto.diskcache import disk_cache
+from pronto.httpcache import conditional, mark_incomplete
 
 
 bp = Blueprint("api_signature", __name__, url_prefix="/api/signature")
 
 
 @bp.route("/<accession>/")
+@conditional()
 def get_signature(accession):
-    con = utils.connect_pg()
-    cur = con.cursor()
-    # description becomes short name on the front end
-    # abstract becomes description on the front end
-    cur.execute(
-        """
-        SELECT
-          s.accession,
-          s.name,
-          s.llm_name,
-          s.description,
-          s.llm_description,
-          s.type,
-          s.abstract,
-          s.llm_abstract,
-          s.num_sequences,
-          s.num_complete_sequences,
-          s.num_reviewed_sequences,
-          s.num_complete_reviewed_sequences,
-          s.num_residues,
-          d.name,
-          d.name_long,
-          d.version
-        FROM signature s
-        INNER JOIN database d ON s.database_id = d.id
-        WHERE UPPER(s.accession) = %(str)s
-          OR UPPER(s.name) = %(str)s
-        """, {"str": accession.upper()}
+    # Oracle queries do not depend on PostgreSQL: run them concurrently
+    row, entry, references = utils.fan_out(
+        utils.Query(_get_signature, accession),
+        utils.Query(_get_entry, accession),
+        utils.Query(_get_references, accession)
     )
-    row = cur.fetchone()
-    cur.close()
-    con.close()
-    
+
     if not row:
         return jsonify({
             "error": {
@@ -50,7 +30,13 @@ def get_signature(accession):
                 "message": f"{accession} does not match any member database signature accession or name."
             }
         }), 404
-    
+    elif row[0] != accession:
+        # Matched by name, or not using the same case
+        entry, references = utils.fan_out(
+            utils.Query(_get_entry, row[0]),
+            utils.Query(_get_references, row[0])
+        )
+
     # data populates signature table to new entry window
     db = utils.get_database_obj(row[13])
     result = {
@@ -80,10 +66,50 @@ def get_signature(accession):
             "color": db.color,
             "version": row[15]
         },
-        "entry": None,
-        "references": []
+        "entry": entry,
+        "references": references
     }
 
+    return jsonify(result)
+
+
+def _get_signature(accession: str) -> tuple | None:
+    con = utils.connect_pg()
+    cur = con.cursor()
+    # description becomes short name on the front end
+    # abstract becomes description on the front end
+    cur.execute(
+        """
+        SELECT
+          s.accession,
+          s.name,
+          s.llm_name,
+          s.description,
+          s.llm_description,
+          s.type,
+          s.abstract,
+          s.llm_abstract,
+          s.num_sequences,
+          s.num_complete_sequences,
+          s.num_reviewed_sequences,
+          s.num_complete_reviewed_sequences,
+          s.num_residues,
+          d.name,
+          d.name_long,
+          d.version
+        FROM signature s
+        INNER JOIN database d ON s.database_id = d.id
+        WHERE UPPER(s.accession) = %(str)s
+          OR UPPER(s.name) = %(str)s
+        """, {"str": accession.upper()}
+    )
+    row = cur.fetchone()
+    cur.close()
+    con.close()
+    return row
+
+
+def _get_entry(accession: str) -> dict | None:
     con = utils.connect_oracle()
     cur = con.cursor()
     cur.execute(
@@ -94,14 +120,14 @@ def get_signature(accession):
           ON EM.ENTRY_AC = E.ENTRY_AC
         WHERE EM.METHOD_AC = :1
         """,
-        [result["accession"]]
+        [accession]
     )
     row = cur.fetchone()
 
     if row:
         entry_acc = row[0]
 
-        entry = result["entry"] = {
+        entry = {
             "accession": entry_acc,
             "name": row[1],
             "type": row[2],
@@ -131,7 +157,17 @@ def get_signature(accession):
                 "name": row[1],
                 "llm": row[2] == "Y"
             })
+    else:
+        entry = None
 
+    cur.close()
+    con.close()
+    return entry
+
+
+def _get_references(accession: str) -> list[dict]:
+    con = utils.connect_oracle()
+    cur = con.cursor()
     cur.execute(
         """
         SELECT C.PUB_ID, C.TITLE, C.YEAR, C.VOLUME, C.ISSUE, C.RAWPAGES, C.DOI_URL,
@@ -140,10 +176,11 @@ def get_signature(accession):
         INNER JOIN INTERPRO.CITATION C on C.PUB_ID = MP.PUB_ID
         WHERE MP.METHOD_AC = :1
         """,
-        [result["accession"]]
+        [accession]
     )
+    references = []
     for row in cur:
-        result["references"].append({
+        references.append({
             "id": row[0],
             "title": row[1],
             "year": row[2],
@@ -158,11 +195,11 @@ def get_signature(accession):
 
     cur.close()
     con.close()
-
-    return jsonify(result)
+    return references
 
 
 @bp.route("/<accession>/comments/")
+@conditional()
 def get_signature_comments(accession):
     try:
         n = int(request.args["max"])
@@ -256,6 +293,9 @@ def add_signature_comment(accession):
         }), 500
     else:
         con.commit()
+        cache.comments.add(accession, cache.SignatureComment(
+            next_id, text, user["name"], datetime.now()
+        ))
         return jsonify({"status": True}), 200
     finally:
         cur.close()
@@ -295,6 +335,8 @@ def delete_signature_comment(accession, commentid):
         }), 500
     else:
         con.commit()
+        if cur.rowcount:
+            cache.comments.remove(accession, int(commentid))
         return jsonify({"status": True}), 200
     finally:
         cur.close()
@@ -380,20 +422,21 @@ def get_panther_go_subfam(accession: str, term_id: str):
 
     con = utils.connect_oracle()
     cur = con.cursor()
-    binds = [":" + str(i+1) for i in range(len(matches))]
-    params = list(matches.keys()) + [term_id]
-    cur.execute(
-        f""" 
-        SELECT DISTINCT SUBFAMILY_AC
-        FROM INTERPRO.PANTHER2GO
-        WHERE SUBFAMILY_AC IS NOT NULL
-          AND SUBFAMILY_AC IN ({','.join(binds)}) 
-          AND GO_ID = :go_id
-        """,
-        params
-    )
+    results = {}
+    for subfams in utils.oracle_arrays(cur, matches.keys()):
+        cur.execute(
+            """
+            SELECT DISTINCT SUBFAMILY_AC
+            FROM INTERPRO.PANTHER2GO
+            WHERE SUBFAMILY_AC IS NOT NULL
+              AND SUBFAMILY_AC IN (SELECT COLUMN_VALUE FROM TABLE(:1))
+              AND GO_ID = :2
+            """,
+            [subfams, term_id]
+        )
 
-    results = {acc: matches[acc] for acc, in cur.fetchall()}
+        for acc, in cur.fetchall():
+            results[acc] = matches[acc]
     cur.close()
     con.close()
 
@@ -443,22 +486,16 @@ def get_funfam_go(accession, term_id):
 
 
 @bp.route("/<accession>/predictions/")
+@conditional()
 def get_signature_predictions(accession):
     max_overlap = float(request.args.get("max-overlap", 0.5))
 
+    integrated = cache.integration.get()
+
     con = utils.connect_oracle()
     cur = con.cursor()
-    cur.execute(
-        """
-        SELECT EM.METHOD_AC, E.ENTRY_AC, E.ENTRY_TYPE, E.NAME, E.CHECKED, E.LLM
-        FROM INTERPRO.ENTRY2METHOD EM
-        INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
-        """
-    )
-    integrated = {row[0]: row[1:] for row in cur}
-
     if accession in integrated:
-        query_entry = integrated[accession][0]
+        query_entry = integrated[accession].entry_acc
 
         # Get ancestors
         cur.execute(
@@ -534,9 +571,13 @@ def get_signature_predictions(accession):
         """,
         [accession, max_overlap]
     )
+    rows = cur.fetchall()
+    if not rows:
+        rows = _get_predictions_on_demand(cur, accession, q_proteins,
+                                          max_overlap)
 
     targets = {}
-    for row in cur:
+    for row in rows:
         t_acc = row[0]
         t_proteins = row[1]
         t_residues = row[2]
@@ -556,11 +597,11 @@ def get_signature_predictions(accession):
             entry = None
         else:
             entry = {
-                "accession": obj[0],
-                "type": obj[1],
-                "name": obj[2],
-                "checked": obj[3] == "Y",
-                "llm": obj[4] == "Y"
+                "accession": obj.entry_acc,
+                "type": obj.entry_type,
+                "name": obj.entry_name,
+                "checked": obj.checked,
+                "llm": obj.llm
             }
 
         database = utils.get_database_obj(db_key)
@@ -612,6 +653,61 @@ def get_signature_predictions(accession):
     return jsonify(results)
 
 
+def _get_predictions_on_demand(cur, accession: str, q_proteins: int,
+                               max_overlap: float) -> list[tuple]:
+    """
+    Get the comparisons of a signature missing from interpro.comparison
+    (e.g. new signature) with other signatures, and return the same rows
+    as `get_signature_predictions()`.
+
+    Only comparisons already cached are returned: otherwise they are
+    computed in the background, for later requests.
+    """
+    if not disk_cache.enabled:
+        return []
+
+    cur.execute(
+        """
+        SELECT 1
+        FROM interpro.comparison
+        WHERE signature_acc_1 = %s
+        LIMIT 1
+        """, [accession]
+    )
+    if cur.fetchone():
+        return []
+
+    comparisons = on_demand.get_cached_signature(accession)
+    if comparisons is None:
+        on_demand.schedule_signatures([accession])
+        mark_incomplete()
+        return []
+    elif not comparisons:
+        return []
+
+    cur.execute(
+        """
+        SELECT s.accession, s.num_complete_sequences, s.num_residues,
+               d.name, d.name_long
+        FROM interpro.signature s
+        INNER JOIN interpro.database d
+          ON s.database_id = d.id
+        WHERE s.accession = ANY(%s)
+        """, [list(comparisons)]
+    )
+
+    rows = []
+    for t_acc, t_proteins, t_residues, db_key, db_name in cur.fetchall():
+        c = comparisons[t_acc]
+        min_proteins = min(q_proteins, t_proteins)
+        if min_proteins and c["overlaps"] / min_proteins >= max_overlap:
+            rows.append((t_acc, t_proteins, t_residues, db_key, db_name,
+                         c["collocations"], c["overlaps"],
+                         c["res_overlaps"], c["reviewed_res_overlaps"]))
+
+    return rows
+
+
 class Sorter(object):
     def __init__(self, query_entry: str, ancestors: set, descendants: set):
         self.entry = query_entry
@@ -2,25 +2,23 @@ import re
 
 from flask import Blueprint, jsonify, request
 
-from pronto import utils
+from pronto import cache, utils
+from pronto.httpcache import conditional
+from pronto.singleflight import coalesce
+from pronto.serialization import Stream, stream_jsonify
 
 bp = Blueprint("api_signatures", __name__, url_prefix="/api/signatures")
 
 
 def get_sig2interpro(accessions):
-    args = ','.join(':' + str(i + 1) for i in range(len(accessions)))
-    con = utils.connect_oracle()
-    cur = con.cursor()
-    cur.execute(
-        f"""
-        SELECT METHOD_AC, ENTRY_AC
-        FROM INTERPRO.ENTRY2METHOD
-        WHERE METHOD_AC IN ({args})
-        """, tuple(accessions)
-    )
-    sig2entry = dict(cur.fetchall())
-    cur.close()
-    con.close()
+    integrated = cache.integration.get()
+    sig2entry = {}
+    for acc in accessions:
+        try:
+            sig2entry[acc] = integrated[acc].entry_acc
+        except KeyError:
+            continue
+
     return sig2entry
 
 
@@ -34,6 +32,8 @@ from . import taxonomy
 
 
 @bp.route("/unintegrated/similar/")
+@conditional()
+@coalesce
 def get_similar_unintegrated():
     min_sprot = float(request.args.get("min-sprot", 1))
     min_trembl = float(request.args.get("min-trembl", 0.85))
@@ -66,36 +66,7 @@ def get_similar_unintegrated():
             400
         )
 
-    con = utils.connect_oracle()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT EM.METHOD_AC, E.ENTRY_AC, E.ENTRY_TYPE, E.NAME, E.SHORT_NAME, E.CHECKED
-        FROM INTERPRO.ENTRY2METHOD EM
-        INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
-        """
-    )
-    integrated = {}
-    for row in cur:
-        integrated[row[0]] = {
-            "accession": row[1],
-            "type": row[2],
-            "name": row[3],
-            "short_name": row[4],
-            "checked": row[5] == 'Y'
-        }
-
-    cur.execute(
-        """
-        SELECT METHOD_AC, COUNT(*)
-        FROM INTERPRO.METHOD_COMMENT
-        WHERE STATUS = 'Y'
-        GROUP BY METHOD_AC
-        """
-    )
-    num_comments = dict(cur.fetchall())
-    cur.close()
-    con.close()
+    integrated = cache.integration.get()
 
     con = utils.connect_pg()
     cur = con.cursor()
@@ -207,11 +178,20 @@ def get_similar_unintegrated():
                 exclude.add(row[0])
                 continue
 
-            entry = integrated.get(row[7])
-            if not entry:
+            try:
+                e = integrated[row[7]]
+            except KeyError:
                 # Target is not integrated: skip it
                 continue
 
+            entry = {
+                "accession": e.entry_acc,
+                "type": e.entry_type,
+                "name": e.entry_name,
+                "short_name": e.entry_short_name,
+                "checked": e.checked
+            }
+
             try:
                 obj = candidates[row[0]]
             except KeyError:
@@ -227,7 +207,7 @@ def get_similar_unintegrated():
                         "reviewed": row[5],
                         "unreviewed": row[6]
                     },
-                    "comments": num_comments.get(row[0], 0),
+                    "comments": cache.comments.count(row[0]),
                     "targets": []
                 }
 
@@ -273,9 +253,9 @@ def get_similar_unintegrated():
         -c["targets"][0]["proteins"]["overlapping"]["unreviewed"],
     ))
 
-    return jsonify({
+    return stream_jsonify({
         "count": len(results),
-        "results": results[(page-1)*page_size:page*page_size],
+        "results": Stream(results[(page-1)*page_size:page*page_size]),
         "page_info": {
             "page": page,
             "page_size": page_size
@@ -305,36 +285,7 @@ def get_very_similar_unintegrated():
     except (KeyError, ValueError):
         page_size = 20
 
-    con = utils.connect_oracle()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT EM.METHOD_AC, E.ENTRY_AC, E.ENTRY_TYPE, E.NAME, E.CHECKED
-        FROM INTERPRO.ENTRY2METHOD EM
-        INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
-        """
-    )
-    integrated = {}
-    for row in cur:
-        integrated[row[0]] = {
-            "accession": row[1],
-            "type": row[2],
-            "name": row[3],
-            "checked": row[4] == 'Y'
-        }
-
-    cur.execute(
-        """
-        SELECT METHOD_AC, COUNT(*)
-        FROM INTERPRO.METHOD_COMMENT
-        WHERE STATUS = 'Y'
-        GROUP BY METHOD_AC
-        """
-    )
-    num_comments = dict(cur.fetchall())
-
-    cur.close()
-    con.close()
+    integrated = cache.integration.get()
 
     con = utils.connect_pg()
     with con.cursor() as cur:
@@ -394,7 +345,7 @@ def get_very_similar_unintegrated():
                         "color": utils.get_database_obj(dbkey1).color,
                         "name": dbname1
                     },
-                    "comments": num_comments.get(acc1, 0)
+                    "comments": cache.comments.count(acc1)
                 },
                 "target": {
                     "accession": acc2,
@@ -402,7 +353,12 @@ def get_very_similar_unintegrated():
                         "color": utils.get_database_obj(dbkey2).color,
                         "name": dbname2
                     },
-                    "entry": entry2,
+                    "entry": {
+                        "accession": entry2.entry_acc,
+                        "type": entry2.entry_type,
+                        "name": entry2.entry_name,
+                        "checked": entry2.checked
+                    } if entry2 else None,
                 },
                 "similarity": float(sim)
             })
@@ -421,6 +377,8 @@ def get_very_similar_unintegrated():
 
 
 @bp.route("/unintegrated/specific/")
+@conditional()
+@coalesce
 def get_specific_unintegrated():
     min_sprot = float(request.args.get("min-sprot", 1))
     min_trembl = float(request.args.get("min-trembl", 0.95))
@@ -444,23 +402,7 @@ def get_specific_unintegrated():
     else:
         with_annotations = None
 
-    con = utils.connect_oracle()
-    cur = con.cursor()
-    cur.execute("SELECT METHOD_AC FROM INTERPRO.ENTRY2METHOD")
-    integrated = {row[0] for row in cur.fetchall()}
-
-    cur.execute(
-        """
-        SELECT METHOD_AC, COUNT(*)
-        FROM INTERPRO.METHOD_COMMENT
-        WHERE STATUS = 'Y'
-        GROUP BY METHOD_AC
-        """
-    )
-    num_comments = dict(cur.fetchall())
-
-    cur.close()
-    con.close()
+    integrated = cache.integration.get()
 
     con = utils.connect_pg()
     cur = con.cursor()
@@ -561,7 +503,7 @@ def get_specific_unintegrated():
                 "name": row[3],
                 "description": row[4],
                 "type": row[5],
-                "comments": num_comments.get(row[2], 0),
+                "comments": cache.comments.count(row[2]),
                 "proteins": {
                     "reviewed": row[6],
                     "unreviewed": row[9],
@@ -3,24 +3,29 @@
 from flask import jsonify
 
 from pronto import utils
+from pronto.diskcache import cached_response
+from pronto.httpcache import conditional
 from . import bp, get_sig2interpro
 
 
 @bp.route("/<path:accessions>/comments/")
+@conditional()
+@cached_response(integrated=get_sig2interpro)
 def get_comments(accessions):
     accessions = utils.split_path(accessions)
 
     con = utils.connect_pg()
     with con.cursor() as cur:
-        cur.execute(
-            f"""
+        utils.execute_prepared(
+            cur, "signatures.comments",
+            """
             SELECT ps.comment_id, min(ps.comment_text), 
                    sp.signature_acc, COUNT(*) cnt
             FROM signature2protein sp
             INNER JOIN protein_similarity ps ON sp.protein_acc = ps.protein_acc
-            WHERE sp.signature_acc IN ({','.join("%s" for _ in accessions)})
+            WHERE sp.signature_acc = ANY(%s)
             GROUP BY ps.comment_id, signature_acc
-            """, accessions
+            """, [accessions]
         )
 
         comments = {}
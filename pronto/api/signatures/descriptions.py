@@ -3,28 +3,33 @@
 from flask import jsonify, request
 
 from pronto import utils
+from pronto.diskcache import cached_response
+from pronto.httpcache import conditional
 from . import bp, get_sig2interpro
 
 
 @bp.route("/<path:accessions>/descriptions/")
+@conditional()
+@cached_response(integrated=get_sig2interpro)
 def get_descriptions(accessions):
     accessions = utils.split_path(accessions)
     reviewed_only = "reviewed" in request.args
 
     con = utils.connect_pg()
     with con.cursor() as cur:
-        cur.execute(
+        utils.execute_prepared(
+            cur, "signatures.descriptions",
             f"""
             SELECT p.name_id, pn.text, p.signature_acc, p.cnt
             FROM (
                 SELECT name_id, signature_acc, COUNT(*) cnt
                 FROM signature2protein
-                WHERE signature_acc IN ({','.join("%s" for _ in accessions)})
+                WHERE signature_acc = ANY(%s)
                 {'AND is_reviewed' if reviewed_only else ''}
                 GROUP BY name_id, signature_acc
             ) p
             INNER JOIN protein_name pn ON p.name_id = pn.name_id
-            """, accessions
+            """, [accessions]
         )
 
         descriptions = {}
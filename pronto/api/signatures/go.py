@@ -1,6 +1,8 @@
 from flask import jsonify, request
 
 from pronto import utils
+from pronto.diskcache import cached_response
+from pronto.httpcache import conditional
 from . import bp, get_sig2interpro
 
 
@@ -8,6 +10,8 @@ _ASPECTS = {'cellular_component', 'molecular_function', 'biological_process'}
 
 
 @bp.route("/<path:accessions>/go/")
+@conditional()
+@cached_response(integrated=get_sig2interpro)
 def get_go_terms(accessions):
     accessions = utils.split_path(accessions)
     aspects = set(request.args.getlist("aspect"))
@@ -21,20 +25,21 @@ def get_go_terms(accessions):
 
     con = utils.connect_pg()    
     with con.cursor() as cur:
-        in_stmt = ','.join("%s" for _ in accessions)
-        params = accessions + accessions
+        params = [accessions, accessions]
 
         if aspects and aspects != _ASPECTS:
-            aspects_stmt = (f"AND t.category "
-                            f"IN ({','.join('%s' for _ in aspects)})")
-            params += list(aspects)
+            aspects_stmt = "AND t.category = ANY(%s)"
+            params.append(list(aspects))
         else:
             aspects_stmt = ""
 
-        cur.execute(
+        rows = utils.copy_rows(
+            cur,
             f"""
-            SELECT t.id, t.name, t.category, sp.signature_acc, sp.protein_acc,
-                   pg.ref_db_code, pg.ref_db_id, sp.model_acc
+            SELECT t.id::text, t.name::text, t.category::text,
+                   sp.signature_acc::text, sp.protein_acc::text,
+                   pg.ref_db_code::text, pg.ref_db_id::text, 
+                   sp.model_acc::text
             FROM signature2protein sp
             INNER JOIN (
                 SELECT *
@@ -42,19 +47,21 @@ def get_go_terms(accessions):
                 WHERE protein_acc IN (
                     SELECT DISTINCT protein_acc
                     FROM signature2protein
-                    WHERE signature_acc IN ({in_stmt})
+                    WHERE signature_acc = ANY(%s)
                 )
             ) pg ON sp.protein_acc = pg.protein_acc
             INNER JOIN term t ON pg.term_id = t.id
-            WHERE signature_acc IN ({in_stmt})
+            WHERE signature_acc = ANY(%s)
             {aspects_stmt}
-            """, params
+            """,
+            params,
+            ["text"] * 8
         )
 
         terms = {}
         subfams = set()
         g3d_signs = dict()
-        for row in cur:
+        for row in rows:
             term_id = row[0]
             try:
                 term = terms[term_id]
@@ -84,9 +91,12 @@ def get_go_terms(accessions):
                 except KeyError:
                     g3d_signs[signature_acc] = {row[4]}
 
-        terms = get_go2panther(subfams, terms, cur)
-
-        terms = get_go2funfam(g3d_signs, terms, cur)
+        # Oracle lookups are independent: run them concurrently
+        panther2go, funfam2go = utils.fan_out(
+            utils.Query(get_go2panther, subfams),
+            utils.Query(get_go2funfam, g3d_signs)
+        )
+        terms = add_subfam_terms(panther2go + funfam2go, terms, cur)
 
     con.close()
 
@@ -111,100 +121,88 @@ def _sort_term(term):
     return -max_prots, term["id"]
 
 
-def get_go2panther(subfams: set[str], terms: dict[str, dict], pg_cur):
+def get_go2panther(subfams: set[str]) -> list[tuple[str, str, str]]:
+    if not subfams:
+        return []
+
     con = utils.connect_oracle()
     cur = con.cursor()
-    
-    go_terms = set()
-    subfams = list(subfams)
-    for i in range(0, len(subfams), 1000):
-        subset = subfams[i:i+1000]
-        binds = [":" + str(j+1) for j in range(len(subset))]
+
+    results = []
+    for subset in utils.oracle_arrays(cur, subfams):
         cur.execute(
-            f"""
+            """
             SELECT DISTINCT SUBFAMILY_AC, GO_ID
             FROM INTERPRO.PANTHER2GO
-            WHERE SUBFAMILY_AC IN ({','.join(binds)})
+            WHERE SUBFAMILY_AC IN (SELECT COLUMN_VALUE FROM TABLE(:1))
             """,
-            subset
+            [subset]
         )
 
-        for row in cur:
-            term_id = row[1]
-            pth_fam = row[0].split(':')[0]
-
-            try:
-                term = terms[term_id]
-            except KeyError:
-                term = terms[term_id] = {"id": term_id, "signatures": {}}
-                go_terms.add(term_id)
-
-            try:
-                s = term["signatures"][pth_fam]
-            except KeyError:
-                s = term["signatures"][pth_fam] = [set(), set(), set()]
-
-            s[2].add(row[0])
+        for subfam_acc, term_id in cur:
+            pth_fam = subfam_acc.split(':')[0]
+            results.append((pth_fam, subfam_acc, term_id))
 
     cur.close()
     con.close()
+    return results
 
-    go_terms = list(go_terms)
-    for i in range(0, len(go_terms), 100):
-        subset = go_terms[i:i+100]
 
-        for term in get_go_details(subset, pg_cur):
-            terms[term["id"]].update(term)
+def get_go2funfam(gene3dset: dict) -> list[tuple[str, str, str]]:
+    if not gene3dset:
+        return []
 
-    return terms
-
-
-def get_go2funfam(gene3dset: dict, terms: dict, pg_cur) -> dict[str, dict]:
     con = utils.connect_oracle()
     cur = con.cursor()
 
-    go_terms = set()
-
+    results = []
     for signature, proteins in gene3dset.items():
-
-        for i in range(0, len(proteins), 1000):
-            subset = list(proteins)[i:i+1000]
-            binds = [":" + str(j+1) for j in range(len(subset))]
-            subset.append(f"{signature}%")
-
-            request = f"""
-            SELECT DISTINCT METHOD_AC, GO_ID
-            FROM INTERPRO.FUNFAM2GO M
-            WHERE PROTEIN_AC IN ({','.join(binds)})
-            AND METHOD_AC LIKE :{len(binds)+1}
-            """
-
-            cur.execute(request, subset)
-
-            for row in cur:
-                term_id = row[1]
-
-                try:
-                    term = terms[term_id]
-                except KeyError:
-                    term = terms[term_id] = {"id": term_id, "signatures": {}}
-                    go_terms.add(term_id)
-
-                try:
-                    s = term["signatures"][signature]
-                except KeyError:
-                    s = term["signatures"][signature] = [set(), set(), set()]
-
-                s[2].add(row[0])
+        for subset in utils.oracle_arrays(cur, proteins):
+            cur.execute(
+                """
+                SELECT DISTINCT METHOD_AC, GO_ID
+                FROM INTERPRO.FUNFAM2GO M
+                WHERE PROTEIN_AC IN (SELECT COLUMN_VALUE FROM TABLE(:1))
+                AND METHOD_AC LIKE :2
+                """,
+                [subset, f"{signature}%"]
+            )
+
+            for funfam_acc, term_id in cur:
+                results.append((signature, funfam_acc, term_id))
 
     cur.close()
     con.close()
+    return results
 
-    go_terms = list(go_terms)
-    for i in range(0, len(go_terms), 100):
-        subset = go_terms[i:i+100]
 
-        for term in get_go_details(subset, pg_cur):
+def add_subfam_terms(subfam2go: list[tuple[str, str, str]],
+                     terms: dict[str, dict], pg_cur) -> dict[str, dict]:
+    """
+    Add GO terms of PANTHER subfamilies and CATH FunFams to their signature.
+
+    :param subfam2go: tuples of (signature, subfamily, term ID)
+    :param terms: GO terms
+    :param pg_cur: PostgreSQL cursor, used to get details of new terms
+    :return: GO terms
+    """
+    go_terms = set()
+    for signature, subfam_acc, term_id in subfam2go:
+        try:
+            term = terms[term_id]
+        except KeyError:
+            term = terms[term_id] = {"id": term_id, "signatures": {}}
+            go_terms.add(term_id)
+
+        try:
+            s = term["signatures"][signature]
+        except KeyError:
+            s = term["signatures"][signature] = [set(), set(), set()]
+
+        s[2].add(subfam_acc)
+
+    if go_terms:
+        for term in get_go_details(list(go_terms), pg_cur):
             terms[term["id"]].update(term)
 
     return terms
@@ -213,14 +211,14 @@ def get_go2funfam(gene3dset: dict, terms: dict, pg_cur) -> dict[str, dict]:
 def get_go_details(term_ids: list[str], pg_cur) -> list[dict]:
     details = []
 
-    binds = ["%s" for _ in term_ids]
-    pg_cur.execute(
-        f"""
+    utils.execute_prepared(
+        pg_cur, "signatures.go.terms",
+        """
         SELECT t.id, t.name, t.category
         FROM term t
-        WHERE t.id IN ({','.join(binds)})
+        WHERE t.id = ANY(%s)
         """,
-        term_ids
+        [term_ids]
     )
 
     columns = ("id", "name", "aspect")
@@ -1,10 +1,16 @@
-from flask import jsonify
+from flask import jsonify, request
 
 from pronto import utils
+from pronto.comparisons import on_demand
+from pronto.diskcache import cached_response
+from pronto.httpcache import conditional
+from pronto.proteinindex import protein_index
 from . import bp
 
 
 @bp.route("/<path:accessions>/matrices/")
+@conditional(curation=False)
+@cached_response()
 def get_matrices(accessions):
     accessions = tuple(set(utils.split_path(accessions)))
 
@@ -15,7 +21,11 @@ def get_matrices(accessions):
 
     cur.close()
     con.close()
-    
+
+    if request.args.get("layout") == "matrix":
+        return jsonify(to_matrix(sorted(accessions), signatures, comparisons,
+                                 exclusive))
+
     return jsonify({
         "signatures": signatures,
         "comparisons": comparisons,
@@ -23,49 +33,108 @@ def get_matrices(accessions):
     })
 
 
+def to_matrix(accessions: list[str], signatures: dict, comparisons: dict,
+              exclusive: dict) -> dict:
+    """
+    Compact layout of comparisons: lists in the order of `accessions`,
+    and N×N matrices of collocations and overlaps (0 if unknown).
+    """
+    collocations = []
+    overlaps = []
+    for acc1 in accessions:
+        row = comparisons.get(acc1, {})
+        collocations.append([row.get(acc2, {}).get("collocations", 0)
+                             for acc2 in accessions])
+        overlaps.append([row.get(acc2, {}).get("overlaps", 0)
+                         for acc2 in accessions])
+
+    return {
+        "accessions": accessions,
+        "proteins": [signatures.get(acc) for acc in accessions],
+        "exclusive": [exclusive.get(acc) for acc in accessions],
+        "collocations": collocations,
+        "overlaps": overlaps,
+    }
+
+
 def get_comparisons(cur, accessions: tuple[str]):
-    in_params = ','.join('%s' for _ in accessions)
-    cur.execute(
-        f"""
-        SELECT signature_acc, array_agg(protein_acc) AS proteins
-        FROM signature2protein
-        WHERE signature_acc in ({in_params})
-        GROUP BY signature_acc 
-        """,
-        accessions
-    )
+    """
+    Get the comparisons of signatures with each other.
 
-    signature2proteins = {}
-    for accession, proteins in cur.fetchall():
-        signature2proteins[accession] = set(proteins)
+    Pairs missing from interpro.comparison (e.g. new signatures) are
+    compared on demand.
+    """
+    accessions = list(accessions)
+    signatures, comparisons = get_stored_comparisons(cur, accessions)
 
-    exclusive = {}
-    for accession in signature2proteins:
-        others = set()
-        for o in signature2proteins:
-            if o != accession:
-                others |= signature2proteins[o]
+    # Only pairs matching the same proteins can be missing
+    index = protein_index.get()
+    if index is None:
+        collocations, exclusive = count_proteins(cur, accessions)
+        missing = [(acc1, acc2)
+                   for acc1, acc2 in collocations
+                   if acc2 not in comparisons.get(acc1, {})]
+    else:
+        collocations, counts = index.compare(accessions)
+        missing = []
+        for i, j in zip(*collocations.nonzero()):
+            acc1 = accessions[i]
+            acc2 = accessions[j]
+            if i != j and acc2 not in comparisons.get(acc1, {}):
+                missing.append((acc1, acc2))
 
-        exclusive[accession] = len(signature2proteins[accession] - others)
+        exclusive = {
+            acc: int(counts[i])
+            for i, acc in enumerate(accessions)
+            if acc in index
+        }
+
+    if missing:
+        # Collocations and overlaps both count complete sequences only
+        computed = on_demand.compare_signatures(
+            [acc for pair in missing for acc in pair]
+        )
+        for acc1, acc2 in missing:
+            try:
+                c = computed[acc1][acc2]
+            except KeyError:
+                # Only fragments matched by both signatures
+                continue
+
+            comparisons.setdefault(acc1, {})[acc2] = {
+                "collocations": c["collocations"],
+                "overlaps": c["overlaps"]
+            }
+
+    return signatures, comparisons, exclusive
 
-    cur.execute(
-        f"""
+
+def get_stored_comparisons(cur, accessions: list[str]) -> tuple[dict, dict]:
+    """
+    Get the comparisons of signatures from interpro.comparison only,
+    e.g. for sanity checks, which must not depend on the protein index,
+    or on comparisons computed on demand.
+    """
+    utils.execute_prepared(
+        cur, "signatures.matrices.signatures",
+        """
         SELECT accession, num_complete_sequences
         FROM interpro.signature
-        WHERE accession IN ({in_params})
+        WHERE accession = ANY(%s)
         """,
-        accessions
+        [accessions]
     )
     signatures = dict(cur.fetchall())
 
-    cur.execute(
-        f"""
+    utils.execute_prepared(
+        cur, "signatures.matrices.comparisons",
+        """
         SELECT signature_acc_1, signature_acc_2, num_collocations, num_50pc_overlaps
         FROM interpro.comparison
-        WHERE signature_acc_1 IN ({in_params})
-        AND signature_acc_2 IN ({in_params})
+        WHERE signature_acc_1 = ANY(%s)
+        AND signature_acc_2 = ANY(%s)
         """,
-        accessions + accessions
+        [accessions, accessions]
     )
 
     comparisons = {}
@@ -80,4 +149,45 @@ def get_comparisons(cur, accessions: tuple[str]):
                 "overlaps": overlaps
             }
 
-    return signatures, comparisons, exclusive
+    return signatures, comparisons
+
+
+def count_proteins(cur, accessions: list[str]) -> tuple[dict, dict]:
+    """
+    Count the proteins matched by pairs of signatures, and by one signature
+    only (without the protein index).
+
+    :return: collocations of pairs matching at least one protein
+             (in both directions), and exclusive proteins of signatures
+    """
+    rows = utils.copy_rows(
+        cur,
+        """
+        SELECT signature_acc::text, array_agg(protein_acc::text) AS proteins
+        FROM signature2protein
+        WHERE signature_acc = ANY(%s)
+        GROUP BY signature_acc 
+        """,
+        [accessions],
+        ["text", "text[]"]
+    )
+
+    signature2proteins = {}
+    for accession, proteins in rows:
+        signature2proteins[accession] = set(proteins)
+
+    collocations = {}
+    exclusive = {}
+    for accession in signature2proteins:
+        others = set()
+        for o in signature2proteins:
+            if o != accession:
+                others |= signature2proteins[o]
+                common = len(signature2proteins[accession]
+                             & signature2proteins[o])
+                if common:
+                    collocations[(accession, o)] = common
+
+        exclusive[accession] = len(signature2proteins[accession] - others)
+
+    return collocations, exclusive
@@ -1,10 +1,28 @@
-from flask import jsonify, request
+import base64
+import json
+from collections.abc import Iterable, Iterator
+
+from flask import current_app, jsonify, request, Response, stream_with_context
 
 from pronto import utils
+from pronto.httpcache import conditional
 from . import bp
 
 
+# Formats of `?format=`: media type, and file extension
+_EXPORT_FORMATS = {
+    "tsv": ("text/tab-separated-values", "tsv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "fasta": ("text/x-fasta", "fasta"),
+}
+# Proteins whose sequences are fetched at once (FASTA export)
+_EXPORT_BATCH_SIZE = 1000
+# Size of the chunks sent by exports
+_CHUNK_SIZE = 64 * 1024
+
+
 @bp.route("/<path:accessions>/proteins/")
+@conditional()
 def get_proteins_alt(accessions):
     accessions = set(utils.split_path(accessions))
 
@@ -37,7 +55,15 @@ def get_proteins_alt(accessions):
     else:
         reviewed = None
 
-    # dl_file = "file" in request.args
+    export_format = request.args.get("format")
+    if export_format is not None and export_format not in _EXPORT_FORMATS:
+        return jsonify({
+            "error": {
+                "title": "Bad Request (invalid format)",
+                "message": f"{export_format} is not a valid format. "
+                           f"Expected: {', '.join(_EXPORT_FORMATS)}."
+            }
+        }), 400
 
     try:
         exclude = set(request.args["exclude"].split(','))
@@ -57,6 +83,19 @@ def get_proteins_alt(accessions):
     except (KeyError, ValueError):
         page_size = 10
 
+    try:
+        # Keyset pagination (next/previous page), instead of `page`
+        cursor = _decode_cursor(request.args["cursor"], reviewed_first)
+    except KeyError:
+        cursor = None
+    except ValueError:
+        return jsonify({
+            "error": {
+                "title": "Bad Request (invalid cursor)",
+                "message": f"{request.args['cursor']} is not a valid cursor."
+            }
+        }), 400
+
     try:
         min_sign_per_prot = int(request.args["matching"])
     except KeyError:
@@ -149,8 +188,8 @@ def get_proteins_alt(accessions):
                     }
                 }), 400
 
-        filters = [f"signature_acc IN ({','.join('%s' for _ in accessions)})"]
-        params = list(accessions)
+        filters = ["signature_acc = ANY(%s)"]
+        params = [list(accessions)]
 
         if reviewed is True:
             filters.append("is_reviewed IS TRUE")
@@ -262,107 +301,159 @@ def get_proteins_alt(accessions):
 
         if exclude_others:
             filters.append(
-                f"""
+                """
                 NOT EXISTS (
                     SELECT 1
                     FROM signature2protein spx
-                    WHERE spx.signature_acc NOT IN (
-                        {','.join("%s" for _ in accessions)}
-                    )
+                    WHERE spx.signature_acc <> ALL(%s)
                     AND sp.protein_acc = spx.protein_acc
                 )
                 """
             )
-            params += list(accessions)
+            params.append(list(accessions))
         elif exclude:
             filters.append(
-                f"""
+                """
                 NOT EXISTS (
                     SELECT 1
                     FROM signature2protein spx
-                    WHERE spx.signature_acc IN (
-                        {','.join("%s" for _ in exclude)}
-                    )
+                    WHERE spx.signature_acc = ANY(%s)
                     AND sp.protein_acc = spx.protein_acc
                 )
                 """
             )
-            params += list(exclude)
-
-        if filters:
-            sql += f"WHERE {' AND '.join(filters)} "
+            params.append(list(exclude))
 
         if reviewed_first:
-            sql += """
-                ORDER BY 
-                    CASE WHEN is_reviewed IS TRUE THEN 1 ELSE 2 END, 
-                    protein_acc
-            """
+            sort_cols = ["CASE WHEN sp.is_reviewed IS TRUE THEN 1 ELSE 2 END",
+                         "sp.protein_acc"]
         else:
-            sql += "ORDER BY protein_acc"
-
-        cur.execute(sql, params)
-        results = cur.fetchall()
+            sort_cols = ["sp.protein_acc"]
+
+        if export_format is not None:
+            # All proteins, streamed (pagination and grouping are ignored)
+            where = f"WHERE {' AND '.join(filters)}" if filters else ""
+            cur.close()
+            con.close()
+            return _export(f"{sql} {where}", params, sort_cols,
+                           export_format)
+
+        paginate = page_size > 0 and page > 0
+        next_cursor = prev_cursor = None
         proteins = []
         if group_by_dom_org:
-            domains = {}
-            domain_order = []
-
-            for protein_acc, _, md5 in results:
-                try:
-                    domains[md5].append(protein_acc)
-                except KeyError:
-                    domains[md5] = [protein_acc]
-                    domain_order.append(md5)
-
-            for md5 in domain_order:
-                domain_proteins = domains[md5]
+            # Most common domain organisations first, then in protein order
+            where = f"WHERE {' AND '.join(filters)}" if filters else ""
+            order_by = ["COUNT(*) DESC"]
+            if reviewed_first:
+                order_by.append(f"MIN({sort_cols[0]})")
+
+            order_by.append("1")
+            group_sql = f"""
+                SELECT
+                    (array_agg(protein_acc ORDER BY {', '.join(sort_cols)}))[1],
+                    COUNT(*),
+                    md5
+                FROM ({sql} {where}) sp
+                GROUP BY md5
+                ORDER BY {', '.join(order_by)}
+            """
+            group_params = list(params)
+            if paginate:
+                group_sql += "LIMIT %s OFFSET %s"
+                group_params += [page_size, (page - 1) * page_size]
+
+            utils.execute_prepared(cur, "signatures.proteins.md5",
+                                   group_sql, group_params)
+            for protein_acc, count, md5 in cur.fetchall():
                 proteins.append({
-                    "accession": domain_proteins[0],
-                    "count": len(domain_proteins),
+                    "accession": protein_acc,
+                    "count": count,
                     "md5": md5
                 })
 
-            proteins.sort(key=lambda x: -x["count"])
+            if paginate:
+                utils.execute_prepared(
+                    cur, "signatures.proteins.md5.count",
+                    f"""
+                    SELECT COUNT(*)
+                    FROM (
+                        SELECT md5
+                        FROM ({sql} {where}) sp
+                        GROUP BY md5
+                    ) x
+                    """,
+                    params
+                )
+                cnt_proteins, = cur.fetchone()
+            else:
+                cnt_proteins = len(proteins)
         else:
-            if reviewed_first:
-                results.sort(key=lambda x: (0 if x[1] else 1, x[0]))
+            page_filters = list(filters)
+            page_params = list(params)
+            descending = False
+            if cursor is not None:
+                direction, key = cursor
+                page_filters.append(
+                    f"({', '.join(sort_cols)}) "
+                    f"{'>' if direction == 'next' else '<'} "
+                    f"({', '.join(['%s'] * len(key))})"
+                )
+                page_params += key
+                descending = direction == "previous"
+
+            page_sql = sql
+            if page_filters:
+                page_sql += f"WHERE {' AND '.join(page_filters)} "
+
+            page_sql += "ORDER BY " + ", ".join(
+                f"{c} DESC" if descending else c for c in sort_cols
+            )
+            if paginate:
+                # One more row, to know if there is a next page
+                page_sql += " LIMIT %s"
+                page_params.append(page_size + 1)
+                if cursor is None:
+                    page_sql += " OFFSET %s"
+                    page_params.append((page - 1) * page_size)
+
+            utils.execute_prepared(cur, "signatures.proteins", page_sql,
+                                   page_params)
+            results = cur.fetchall()
+            if paginate:
+                has_more = len(results) > page_size
+                results = results[:page_size]
+                if descending:
+                    results.reverse()
+
+                if results:
+                    first = _get_sort_key(results[0], reviewed_first)
+                    last = _get_sort_key(results[-1], reviewed_first)
+                    if descending:
+                        next_cursor = _encode_cursor("next", last)
+                        if has_more:
+                            prev_cursor = _encode_cursor("previous", first)
+                    else:
+                        if has_more:
+                            next_cursor = _encode_cursor("next", last)
+                        if cursor is not None or page > 1:
+                            prev_cursor = _encode_cursor("previous", first)
+
+                where = f"WHERE {' AND '.join(filters)}" if filters else ""
+                utils.execute_prepared(
+                    cur, "signatures.proteins.count",
+                    f"SELECT COUNT(*) FROM ({sql} {where}) x",
+                    params
+                )
+                cnt_proteins, = cur.fetchone()
             else:
-                results.sort(key=lambda x: x[0])
+                cnt_proteins = len(results)
 
             for protein_acc, _, _ in results:
                 proteins.append({"accession": protein_acc})
 
-        cnt_proteins = len(proteins)
-
-        if page_size > 0 and page > 0:
-            proteins = proteins[(page-1)*page_size:page*page_size]
-
     con.close()
 
-    """
-    fd, filename = mkstemp()
-    with os.fdopen(fd, "wt") as fp:
-        fp.write("# Accession\tIdentifier\tName\tLength\tSource\t"
-                 "Organism\n")
-
-        for p in sorted(proteins, key=lambda p: p["accession"]):
-            if p["is_reviewed"]:
-                src = "UniProtKB/Swiss-Prot"
-            else:
-                src = "UniProtKB/TrEMBL"
-
-            fp.write(f"{p['accession']}\t{p['identifier']}\t{p['name']}\t"
-                     f"{p['length']}\t{src}\t{p['organism']}\n")
-
-    try:
-        return send_file(filename, mimetype="text/tab-separated-values",
-                         as_attachment=True,
-                         attachment_filename="proteins.tsv")
-    finally:
-        os.remove(filename)
-    """
-
     return jsonify({
         "count": cnt_proteins,
         "results": proteins,
@@ -380,6 +471,176 @@ def get_proteins_alt(accessions):
         },
         "page_info": {
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "next": next_cursor,
+            "previous": prev_cursor
         }
     })
+
+
+def _get_sort_key(row: tuple, reviewed_first: bool) -> list:
+    protein_acc, is_reviewed, _ = row
+    if reviewed_first:
+        return [1 if is_reviewed else 2, protein_acc]
+
+    return [protein_acc]
+
+
+def _encode_cursor(direction: str, key: list) -> str:
+    value = json.dumps([direction] + key, separators=(",", ":"))
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(value: str, reviewed_first: bool) -> tuple[str, list]:
+    try:
+        direction, *key = json.loads(base64.urlsafe_b64decode(value))
+    except (TypeError, ValueError):
+        raise ValueError(value)
+
+    if direction not in ("next", "previous"):
+        raise ValueError(value)
+    elif reviewed_first:
+        if (len(key) != 2 or key[0] not in (1, 2)
+                or not isinstance(key[1], str)):
+            raise ValueError(value)
+    elif len(key) != 1 or not isinstance(key[0], str):
+        raise ValueError(value)
+
+    return direction, key
+
+
+def _export(sql: str, params: list, sort_cols: list[str],
+            export_format: str) -> Response:
+    """
+    Stream proteins as they are read from the database, so exports
+    start immediately and use constant memory, whatever their size.
+    """
+    query = f"""
+        SELECT p.accession::text, p.identifier::text, pn.text::text,
+               p.length::int4, p.is_reviewed, t.name::text
+        FROM ({sql}) sp
+        INNER JOIN interpro.protein p ON sp.protein_acc = p.accession
+        LEFT OUTER JOIN interpro.taxon t ON p.taxon_id = t.id
+        LEFT OUTER JOIN interpro.protein2name p2n
+            ON p.accession = p2n.protein_acc
+        LEFT OUTER JOIN interpro.protein_name pn ON p2n.name_id = pn.name_id
+        ORDER BY {', '.join(sort_cols)}
+    """
+
+    def _rows() -> Iterator[tuple]:
+        # The view's connection is released once the response is sent
+        con = utils.connect_pg()
+        cur = con.cursor()
+        try:
+            yield from utils.copy_rows(cur, query, params,
+                                       ["text", "text", "text", "int4",
+                                        "bool", "text"])
+        finally:
+            cur.close()
+            con.close()
+
+    if export_format == "tsv":
+        lines = _to_tsv(_rows())
+    elif export_format == "jsonl":
+        lines = _to_jsonl(_rows())
+    else:
+        lines = _to_fasta(_rows())
+
+    def _generate() -> Iterator[bytes]:
+        chunk = bytearray()
+        for line in lines:
+            chunk += line
+            if len(chunk) >= _CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+
+        yield bytes(chunk)
+
+    mimetype, extension = _EXPORT_FORMATS[export_format]
+    response = current_app.response_class(stream_with_context(_generate()),
+                                          mimetype=mimetype)
+    response.headers["Content-Disposition"] = (f"attachment; "
+                                               f"filename=proteins.{extension}")
+    return response
+
+
+def _get_source(is_reviewed: bool) -> str:
+    return "UniProtKB/Swiss-Prot" if is_reviewed else "UniProtKB/TrEMBL"
+
+
+def _to_tsv(rows: Iterable[tuple]) -> Iterator[bytes]:
+    yield b"Accession\tIdentifier\tName\tLength\tSource\tOrganism\n"
+    for acc, identifier, name, length, is_reviewed, organism in rows:
+        line = (f"{acc}\t{identifier}\t{name or ''}\t{length}\t"
+                f"{_get_source(is_reviewed)}\t{organism or ''}\n")
+        yield line.encode("utf-8")
+
+
+def _to_jsonl(rows: Iterable[tuple]) -> Iterator[bytes]:
+    dumpb = current_app.json.dumpb
+    for acc, identifier, name, length, is_reviewed, organism in rows:
+        yield dumpb({
+            "accession": acc,
+            "identifier": identifier,
+            "name": name,
+            "length": length,
+            "source": _get_source(is_reviewed),
+            "organism": organism
+        }) + b"\n"
+
+
+def _to_fasta(rows: Iterable[tuple]) -> Iterator[bytes]:
+    con = utils.connect_oracle()
+    cur = con.cursor()
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == _EXPORT_BATCH_SIZE:
+                yield from _format_fasta(cur, batch)
+                batch.clear()
+
+        yield from _format_fasta(cur, batch)
+    finally:
+        cur.close()
+        con.close()
+
+
+def _format_fasta(cur, rows: list[tuple]) -> Iterator[bytes]:
+    if not rows:
+        return
+
+    cur.execute(
+        """
+        SELECT X.AC, P.SEQ_SHORT, P.SEQ_LONG
+        FROM UNIPARC.PROTEIN P
+        INNER JOIN UNIPARC.XREF X ON P.UPI = X.UPI
+        WHERE X.AC IN (SELECT COLUMN_VALUE FROM TABLE(:1))
+        AND X.DBID IN (2, 3)
+        AND X.DELETED = 'N'
+        """,
+        [utils.oracle_array(cur, [row[0] for row in rows])]
+    )
+    sequences = {}
+    for acc, seq_short, seq_long in cur:
+        sequences[acc] = seq_short or seq_long.read()
+
+    for acc, identifier, name, _, is_reviewed, organism in rows:
+        try:
+            sequence = sequences[acc]
+        except KeyError:
+            # Not in UniParc (e.g. deleted since the release)
+            continue
+
+        db = "sp" if is_reviewed else "tr"
+        header = f">{db}|{acc}|{identifier}"
+        if name:
+            header += f" {name}"
+        if organism:
+            header += f" OS={organism}"
+
+        lines = [header]
+        for i in range(0, len(sequence), 60):
+            lines.append(sequence[i:i+60])
+
+        yield ("\n".join(lines) + "\n").encode("utf-8")
@@ -1,19 +1,22 @@
 from flask import jsonify
 
 from pronto import utils
+from pronto.diskcache import cached_response
+from pronto.httpcache import conditional
 from . import bp, get_sig2interpro
 
 
 @bp.route("/<path:accessions>/structures/")
+@conditional()
+@cached_response(integrated=get_sig2interpro)
 def get_structures(accessions):
     accessions = utils.split_path(accessions)
 
     con = utils.connect_pg()
     with con.cursor() as cur:
-        in_stmt = ','.join("%s" for _ in accessions)
-
-        cur.execute(
-            f"""
+        utils.execute_prepared(
+            cur, "signatures.structures",
+            """
             SELECT p.accession, p.identifier, p.is_reviewed, 
                    sp.signature_acc, ss.structure_id
             FROM interpro.signature2protein sp
@@ -22,9 +25,9 @@ def get_structures(accessions):
                AND sp.protein_acc = ss.protein_acc
             INNER JOIN interpro.protein p 
                 ON sp.protein_acc = p.accession
-            WHERE sp.signature_acc IN ({in_stmt})
+            WHERE sp.signature_acc = ANY(%s)
             """,
-            accessions
+            [accessions]
         )
 
         proteins = {}
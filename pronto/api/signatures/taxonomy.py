@@ -1,6 +1,9 @@
 from flask import jsonify, request
 
 from pronto import utils
+from pronto.diskcache import cached_response
+from pronto.httpcache import conditional
+from pronto.serialization import Stream, stream_jsonify
 from . import bp, get_sig2interpro
 
 RANKS = (
@@ -16,6 +19,8 @@ RANKS = (
 
 
 @bp.route("/<path:accessions>/taxonomy/<string:rank>/")
+@conditional()
+@cached_response(integrated=get_sig2interpro)
 def get_taxonomy_origins(accessions, rank):
     if rank not in RANKS:
         return jsonify({
@@ -55,12 +60,13 @@ def get_taxonomy_origins(accessions, rank):
 
     if left_num is None:
         taxon_cond = ""
-        params = (rank,) + tuple(accessions)
+        params = (rank, accessions)
     else:
         taxon_cond = "AND sp.taxon_left_num BETWEEN %s AND %s"
-        params = (rank,) + tuple(accessions) + (left_num, right_num)
+        params = (rank, accessions, left_num, right_num)
 
-    cur.execute(
+    utils.execute_prepared(
+        cur, "signatures.taxonomy",
         f"""
         SELECT t.id, t.name, p.signature_acc, p.cnt 
         FROM (
@@ -70,7 +76,7 @@ def get_taxonomy_origins(accessions, rank):
               ON sp.taxon_left_num = t.left_number
             INNER JOIN lineage l
               ON t.id = l.child_id AND l.parent_rank = %s
-            WHERE sp.signature_acc IN ({','.join('%s' for _ in accessions)})
+            WHERE sp.signature_acc = ANY(%s)
             {taxon_cond}
             GROUP BY sp.signature_acc, l.parent_id
         ) p
@@ -108,6 +114,8 @@ def get_taxonomy_origins(accessions, rank):
 
 
 @bp.route("/<path:accessions>/taxonomy/")
+@conditional()
+@cached_response(integrated=get_sig2interpro)
 def get_taxonomy_tree(accessions):
     leaf_rank = request.args.get("leaf", "species")
     status = request.args.get("status")
@@ -158,8 +166,8 @@ def get_taxonomy_tree(accessions):
             }), 400
         left_num, right_num = row
 
-    cond = [f"sp.signature_acc IN ({','.join('%s' for _ in accessions)})"]
-    params = accessions
+    cond = ["sp.signature_acc = ANY(%s)"]
+    params = [accessions]
     if left_num is not None:
         cond.append("sp.taxon_left_num BETWEEN %s AND %s")
         params += [left_num, right_num]
@@ -169,9 +177,11 @@ def get_taxonomy_tree(accessions):
     elif status == "unreviewed":
         cond.append("sp.is_reviewed IS FALSE")
 
-    cur.execute(
+    rows = utils.copy_rows(
+        cur,
         f"""
-        SELECT sp.signature_acc, t.id, t2.id, t2.rank, t2.name, count(*)
+        SELECT sp.signature_acc::text, t.id::int8, t2.id::int8, 
+               t2.rank::text, t2.name::text, count(*)
         FROM signature2protein sp
           INNER JOIN taxon t ON sp.taxon_left_num = t.left_number
           INNER JOIN lineage l ON t.id = l.child_id
@@ -179,11 +189,33 @@ def get_taxonomy_tree(accessions):
         WHERE {' AND '.join(cond)}
         GROUP BY sp.signature_acc, t.id, t2.id, t2.rank, t2.name
         """,
-        params
+        params,
+        ["text", "int8", "int8", "text", "text", "int8"]
     )
 
+    tree = build_tree(rows, ranks)
+
+    cur.close()
+    con.close()
+
+    return stream_jsonify({
+        "results": Stream(format_node(n) for n in tree.values()),
+        "integrated": get_sig2interpro(accessions)
+    })
+
+
+def build_tree(rows, ranks: tuple[str, ...]) -> dict:
+    """
+    Build the taxonomic tree of proteins matched by signatures.
+
+    :param rows: tuples of (signature accession, taxon ID, ancestor ID,
+                 ancestor rank, ancestor name, number of proteins),
+                 for each ancestor (including itself) of each taxon
+    :param ranks: ranks of the tree, from the root to the leaves
+    :return: nodes of the first rank, indexed by taxon ID
+    """
     lineages = {}
-    for acc, tid, anc_id, anc_rank, anc_name, cnt in cur.fetchall():
+    for acc, tid, anc_id, anc_rank, anc_name, cnt in rows:
         try:
             idx = ranks.index(anc_rank)
         except ValueError:
@@ -231,13 +263,7 @@ def get_taxonomy_tree(accessions):
 
             target = obj["children"]
 
-    cur.close()
-    con.close()
-
-    return jsonify({
-        "results": [format_node(n) for n in tree.values()],
-        "integrated": get_sig2interpro(accessions)
-    })
+    return tree
 
 
 def format_node(node: dict) -> dict:
@@ -249,6 +275,8 @@ def format_node(node: dict) -> dict:
 
 
 @bp.route("/<path:accessions>/taxon/<int:taxon_id>/")
+@conditional()
+@cached_response()
 def get_taxon_children(accessions, taxon_id):
     accessions = utils.split_path(accessions)
     con = utils.connect_pg()
@@ -269,8 +297,9 @@ def get_taxon_children(accessions, taxon_id):
                 }
             }), 400
 
-    cur.execute(
-        f"""
+    utils.execute_prepared(
+        cur, "signatures.taxonomy.children",
+        """
         SELECT t2.id, MIN(t2.name), MIN(t2.rank), sp.signature_acc, COUNT(*)
         FROM signature2protein sp
         INNER JOIN taxon t
@@ -280,9 +309,9 @@ def get_taxon_children(accessions, taxon_id):
         INNER JOIN taxon t2 
           ON l.parent_id = t2.parent_id 
           AND t.left_number BETWEEN t2.left_number AND t2.right_number
-        WHERE sp.signature_acc IN ({','.join('%s' for _ in accessions)})
+        WHERE sp.signature_acc = ANY(%s)
         GROUP BY sp.signature_acc, t2.id;
-        """, tuple([taxon_id] + accessions)
+        """, (taxon_id, accessions)
     )
     results = {}
     for node_id, node_name, node_rank, acc, cnt in cur:
@@ -0,0 +1,515 @@
+"""
+In-process snapshots of curation data read by many pages.
+
+A snapshot is loaded once per worker, then reloaded when its watermark
+(a cheap query on the audit tables) changes. Watermarks are checked at most
+every CACHE_TTL seconds, so changes made by other workers, or outside
+Pronto, are picked up within that delay. Endpoints modifying the underlying
+data update the snapshot in place when possible, or call `invalidate()`
+so the next read reloads it. Updates in place keep the watermark: changes
+committed at the same time by others are picked up by the next check.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+import oracledb
+import psycopg
+from flask import Flask
+
+from pronto import utils
+
+
+# Seconds before trying again to freeze Pronto, if the database's clock
+# is behind
+_FREEZE_RETRY_DELAY = 5
+
+
+class Snapshot:
+    def __init__(self):
+        self.ttl = 10
+        self._lock = threading.Lock()
+        self._data = None
+        self._watermark = None
+        self._checked_at = 0.0
+
+    def init_app(self, app: Flask):
+        self.ttl = app.config.get("CACHE_TTL", 10)
+
+    def get(self, info: dict | None = None):
+        """
+        Get the snapshot's data, reloading it if it is out of date.
+
+        :param info: Oracle connection information,
+                     for callers running outside of the application context
+        """
+        if self._is_expired():
+            with self._lock:
+                if self._is_expired():
+                    self._sync(info)
+
+        return self._data
+
+    def invalidate(self):
+        self._watermark = None
+        self._checked_at = 0.0
+
+    def _is_expired(self) -> bool:
+        return (self._watermark is None or
+                time.monotonic() - self._checked_at >= self.ttl)
+
+    def _connect(self, info: dict | None):
+        if info is None:
+            return utils.connect_oracle()
+        else:
+            return utils.connect_oracle_info(info)
+
+    def _sync(self, info: dict | None):
+        con = self._connect(info)
+        cur = con.cursor()
+        try:
+            watermark = self.get_watermark(cur)
+            if watermark != self._watermark:
+                self._data = self.load(cur)
+                self._watermark = watermark
+        finally:
+            cur.close()
+            con.close()
+
+        self._checked_at = time.monotonic()
+
+    def get_watermark(self, cur: oracledb.Cursor) -> tuple:
+        raise NotImplementedError
+
+    def load(self, cur: oracledb.Cursor):
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class IntegratedSignature:
+    entry_acc: str
+    entry_type: str
+    entry_name: str
+    entry_short_name: str
+    checked: bool
+    llm: bool
+
+
+class IntegrationSnapshot(Snapshot):
+    """
+    Integrated signatures, indexed by signature accession.
+
+    Signatures integrated or unintegrated, and entries created, updated,
+    or deleted through Pronto update the snapshot in place. Its watermark
+    is kept, so the next check reloads it with concurrent changes
+    of other workers.
+    """
+
+    def get_watermark(self, cur: oracledb.Cursor) -> tuple:
+        cur.execute(
+            """
+            SELECT
+              (SELECT MAX(TIMESTAMP) FROM INTERPRO.ENTRY2METHOD_AUDIT),
+              (SELECT MAX(TIMESTAMP) FROM INTERPRO.ENTRY_AUDIT),
+              (SELECT COUNT(*) FROM INTERPRO.ENTRY2METHOD)
+            FROM DUAL
+            """
+        )
+        return cur.fetchone()
+
+    def load(self, cur: oracledb.Cursor) -> dict[str, IntegratedSignature]:
+        cur.execute(
+            """
+            SELECT EM.METHOD_AC, E.ENTRY_AC, E.ENTRY_TYPE, E.NAME,
+                   E.SHORT_NAME, E.CHECKED, E.LLM
+            FROM INTERPRO.ENTRY2METHOD EM
+            INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
+            """
+        )
+        return {row[0]: self._make(row) for row in cur}
+
+    def update(self, cur: oracledb.Cursor, signatures: list[str] = (),
+               entries: list[str] = ()):
+        """
+        Reload the given signatures, and the signatures of the given entries,
+        once changes to them are committed.
+
+        :param cur: cursor of the connection that committed the changes
+        :param signatures: accessions of signatures
+        :param entries: accessions of entries
+        """
+        with self._lock:
+            if self._data is None or self._watermark is None:
+                return
+
+            signatures = set(signatures)
+            entries = set(entries)
+            cur.execute(
+                """
+                SELECT EM.METHOD_AC, E.ENTRY_AC, E.ENTRY_TYPE, E.NAME,
+                       E.SHORT_NAME, E.CHECKED, E.LLM
+                FROM INTERPRO.ENTRY2METHOD EM
+                INNER JOIN INTERPRO.ENTRY E ON EM.ENTRY_AC = E.ENTRY_AC
+                WHERE EM.METHOD_AC IN (SELECT COLUMN_VALUE FROM TABLE(:1))
+                OR EM.ENTRY_AC IN (SELECT COLUMN_VALUE FROM TABLE(:2))
+                """,
+                [utils.oracle_array(cur, signatures),
+                 utils.oracle_array(cur, entries)]
+            )
+            rows = cur.fetchall()
+
+            # Copy on write: readers may be iterating over the current data
+            data = {
+                acc: s
+                for acc, s in self._data.items()
+                if acc not in signatures and s.entry_acc not in entries
+            }
+            for row in rows:
+                data[row[0]] = self._make(row)
+
+            self._data = data
+
+    @staticmethod
+    def _make(row: tuple) -> IntegratedSignature:
+        return IntegratedSignature(row[1], row[2], row[3], row[4],
+                                   row[5] == "Y", row[6] == "Y")
+
+
+@dataclass(frozen=True)
+class SignatureComment:
+    id: int
+    text: str
+    author: str
+    date: datetime
+
+
+@dataclass(frozen=True)
+class SignatureComments:
+    count: int
+    latest: SignatureComment
+
+
+class CommentSnapshot(Snapshot):
+    """
+    Number of active (i.e. not deleted) comments, and most recent comment,
+    indexed by signature accession.
+
+    Comments added or deleted through Pronto update the snapshot in place,
+    keeping its watermark (see `IntegrationSnapshot`).
+    """
+
+    def get_watermark(self, cur: oracledb.Cursor) -> tuple:
+        cur.execute(
+            """
+            SELECT MAX(ID), SUM(CASE WHEN STATUS = 'Y' THEN 1 ELSE 0 END)
+            FROM INTERPRO.METHOD_COMMENT
+            """
+        )
+        max_id, num_active = cur.fetchone()
+        return max_id or 0, num_active or 0
+
+    def load(self, cur: oracledb.Cursor) -> dict[str, SignatureComments]:
+        cur.execute(
+            """
+            SELECT METHOD_AC, ID, VALUE, NAME, CREATED_ON, CNT
+            FROM (
+                SELECT C.METHOD_AC, C.ID, C.VALUE, P.NAME, C.CREATED_ON,
+                       ROW_NUMBER() OVER (
+                         PARTITION BY C.METHOD_AC
+                         ORDER BY C.CREATED_ON DESC, C.ID DESC
+                       ) RN,
+                       COUNT(*) OVER (PARTITION BY C.METHOD_AC) CNT
+                FROM INTERPRO.METHOD_COMMENT C
+                INNER JOIN INTERPRO.PRONTO_USER P
+                  ON C.USERNAME = P.USERNAME
+                WHERE C.STATUS = 'Y'
+            )
+            WHERE RN = 1
+            """
+        )
+        return {
+            row[0]: SignatureComments(row[5], SignatureComment(*row[1:5]))
+            for row in cur
+        }
+
+    def count(self, accession: str) -> int:
+        try:
+            return self.get()[accession].count
+        except KeyError:
+            return 0
+
+    def add(self, accession: str, comment: SignatureComment):
+        with self._lock:
+            if self._data is None or self._watermark is None:
+                return
+
+            # Copy on write: readers may be iterating over the current data
+            data = dict(self._data)
+            try:
+                count = data[accession].count
+            except KeyError:
+                count = 0
+
+            data[accession] = SignatureComments(count + 1, comment)
+            self._data = data
+
+    def remove(self, accession: str, comment_id: int):
+        with self._lock:
+            if self._data is None or self._watermark is None:
+                return
+
+            try:
+                comments = self._data[accession]
+            except KeyError:
+                return
+
+            if comments.latest.id == comment_id:
+                # The previous comment is not in the snapshot
+                self.invalidate()
+                return
+
+            data = dict(self._data)
+            data[accession] = SignatureComments(comments.count - 1,
+                                                comments.latest)
+            self._data = data
+
+
+class StateSnapshot(Snapshot):
+    """
+    Pronto states. PRONTO_STATES is tiny and not audited,
+    so its content is its own watermark.
+
+    A scheduled freeze (FROZEN state with ACTIVE_FROM set) is activated
+    in the database by a timer (run again shortly if the database's clock
+    is behind), and reported as active from ACTIVE_FROM onwards even if
+    the timer has not run yet.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._app = None
+        self._timer = None
+
+    def init_app(self, app: Flask):
+        super().init_app(app)
+        self._app = app
+
+    def get(self, info: dict | None = None) -> utils.ProntoState:
+        state = super().get(info)
+        if state.freeze_on and datetime.now() >= state.freeze_on:
+            return utils.ProntoState(state.updating, True, None)
+
+        return state
+
+    def get_watermark(self, cur: oracledb.Cursor) -> tuple:
+        return tuple(self._select(cur))
+
+    def load(self, cur: oracledb.Cursor) -> utils.ProntoState:
+        is_updating = is_frozen = False
+        freeze_on = None
+        for name, active, active_from in self._select(cur):
+            if name == "UPDATING":
+                is_updating = active == "Y"
+            elif name == "FROZEN":
+                is_frozen = active == "Y"
+                freeze_on = active_from
+
+        if freeze_on and not is_frozen and self._app is not None:
+            # Wait at least one second, in case clocks are not in sync
+            delay = (freeze_on - datetime.now()).total_seconds()
+            self._schedule(max(delay, 1))
+        else:
+            self._schedule(None)
+
+        return utils.ProntoState(is_updating, is_frozen, freeze_on)
+
+    def _schedule(self, delay: float | None):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if delay is not None:
+            self._timer = threading.Timer(delay, self._freeze)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @staticmethod
+    def _select(cur: oracledb.Cursor) -> list[tuple]:
+        cur.execute(
+            """
+            SELECT NAME, ACTIVE, ACTIVE_FROM
+            FROM INTERPRO.PRONTO_STATES
+            ORDER BY NAME
+            """
+        )
+        return cur.fetchall()
+
+    def _freeze(self):
+        with self._app.app_context():
+            con = utils.connect_oracle()
+            cur = con.cursor()
+            try:
+                cur.execute(
+                    """
+                    UPDATE INTERPRO.PRONTO_STATES
+                    SET ACTIVE = 'Y', ACTIVE_FROM = NULL
+                    WHERE NAME = 'FROZEN'
+                    AND ACTIVE = 'N'
+                    AND ACTIVE_FROM IS NOT NULL
+                    AND SYSDATE >= ACTIVE_FROM
+                    """
+                )
+                frozen = cur.rowcount > 0
+                con.commit()
+
+                if not frozen:
+                    cur.execute(
+                        """
+                        SELECT COUNT(*)
+                        FROM INTERPRO.PRONTO_STATES
+                        WHERE NAME = 'FROZEN'
+                        AND ACTIVE = 'N'
+                        AND ACTIVE_FROM IS NOT NULL
+                        """
+                    )
+                    scheduled, = cur.fetchone()
+            finally:
+                cur.close()
+                con.close()
+
+        if frozen:
+            self.invalidate()
+        elif scheduled:
+            # Too early for the database (clocks not in sync): try again,
+            # as the watermark has not changed, so `load()` will not
+            with self._lock:
+                self._schedule(_FREEZE_RETRY_DELAY)
+
+
+class Watermark(Snapshot):
+    """
+    Snapshot holding only a digest of its watermark,
+    used to tell whether data may have changed (e.g. for ETags).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._latest = None
+
+    def get_watermark(self, cur) -> tuple:
+        self._latest = self.select(cur)
+        return self._latest
+
+    def load(self, cur) -> str:
+        return hashlib.sha1(repr(self._latest).encode("utf-8")).hexdigest()
+
+    def select(self, cur) -> tuple:
+        raise NotImplementedError
+
+
+class ReleaseWatermark(Watermark):
+    """
+    Versions of UniProt and member databases: data in PostgreSQL
+    only changes when these do.
+    """
+
+    def _connect(self, info: dict | None):
+        return utils.connect_pg()
+
+    def select(self, cur: psycopg.Cursor) -> tuple:
+        cur.execute(
+            """
+            SELECT name, version
+            FROM interpro.database
+            ORDER BY name
+            """
+        )
+        return tuple(cur.fetchall())
+
+
+class CurationWatermark(Watermark):
+    """
+    Last changes to entries, their signatures and relationships,
+    signature comments, and member database updates.
+
+    Changes made through Pronto also replace a marker file shared by all
+    workers (see `touch()`). Each worker checks the marker on every read,
+    so it sees these changes immediately (not after CACHE_TTL seconds),
+    including changes to data that is not audited.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.marker = None
+        self._marker_id = None
+
+    def init_app(self, app: Flask):
+        super().init_app(app)
+        os.makedirs(app.instance_path, exist_ok=True)
+        self.marker = os.path.join(app.instance_path, "curation.marker")
+
+    def touch(self):
+        if self.marker is not None:
+            # Replaced atomically: a new inode, and modification time
+            tmp = f"{self.marker}.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp, "wt") as fh:
+                fh.write(uuid.uuid4().hex)
+
+            os.replace(tmp, self.marker)
+
+        self.invalidate()
+
+    def _stat_marker(self) -> tuple | None:
+        if self.marker is None:
+            return None
+
+        try:
+            st = os.stat(self.marker)
+        except FileNotFoundError:
+            return None
+
+        return st.st_ino, st.st_mtime_ns
+
+    def _is_expired(self) -> bool:
+        return (super()._is_expired()
+                or self._stat_marker() != self._marker_id)
+
+    def get_watermark(self, cur: oracledb.Cursor) -> tuple:
+        self._marker_id = self._stat_marker()
+        self._latest = self.select(cur) + (self._marker_id,)
+        return self._latest
+
+    def select(self, cur: oracledb.Cursor) -> tuple:
+        cur.execute(
+            """
+            SELECT
+              (SELECT MAX(TIMESTAMP) FROM INTERPRO.ENTRY_AUDIT),
+              (SELECT MAX(TIMESTAMP) FROM INTERPRO.ENTRY2METHOD_AUDIT),
+              (SELECT MAX(TIMESTAMP) FROM INTERPRO.ENTRY2ENTRY_AUDIT),
+              (SELECT MAX(TIMESTAMP) FROM INTERPRO.DB_VERSION_AUDIT),
+              (SELECT MAX(ID) FROM INTERPRO.METHOD_COMMENT),
+              (SELECT COUNT(*) FROM INTERPRO.METHOD_COMMENT WHERE STATUS = 'Y')
+            FROM DUAL
+            """
+        )
+        return cur.fetchone()
+
+
+integration = IntegrationSnapshot()
+comments = CommentSnapshot()
+states = StateSnapshot()
+release = ReleaseWatermark()
+curation = CurationWatermark()
+
+
+def init_app(app: Flask):
+    integration.init_app(app)
+    comments.init_app(app)
+    states.init_app(app)
+    release.init_app(app)
+    curation.init_app(app)
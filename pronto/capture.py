@@ -0,0 +1,92 @@
+"""
+Capture of API requests, for replaying real traffic (see benchmarks/replay.py).
+
+When REQUEST_LOG is set, each API request is appended to that file
+as a JSON object: start time, method, path, query parameters, endpoint,
+status, duration (including streamed bodies), and user class
+(`curator` or `anonymous`). Credentials are never recorded: no headers,
+cookies, bodies, or user names.
+"""
+
+import json
+import logging
+import time
+
+from flask import Flask, g, request
+
+from pronto import auth
+
+
+# Paths not worth replaying (monitoring)
+_EXCLUDED = ("/api/metrics", "/api/traces/", "/api/profiles/")
+
+
+class RequestLog:
+    def __init__(self):
+        self.logger = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.logger is not None
+
+    def init_app(self, app: Flask):
+        path = app.config.get("REQUEST_LOG")
+        if not path:
+            return
+
+        self.logger = app.logger.getChild("requests")
+        self.logger.setLevel(logging.INFO)
+        # Records are only written to the file, one JSON object per line
+        self.logger.propagate = False
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+
+    def record(self, entry: dict):
+        self.logger.info(json.dumps(entry, separators=(",", ":")))
+
+
+request_log = RequestLog()
+
+
+def _start():
+    if (request.path.startswith("/api/")
+            and not request.path.startswith(_EXCLUDED)):
+        g.capture_start = time.time(), time.perf_counter()
+
+
+def _record_status(response):
+    g.capture_status = response.status_code
+    return response
+
+
+def _record(exc: BaseException | None = None):
+    # Torn down once the (possibly streamed) response is sent
+    start = g.pop("capture_start", None)
+    if start is None:
+        return
+
+    started, start_counter = start
+    if exc is not None:
+        status = 500
+    else:
+        status = g.pop("capture_status", 500)
+
+    request_log.record({
+        "time": round(started, 3),
+        "method": request.method,
+        "path": request.path,
+        "args": list(request.args.items(multi=True)),
+        "endpoint": request.endpoint,
+        "status": status,
+        "duration": round(time.perf_counter() - start_counter, 4),
+        "user": "curator" if auth.get_user() else "anonymous",
+    })
+
+
+def init_app(app: Flask):
+    request_log.init_app(app)
+    if request_log.enabled:
+        app.before_request(_start)
+        app.after_request(_record_status)
+        app.teardown_request(_record)
@@ -0,0 +1,272 @@
+"""
+On-demand comparisons of signatures, for pairs missing from
+`interpro.comparison` (e.g. new signatures, or pairs below the cutoff
+of the offline pipeline).
+
+Comparisons are computed from the matches (`interpro.match`) of complete
+sequences. On each protein, the fragments of each signature are sorted
+and merged, then the residues covered by both signatures are counted by
+sweeping their intervals. For each pair of signatures, the following
+are counted:
+
+* collocations: proteins matched by both signatures
+* overlaps: proteins where the signatures overlap by at least 50%
+  of the residues covered by the shortest one
+* res_overlaps, reviewed_res_overlaps: overlapping residues
+  (in all proteins, and in reviewed proteins)
+
+Results are cached on disk until the next release (see `diskcache`).
+Comparisons of a signature with all others, which are the most expensive,
+can be computed in the background, one at a time, for later requests.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, g, has_app_context
+
+from pronto import utils
+from pronto.diskcache import cached
+
+
+_MIN_OVERLAP = 0.5
+# Maximum number of signatures waiting to be compared, per worker
+_MAX_PENDING = 100
+
+
+class OnDemandComparisons:
+    def __init__(self):
+        self._app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def init_app(self, app: Flask):
+        self._app = app
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="comparisons")
+
+    def get_cached_signature(self, accession: str) -> dict[str, dict] | None:
+        """
+        Get the comparisons of a signature with all the signatures matching
+        its proteins, if they are cached.
+
+        :return: comparisons, indexed by accession of the other signature,
+                 or None if not cached
+        """
+        comparisons = _compare_signature.get_cached(accession)
+        if comparisons is None:
+            return None
+
+        return comparisons.get(accession, {})
+
+    def schedule_signatures(self, accessions: list[str]):
+        """
+        Compare signatures with all the signatures matching their proteins
+        in the background, so their comparisons are cached.
+        """
+        with self._lock:
+            for accession in accessions:
+                if accession in self._pending:
+                    continue
+                elif len(self._pending) >= _MAX_PENDING:
+                    break
+
+                self._pending.add(accession)
+                self._executor.submit(self._compare_in_background, accession)
+
+    def _compare_in_background(self, accession: str):
+        try:
+            with self._app.app_context():
+                # Not from the pool of web requests
+                g.pg_pool = "tasks"
+                _compare_signature(accession)
+        except Exception as exc:
+            self._app.logger.warning(f"comparisons: {accession}: {exc}")
+        finally:
+            with self._lock:
+                self._pending.discard(accession)
+
+    def compare_signatures(self,
+                           accessions: list[str]) -> dict[str, dict[str, dict]]:
+        """
+        Compare signatures with each other.
+
+        :return: comparisons, indexed by accession of both signatures
+                 (each pair is reported in both directions)
+        """
+        if not has_app_context():
+            with self._app.app_context():
+                g.pg_pool = "tasks"
+                return self.compare_signatures(accessions)
+
+        return _compare_signatures(tuple(sorted(set(accessions))))
+
+
+on_demand = OnDemandComparisons()
+
+
+@cached
+def _compare_signature(accession: str) -> dict[str, dict[str, dict]]:
+    con = utils.connect_pg()
+    cur = con.cursor()
+    rows = utils.copy_rows(
+        cur,
+        """
+        SELECT m.protein_acc::text, p.is_reviewed, m.signature_acc::text,
+               m.fragments::text
+        FROM interpro.match m
+        INNER JOIN interpro.signature s ON m.signature_acc = s.accession
+        INNER JOIN interpro.protein p ON m.protein_acc = p.accession
+        WHERE m.protein_acc IN (
+            SELECT protein_acc
+            FROM interpro.match
+            WHERE signature_acc = %s
+        )
+        AND p.is_fragment IS FALSE
+        ORDER BY m.protein_acc
+        """,
+        [accession],
+        ["text", "bool", "text", "text"]
+    )
+    try:
+        return compare(rows, {accession})
+    finally:
+        cur.close()
+        con.close()
+
+
+@cached
+def _compare_signatures(accessions: tuple[str]) -> dict[str, dict[str, dict]]:
+    con = utils.connect_pg()
+    cur = con.cursor()
+    rows = utils.copy_rows(
+        cur,
+        """
+        SELECT m.protein_acc::text, p.is_reviewed, m.signature_acc::text,
+               m.fragments::text
+        FROM interpro.match m
+        INNER JOIN interpro.protein p ON m.protein_acc = p.accession
+        WHERE m.signature_acc = ANY(%(accessions)s)
+        AND m.protein_acc IN (
+            SELECT protein_acc
+            FROM interpro.signature2protein
+            WHERE signature_acc = ANY(%(accessions)s)
+            GROUP BY protein_acc
+            HAVING COUNT(*) > 1
+        )
+        AND p.is_fragment IS FALSE
+        ORDER BY m.protein_acc
+        """,
+        {"accessions": list(accessions)},
+        ["text", "bool", "text", "text"]
+    )
+    try:
+        return compare(rows, None)
+    finally:
+        cur.close()
+        con.close()
+
+
+def compare(rows, queries: set[str] | None) -> dict[str, dict[str, dict]]:
+    """
+    Compare signatures from their matches.
+
+    :param rows: protein accession, reviewed status, signature accession,
+                 and fragments, ordered by protein accession
+    :param queries: only compare these signatures with the others
+                    (default: compare all signatures with each other)
+    :return: comparisons, indexed by accession of both signatures
+    """
+    comparisons = {}
+    protein_acc = is_reviewed = None
+    signatures = {}
+    for acc, reviewed, signature_acc, fragments in rows:
+        if acc != protein_acc:
+            if signatures:
+                _compare_protein(signatures, is_reviewed, queries,
+                                 comparisons)
+
+            protein_acc = acc
+            is_reviewed = reviewed
+            signatures = {}
+
+        intervals = signatures.setdefault(signature_acc, [])
+        for frag in fragments.split(","):
+            start, end, _ = frag.split("-")
+            intervals.append((int(start), int(end)))
+
+    if signatures:
+        _compare_protein(signatures, is_reviewed, queries, comparisons)
+
+    return comparisons
+
+
+def _compare_protein(signatures: dict[str, list[tuple[int, int]]],
+                     is_reviewed: bool, queries: set[str] | None,
+                     comparisons: dict):
+    merged = {acc: _merge(intervals) for acc, intervals in signatures.items()}
+    lengths = {acc: sum(end - start + 1 for start, end in intervals)
+               for acc, intervals in merged.items()}
+
+    for acc1, intervals1 in merged.items():
+        if queries is not None and acc1 not in queries:
+            continue
+
+        targets = comparisons.setdefault(acc1, {})
+        for acc2, intervals2 in merged.items():
+            if acc1 == acc2:
+                continue
+
+            residues = _overlap(intervals1, intervals2)
+            shortest = min(lengths[acc1], lengths[acc2])
+            try:
+                c = targets[acc2]
+            except KeyError:
+                c = targets[acc2] = {
+                    "collocations": 0,
+                    "overlaps": 0,
+                    "res_overlaps": 0,
+                    "reviewed_res_overlaps": 0,
+                }
+
+            c["collocations"] += 1
+            c["res_overlaps"] += residues
+            if is_reviewed:
+                c["reviewed_res_overlaps"] += residues
+
+            if residues and residues >= _MIN_OVERLAP * shortest:
+                c["overlaps"] += 1
+
+
+def _merge(intervals: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def _overlap(intervals1: list[tuple[int, int]],
+             intervals2: list[tuple[int, int]]) -> int:
+    """Count the residues in both lists of sorted, disjoint intervals."""
+    residues = 0
+    i = j = 0
+    while i < len(intervals1) and j < len(intervals2):
+        start1, end1 = intervals1[i]
+        start2, end2 = intervals2[j]
+        residues += max(0, min(end1, end2) - max(start1, start2) + 1)
+        if end1 < end2:
+            i += 1
+        else:
+            j += 1
+
+    return residues
+
+
+def init_app(app: Flask):
+    on_demand.init_app(app)
@@ -0,0 +1,342 @@
+"""
+On-disk cache of data read from PostgreSQL, shared by all workers.
+
+PostgreSQL data only changes when a new release is loaded, so cached
+values are valid until then: keys include a digest of the database
+versions (see `cache.ReleaseWatermark`), and values of previous
+releases are deleted once a new release is seen.
+
+The cache is a SQLite database (RESPONSE_CACHE_PATH, by default in the
+instance folder), bounded to RESPONSE_CACHE_SIZE megabytes by evicting
+the least recently used values. Each worker checks the size of the cache
+every time it has written 1% of RESPONSE_CACHE_SIZE.
+
+Streamed responses are sent as they are produced, and compressed
+for the cache as their chunks pass.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Iterable, Iterator
+from functools import wraps
+from typing import Callable
+
+from flask import Flask, current_app, request
+
+from pronto import cache, utils
+from pronto.httpcache import is_incomplete
+
+
+# Seconds between two updates of the access time of a value
+_TOUCH_DELAY = 60
+# Fraction of the maximum size written by a worker between two evictions
+_EVICT_INTERVAL = 0.01
+
+
+class DiskCache:
+    def __init__(self):
+        self.path = None
+        self.max_size = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._release = None
+        self._hits = 0
+        self._misses = 0
+        self._written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def init_app(self, app: Flask):
+        self.max_size = app.config.get("RESPONSE_CACHE_SIZE", 1024) * 1024**2
+        if self.max_size <= 0:
+            self.path = None
+            return
+
+        self.path = app.config.get("RESPONSE_CACHE_PATH",
+                                   os.path.join(app.instance_path,
+                                                "responses.sqlite"))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        con = self._connect()
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                release TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        con.execute(
+            "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=10,
+                                  isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+
+        return con
+
+    def make_key(self, *parts) -> tuple[str, str]:
+        """
+        Build a key from the current release and the given parts.
+
+        :return: the key and the release digest
+        """
+        release = cache.release.get()
+        key = hashlib.sha1(repr((release,) + parts).encode("utf-8"))
+        return key.hexdigest(), release
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            con = self._connect()
+            row = con.execute(
+                "SELECT value, accessed FROM cache WHERE key = ?",
+                [key]
+            ).fetchone()
+
+            if row is None:
+                self._count(hit=False)
+                return None
+
+            value, accessed = row
+            now = time.time()
+            if now - accessed >= _TOUCH_DELAY:
+                con.execute("UPDATE cache SET accessed = ? WHERE key = ?",
+                            [now, key])
+        except sqlite3.Error as exc:
+            current_app.logger.warning(f"response cache: {exc}")
+            return None
+
+        self._count(hit=True)
+        return zlib.decompress(value)
+
+    def set(self, key: str, release: str, value: bytes):
+        self.set_compressed(key, release, zlib.compress(value, 1))
+
+    def set_compressed(self, key: str, release: str, value: bytes):
+        """Like `set()`, for a value already compressed with zlib."""
+        try:
+            con = self._connect()
+            if release != self._release:
+                # New release (or first write by this worker)
+                con.execute("DELETE FROM cache WHERE release != ?",
+                            [release])
+                self._release = release
+
+            con.execute(
+                """
+                INSERT OR REPLACE INTO cache (key, release, value, size, accessed)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [key, release, value, len(value), time.time()]
+            )
+
+            with self._lock:
+                self._written += len(value)
+                evict = self._written >= self.max_size * _EVICT_INTERVAL
+                if evict:
+                    self._written = 0
+
+            if evict:
+                self._evict(con)
+        except sqlite3.Error as exc:
+            current_app.logger.warning(f"response cache: {exc}")
+
+    def _evict(self, con: sqlite3.Connection):
+        size, = con.execute("SELECT COALESCE(SUM(size), 0) "
+                            "FROM cache").fetchone()
+        if size <= self.max_size:
+            return
+
+        # Remove least recently used values until 90% full
+        excess = size - int(self.max_size * 0.9)
+        keys = []
+        for key, value_size in con.execute("SELECT key, size FROM cache "
+                                           "ORDER BY accessed"):
+            keys.append(key)
+            excess -= value_size
+            if excess <= 0:
+                break
+
+        con.executemany("DELETE FROM cache WHERE key = ?",
+                        [(key,) for key in keys])
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def clear(self):
+        if self.enabled:
+            self._connect().execute("DELETE FROM cache")
+
+    def get_stats(self) -> dict:
+        stats = {
+            "enabled": self.enabled,
+            "hits": self._hits,
+            "misses": self._misses,
+            "entries": 0,
+            "size": 0,
+            "max_size": self.max_size,
+        }
+
+        if self.enabled:
+            stats["entries"], stats["size"] = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+
+        return stats
+
+
+disk_cache = DiskCache()
+
+
+def normalize_view_args(kwargs: dict) -> tuple:
+    """
+    Normalize the arguments of a view, so the same accessions,
+    in any order or repeated, give the same arguments.
+    """
+    args = []
+    for name, value in sorted(kwargs.items()):
+        if name == "accessions":
+            value = sorted(utils.split_path(value))
+
+        args.append((name, value))
+
+    return tuple(args)
+
+
+def cached_response(integrated: Callable[[list[str]], dict] | None = None):
+    """
+    Cache a view's JSON response.
+
+    Responses are cached by endpoint, view arguments (with sorted
+    accessions) and query string parameters (sorted).
+
+    :param integrated: function returning the InterPro entries of
+                       signatures (e.g. `get_sig2interpro()`), if the
+                       response has an "integrated" property. This property
+                       comes from curation data, so it is set each time
+                       the response is read from the cache.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not disk_cache.enabled or request.method != "GET":
+                return fn(*args, **kwargs)
+
+            query = tuple(sorted(request.args.items(multi=True)))
+            key, release = disk_cache.make_key(request.endpoint,
+                                               normalize_view_args(kwargs),
+                                               query)
+            value = disk_cache.get(key)
+            if value is not None:
+                if integrated:
+                    obj = current_app.json.loads(value)
+                    accessions = utils.split_path(kwargs["accessions"])
+                    obj["integrated"] = integrated(accessions)
+                    value = current_app.json.dumpb(obj) + b"\n"
+
+                return current_app.response_class(value,
+                                                  mimetype="application/json")
+
+            response = current_app.make_response(fn(*args, **kwargs))
+            if (response.status_code != 200 or
+                    response.mimetype != "application/json" or
+                    is_incomplete()):
+                return response
+            elif response.is_streamed:
+                # "integrated" is cached too, but replaced on hits
+                app = current_app._get_current_object()
+                response.response = _tee(response.response, app, key,
+                                         release)
+            else:
+                value = response.get_data()
+                if integrated:
+                    obj = current_app.json.loads(value)
+                    obj.pop("integrated", None)
+                    disk_cache.set(key, release, current_app.json.dumpb(obj))
+                else:
+                    disk_cache.set(key, release, value)
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _tee(chunks: Iterable[bytes], app: Flask, key: str,
+         release: str) -> Iterator[bytes]:
+    compressor = zlib.compressobj(1)
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(compressor.compress(chunk))
+            yield chunk
+    finally:
+        # Release the application context of `stream_with_context()`
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+    # Only complete responses are cached
+    parts.append(compressor.flush())
+    with app.app_context():
+        disk_cache.set_compressed(key, release, b"".join(parts))
+
+
+def cached(fn):
+    """
+    Cache the JSON-serializable result of a function reading PostgreSQL.
+
+    The decorated function has a `get_cached()` method, returning
+    the cached result (None if not cached) without calling the function.
+    """
+    def make_key(args, kwargs) -> tuple[str, str]:
+        return disk_cache.make_key(fn.__module__, fn.__qualname__,
+                                   args, tuple(sorted(kwargs.items())))
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not disk_cache.enabled:
+            return fn(*args, **kwargs)
+
+        key, release = make_key(args, kwargs)
+        value = disk_cache.get(key)
+        if value is not None:
+            return current_app.json.loads(value)
+
+        result = fn(*args, **kwargs)
+        disk_cache.set(key, release, current_app.json.dumpb(result))
+        return result
+
+    def get_cached(*args, **kwargs):
+        if not disk_cache.enabled:
+            return None
+
+        key, _ = make_key(args, kwargs)
+        value = disk_cache.get(key)
+        return None if value is None else current_app.json.loads(value)
+
+    wrapper.get_cached = get_cached
+    return wrapper
+
+
+def init_app(app: Flask):
+    disk_cache.init_app(app)
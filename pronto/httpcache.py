@@ -0,0 +1,157 @@
+"""
+Conditional requests and compression of API responses.
+
+Views decorated with `conditional()` get a strong ETag derived from the
+versions of the databases in PostgreSQL (see `cache.ReleaseWatermark`)
+and, for views reading curated data, from the curation watermark
+(see `cache.CurationWatermark`). Requests with a matching If-None-Match
+header get a 304 response without running the view. Writes made through
+Pronto change the curation watermark of every worker at once.
+Views returning incomplete data (e.g. comparisons still computed in the
+background) call `mark_incomplete()`: their response gets no ETag,
+and must not be stored by clients.
+
+JSON responses are compressed with Brotli (if installed) or gzip,
+depending on the client's Accept-Encoding header.
+"""
+
+import gzip
+import hashlib
+import zlib
+from collections.abc import Iterable, Iterator
+from functools import wraps
+
+from flask import Flask, Response, current_app, g, request
+
+from pronto import cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def conditional(curation: bool = True):
+    """
+    Answer conditional GET requests for a view.
+
+    :param curation: True if the view reads curated data from Oracle,
+                     False if it only reads release data from PostgreSQL
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return fn(*args, **kwargs)
+
+            etag = _make_etag(curation)
+            for tag in request.if_none_match.as_set():
+                # Compressed representations have a suffixed ETag
+                if tag.split("-")[0] == etag:
+                    response = current_app.response_class(status=304)
+                    response.set_etag(tag)
+                    response.headers["Cache-Control"] = "no-cache"
+                    response.vary.add("Accept-Encoding")
+                    return response
+
+            response = current_app.make_response(fn(*args, **kwargs))
+            if is_incomplete():
+                response.headers["Cache-Control"] = "no-store"
+            elif response.status_code == 200:
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def mark_incomplete():
+    """
+    Mark the response of the current request as incomplete,
+    so it is not revalidated, but requested again.
+    """
+    g.incomplete_response = True
+
+
+def is_incomplete() -> bool:
+    return g.get("incomplete_response", False)
+
+
+def _make_etag(curation: bool) -> str:
+    key = [cache.release.get(), request.full_path]
+    if curation:
+        key.append(cache.curation.get())
+
+    return hashlib.sha1(":".join(key).encode("utf-8")).hexdigest()
+
+
+def compress(response: Response) -> Response:
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype != "application/json"
+            or "Content-Encoding" in response.headers):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if brotli is not None and "br" in request.accept_encodings:
+        encoding = "br"
+    elif "gzip" in request.accept_encodings:
+        encoding = "gzip"
+    else:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config.get("COMPRESS_MIN_SIZE", 1024):
+            return response
+        elif encoding == "br":
+            response.set_data(brotli.compress(data, quality=4))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=6))
+
+    response.headers["Content-Encoding"] = encoding
+    etag, is_weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=is_weak)
+
+    return response
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+
+    try:
+        for chunk in chunks:
+            data = process(chunk)
+            if data:
+                yield data
+
+        yield finish()
+    finally:
+        # Release the application context of `stream_with_context()`
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def invalidate(response: Response) -> Response:
+    # Changes made through Pronto are seen immediately by all workers
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        cache.curation.touch()
+
+    return response
+
+
+def init_app(app: Flask):
+    app.after_request(invalidate)
+    app.after_request(compress)
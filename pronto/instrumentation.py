@@ -0,0 +1,202 @@
+"""
+Instrumented database cursors.
+
+Connections opened by `pronto.utils` create cursors from the classes
+below, which report each executed statement to the registered listeners
+(e.g. metrics) as a `QueryEvent`.
+"""
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import MySQLdb.cursors
+import oracledb
+import psycopg
+
+
+@dataclass
+class QueryEvent:
+    backend: str
+    statement: str
+    params: Any
+    # time.time() when the statement was executed
+    started: float
+    # seconds spent executing the statement, then fetching rows
+    duration: float
+    fetch_time: float
+    # -1 if unknown
+    rows: int
+    cursor: Any
+
+
+_listeners: list[Callable[[QueryEvent], None]] = []
+
+
+def add_listener(fn: Callable[[QueryEvent], None]):
+    _listeners.append(fn)
+
+
+def notify(event: QueryEvent):
+    for fn in _listeners:
+        fn(event)
+
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![:\w.])\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so that statements differing only by literals,
+    lengths of literal lists, comments, or whitespaces are the same.
+    """
+    statement = _COMMENTS.sub(" ", statement)
+    statement = _STRINGS.sub("?", statement)
+    statement = _NUMBERS.sub("?", statement)
+    statement = _LISTS.sub("(?+)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+def count_binds(params) -> int:
+    if params is None:
+        return 0
+    elif isinstance(params, (dict, list, tuple)):
+        return len(params)
+
+    return 1
+
+
+def _to_str(statement) -> str:
+    if isinstance(statement, str):
+        return statement
+    elif isinstance(statement, bytes):
+        return statement.decode("utf-8")
+
+    # psycopg.sql.Composable
+    return repr(statement)
+
+
+class OracleCursor(oracledb.Cursor):
+    """
+    Rows are fetched lazily, so statements are reported once their rows
+    have been fetched: when the cursor executes another statement,
+    fetches all rows, or is closed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._event = None
+
+    def _report(self):
+        event, self._event = self._event, None
+        if event is not None:
+            event.rows = self.rowcount
+            notify(event)
+
+    def _timed(self, method, statement, params, *args, **kwargs):
+        self._report()
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            return method(statement, params, *args, **kwargs)
+        finally:
+            self._event = QueryEvent("oracle", _to_str(statement), params,
+                                     started, time.perf_counter() - start,
+                                     0.0, -1, self)
+
+    def execute(self, statement, parameters=None, **kwargs):
+        return self._timed(super().execute, statement, parameters, **kwargs)
+
+    def executemany(self, statement, parameters, **kwargs):
+        return self._timed(super().executemany, statement, parameters,
+                           **kwargs)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._event is not None:
+                elapsed = time.perf_counter() - start
+                self._event.duration += elapsed
+                self._event.fetch_time += elapsed
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        self._report()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._fetch(super().__next__)
+        except StopIteration:
+            self._report()
+            raise
+
+    def close(self):
+        self._report()
+        super().close()
+
+    def __exit__(self, *exc_info):
+        self._report()
+        return super().__exit__(*exc_info)
+
+
+class OracleConnection(oracledb.Connection):
+    def cursor(self, *args, **kwargs) -> OracleCursor:
+        return OracleCursor(self, *args, **kwargs)
+
+
+class PgCursor(psycopg.Cursor):
+    """
+    Client-side cursor: rows are fetched by `execute()`.
+    """
+
+    def _timed(self, method, query, params, **kwargs):
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            return method(query, params, **kwargs)
+        finally:
+            notify(QueryEvent("postgresql", _to_str(query), params, started,
+                              time.perf_counter() - start, 0.0,
+                              self.rowcount, self))
+
+    def execute(self, query, params=None, **kwargs):
+        return self._timed(super().execute, query, params, **kwargs)
+
+    def executemany(self, query, params_seq, **kwargs):
+        return self._timed(super().executemany, query, params_seq, **kwargs)
+
+
+class MySQLCursor(MySQLdb.cursors.Cursor):
+    """
+    Client-side cursor: rows are fetched by `execute()`.
+    """
+
+    def _timed(self, method, query, args):
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            return method(query, args)
+        finally:
+            notify(QueryEvent("mysql", _to_str(query), args, started,
+                              time.perf_counter() - start, 0.0,
+                              self.rowcount, self))
+
+    def execute(self, query, args=None):
+        return self._timed(super().execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed(super().executemany, query, args)
@@ -0,0 +1,290 @@
+"""
+Prometheus metrics, exposed in the text format at /api/metrics.
+
+Metrics are kept in memory by each worker process: when running several
+workers, each scrape only returns the metrics of the worker answering it.
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Sequence
+
+from flask import Flask, g, request
+
+from pronto import instrumentation, utils
+
+
+# Upper bounds of histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+                    10, 30, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines += self._render_value(key, value)
+
+        return lines
+
+    def _render_value(self, key: tuple, value) -> list[str]:
+        return [f"{self.name}{self._labels(key)} {_format(value)}"]
+
+    def _labels(self, key: tuple, extra: str = "") -> str:
+        labels = [f'{name}="{_escape(value)}"'
+                  for name, value in zip(self.labelnames, key)]
+        if extra:
+            labels.append(extra)
+
+        return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            try:
+                counts, total = self._values[key]
+            except KeyError:
+                counts = [0] * len(self.buckets)
+                total = 0
+
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+
+            self._values[key] = counts, total + value
+
+    def _render_value(self, key: tuple, value) -> list[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            le = f'le="{_format(bound)}"'
+            lines.append(f"{self.name}_bucket{self._labels(key, le)} "
+                         f"{cumulative}")
+
+        lines += [f"{self.name}_sum{self._labels(key)} {_format(total)}",
+                  f"{self.name}_count{self._labels(key)} {cumulative}"]
+        return lines
+
+
+def _escape(value: str) -> str:
+    return (value.replace("\\", r"\\")
+            .replace("\n", r"\n")
+            .replace('"', r'\"'))
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    elif isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return repr(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], None]):
+        # Called before each scrape, to update gauges
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            fn()
+
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "pronto_request_duration_seconds",
+    "Time spent answering requests, including streamed bodies.",
+    ["endpoint", "method", "status"]
+))
+db_queries = registry.register(Counter(
+    "pronto_db_queries_total",
+    "Number of executed statements.",
+    ["backend"]
+))
+db_query_duration = registry.register(Histogram(
+    "pronto_db_query_duration_seconds",
+    "Time spent executing statements and fetching their rows.",
+    ["backend"]
+))
+db_rows = registry.register(Counter(
+    "pronto_db_rows_total",
+    "Number of rows returned or affected by statements.",
+    ["backend"]
+))
+executor_tasks = registry.register(Gauge(
+    "pronto_executor_tasks",
+    "Number of queued or running tasks in thread pools.",
+    ["executor", "state"]
+))
+pool_connections = registry.register(Gauge(
+    "pronto_pool_connections",
+    "Number of connections of database connection pools.",
+    ["backend", "pool", "state"]
+))
+pool_waiting = registry.register(Gauge(
+    "pronto_pool_waiting_requests",
+    "Number of clients waiting for a connection.",
+    ["backend", "pool"]
+))
+
+
+def _record_query(event: instrumentation.QueryEvent):
+    db_queries.inc(backend=event.backend)
+    db_query_duration.observe(event.duration, backend=event.backend)
+    if event.rows > 0:
+        db_rows.inc(event.rows, backend=event.backend)
+
+
+def _collect_executors():
+    executors = {
+        "tasks": utils.executor,
+        "queries": utils.query_executor,
+    }
+    for name, executor in executors.items():
+        for state, value in executor.get_stats().items():
+            executor_tasks.set(value, executor=name, state=state)
+
+
+def _collect_pools():
+    # Pools may disappear (e.g. proxy pools of users who cannot log in)
+    pool_connections.clear()
+    pool_waiting.clear()
+    stats = utils.get_pool_stats()
+    # Oracle pools are named after database users, which are not exposed:
+    # proxy pools are reported together
+    oracle = {}
+    for pool in stats["oracle"]:
+        name = "proxy" if pool["proxy"] else "default"
+        values = oracle.setdefault(name, dict.fromkeys(("min", "max",
+                                                        "opened", "busy"), 0))
+        for state in values:
+            values[state] += pool["size"][state]
+
+    for name, values in oracle.items():
+        for state, value in values.items():
+            pool_connections.set(value, backend="oracle", pool=name,
+                                 state=state)
+
+    for pool in stats["postgresql"]:
+        name = pool["name"]
+        opened = pool.get("pool_size", 0)
+        values = {
+            "min": pool.get("pool_min", 0),
+            "max": pool.get("pool_max", 0),
+            "opened": opened,
+            "busy": opened - pool.get("pool_available", 0),
+        }
+        for state, value in values.items():
+            pool_connections.set(value, backend="postgresql", pool=name,
+                                 state=state)
+
+        pool_waiting.set(pool.get("requests_waiting", 0),
+                         backend="postgresql", pool=name)
+
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _record_request(exc: BaseException | None = None):
+    # Torn down once the (possibly streamed) response is sent
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return
+
+    if exc is not None:
+        status = 500
+    else:
+        status = g.pop("metrics_status", 500)
+
+    request_duration.observe(time.perf_counter() - start,
+                             endpoint=request.endpoint or "none",
+                             method=request.method,
+                             status=status)
+
+
+def render() -> str:
+    return registry.render()
+
+
+def init_app(app: Flask):
+    instrumentation.add_listener(_record_query)
+    registry.add_collector(_collect_executors)
+    registry.add_collector(_collect_pools)
+    app.before_request(_start_timer)
+    app.after_request(_record_status)
+    app.teardown_request(_record_request)
@@ -0,0 +1,288 @@
+"""
+On-demand profiling of API requests.
+
+Logged-in users can add the `profile` parameter to any API request
+(e.g. /api/signature/PF00001/?profile) to run it under cProfile,
+a stack sampler, and tracemalloc. The profile is kept in memory
+(PROFILE_SIZE, by default 10, per worker), and its URL is returned
+in the X-Profile header of the response:
+
+* /api/profiles/<id>/: functions with the highest cumulative time,
+  the peak of traced memory, and the sites that allocated the most memory
+  (compared to the start of the request) at the highest snapshot
+  of traced memory, taken twice per second
+* /api/profiles/<id>/collapsed: sampled stacks in the collapsed format,
+  for flame graph tools (flamegraph.pl, speedscope, etc.)
+
+Only the thread answering the request is profiled: time spent
+in queries run concurrently by `utils.fan_out()` appears as waiting.
+One request is profiled at a time.
+"""
+
+import collections
+import cProfile
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+from flask import Flask, g, request
+
+from pronto import auth
+
+
+# Seconds between two samples of the request's stack
+_SAMPLE_INTERVAL = 0.005
+
+# Seconds between two checks of traced memory
+_SNAPSHOT_INTERVAL = 0.5
+
+# Number of functions and allocation sites reported
+_TOP = 50
+
+# Number of frames stored by tracemalloc for each allocation
+_TRACEMALLOC_FRAMES = 10
+
+
+class Sampler(threading.Thread):
+    """
+    Sample the stack of a thread at regular intervals,
+    and snapshot traced memory when it reaches a new high.
+    """
+
+    def __init__(self, thread_id: int, interval: float = _SAMPLE_INTERVAL):
+        super().__init__(name="profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.snapshot = None
+        self.snapshot_size = 0
+        self._done = threading.Event()
+
+    def run(self):
+        next_check = time.monotonic() + _SNAPSHOT_INTERVAL
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+            if time.monotonic() >= next_check:
+                self.take_snapshot()
+                next_check = time.monotonic() + _SNAPSHOT_INTERVAL
+
+    def take_snapshot(self):
+        size = tracemalloc.get_traced_memory()[0]
+        if size > self.snapshot_size:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = size
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.take_snapshot()
+
+
+def _frame_name(code) -> str:
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+class Profile:
+    def __init__(self, profile_id: int, method: str, path: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.date = time.time()
+        self.duration = None
+        self.status = None
+        self.functions = []
+        self.allocations = []
+        self.peak_memory = None
+        self.stacks = collections.Counter()
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "date": self.date,
+            "duration": self.duration,
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            **self.summary(),
+            "functions": self.functions,
+            "memory": {
+                "peak": self.peak_memory,
+                "allocations": self.allocations
+            },
+            "samples": sum(self.stacks.values()),
+        }
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n"
+                       for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    def __init__(self):
+        self.size = 0
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+        self._profiles = collections.deque()
+        self._ids = itertools.count(1)
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def init_app(self, app: Flask):
+        self.size = app.config.get("PROFILE_SIZE", 10)
+        self._profiles = collections.deque(maxlen=max(self.size, 0))
+
+    def start(self) -> Profile | None:
+        if not self._running.acquire(blocking=False):
+            # Another request is being profiled
+            return None
+
+        try:
+            profile = Profile(next(self._ids), request.method,
+                              request.full_path.rstrip("?"))
+            cprofile = cProfile.Profile()
+            sampler = Sampler(threading.get_ident())
+            start_tracemalloc = not tracemalloc.is_tracing()
+            if start_tracemalloc:
+                tracemalloc.start(_TRACEMALLOC_FRAMES)
+
+            tracemalloc.reset_peak()
+            snapshot = tracemalloc.take_snapshot()
+            sampler.start()
+            cprofile.enable()
+        except BaseException:
+            self._running.release()
+            raise
+
+        g.profile_state = (profile, cprofile, sampler, start_tracemalloc,
+                           snapshot, time.perf_counter())
+        return profile
+
+    def stop(self):
+        state = g.pop("profile_state", None)
+        if state is None:
+            return
+
+        (profile, cprofile, sampler, stop_tracemalloc,
+         previous, start) = state
+        try:
+            cprofile.disable()
+            profile.duration = time.perf_counter() - start
+            sampler.stop()
+            profile.stacks = sampler.stacks
+            profile.peak_memory = tracemalloc.get_traced_memory()[1]
+            if stop_tracemalloc:
+                tracemalloc.stop()
+
+            profile.functions = _get_functions(cprofile)
+            if sampler.snapshot is not None:
+                profile.allocations = _get_allocations(sampler.snapshot,
+                                                       previous)
+        finally:
+            self._running.release()
+
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get_profiles(self) -> list[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get_profile(self, profile_id: int) -> Profile | None:
+        for profile in self.get_profiles():
+            if profile.id == profile_id:
+                return profile
+
+        return None
+
+
+def _get_functions(profiler: cProfile.Profile) -> list[dict]:
+    stats = pstats.Stats(profiler).stats
+    functions = []
+    for (filename, lineno, name), values in stats.items():
+        primitive_calls, calls, total_time, cumulative_time, _ = values
+        functions.append({
+            "function": name,
+            "file": f"{filename}:{lineno}",
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_time": total_time,
+            "cumulative_time": cumulative_time,
+        })
+
+    functions.sort(key=lambda f: f["cumulative_time"], reverse=True)
+    return functions[:_TOP]
+
+
+def _get_allocations(snapshot: tracemalloc.Snapshot,
+                     previous: tracemalloc.Snapshot) -> list[dict]:
+    # Ignore memory allocated by tracemalloc itself
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    snapshot = snapshot.filter_traces(filters)
+    previous = previous.filter_traces(filters)
+
+    allocations = []
+    for diff in snapshot.compare_to(previous, "lineno"):
+        if diff.size_diff <= 0:
+            continue
+
+        frame = diff.traceback[0]
+        allocations.append({
+            "file": f"{frame.filename}:{frame.lineno}",
+            "size": diff.size_diff,
+            "count": diff.count_diff,
+        })
+        if len(allocations) == _TOP:
+            break
+
+    return allocations
+
+
+profiler = Profiler()
+
+
+def _start():
+    if ("profile" in request.args and request.path.startswith("/api/")
+            and not request.path.startswith("/api/profiles/")
+            and auth.get_user()):
+        g.profile = profiler.start()
+
+
+def _add_header(response):
+    profile = g.get("profile")
+    if profile is not None:
+        profile.status = response.status_code
+        response.headers["X-Profile"] = f"/api/profiles/{profile.id}/"
+
+    return response
+
+
+def _stop(exc: BaseException | None = None):
+    # Torn down once the (possibly streamed) response is sent
+    profiler.stop()
+
+
+def init_app(app: Flask):
+    profiler.init_app(app)
+    if profiler.enabled:
+        app.before_request(_start)
+        app.after_request(_add_header)
+        app.teardown_request(_stop)
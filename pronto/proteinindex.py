@@ -0,0 +1,489 @@
+"""
+Memory-mapped index of the proteins matched by each signature.
+
+Proteins are given dense integer IDs, in the order of their accessions,
+and the proteins of each signature are stored as a sorted array of IDs,
+next to per-protein arrays (accession, reviewed status, left number of
+the taxon). The index is built offline, once per release, with:
+
+    flask --app pronto build-index
+
+PostgreSQL data only changes with a new release, so the index file is
+named after the release digest (see `cache.ReleaseWatermark`), and is
+only used while that release is loaded. The file is memory-mapped:
+all workers share it through the page cache, and set operations
+(union, intersection, difference) over millions of proteins take
+milliseconds instead of a scan of `signature2protein`.
+
+Requires NumPy. When NumPy is not installed, or the index of the current
+release has not been built, `protein_index.get()` returns None and
+callers query PostgreSQL instead.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections.abc import Iterable
+
+import click
+import psycopg
+from flask import Flask, current_app, has_app_context
+
+from pronto import cache, utils
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_MAGIC = b"PRONTOIX"
+# 2: proteins without a taxon are indexed (with _NO_TAXON)
+_VERSION = 2
+# Footer: length of the JSON directory, and magic number
+_FOOTER = struct.Struct("<Q8s")
+# UniProt accessions are at most 10 characters long
+_ACCESSION_SIZE = 10
+# Left number of proteins whose taxon is unknown (in no taxon)
+_NO_TAXON = 2**32 - 1
+# Rows buffered when writing per-protein arrays
+_BATCH_SIZE = 1000000
+# Pairs of signatures counted at once when comparing signatures
+_MAX_PAIRS = 4000000
+
+
+class ProteinIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        size, magic = _FOOTER.unpack_from(self._mm,
+                                          len(self._mm) - _FOOTER.size)
+        if magic != _MAGIC:
+            raise ValueError(f"{path}: not a protein index")
+
+        start = len(self._mm) - _FOOTER.size - size
+        directory = json.loads(self._mm[start:start + size])
+        if directory["version"] != _VERSION:
+            raise ValueError(f"{path}: unsupported version "
+                             f"{directory['version']}")
+
+        self.release = directory["release"]
+        self.num_proteins = n = directory["proteins"]
+        sections = directory["sections"]
+        self._accessions = np.frombuffer(self._mm, f"S{_ACCESSION_SIZE}",
+                                         count=n,
+                                         offset=sections["accessions"])
+        self._taxon_left = np.frombuffer(self._mm, "<u4", count=n,
+                                         offset=sections["taxon_left"])
+        self._reviewed = np.frombuffer(self._mm, "u1", count=n,
+                                       offset=sections["reviewed"])
+        self._signatures = directory["signatures"]
+
+    def __contains__(self, accession: str) -> bool:
+        return accession in self._signatures
+
+    def proteins(self, accession: str) -> "np.ndarray":
+        """
+        Get the (sorted) IDs of the proteins matched by a signature.
+        The array is a read-only view of the index.
+        """
+        try:
+            offset, count = self._signatures[accession]
+        except KeyError:
+            return np.empty(0, dtype="<u4")
+
+        return np.frombuffer(self._mm, "<u4", count=count, offset=offset)
+
+    def count(self, accession: str) -> int:
+        try:
+            return self._signatures[accession][1]
+        except KeyError:
+            return 0
+
+    def union(self, accessions: Iterable[str]) -> "np.ndarray":
+        """Get the proteins matched by any of the signatures."""
+        arrays = [self.proteins(acc) for acc in accessions]
+        if not arrays:
+            return np.empty(0, dtype="<u4")
+        elif len(arrays) == 1:
+            return arrays[0]
+
+        # Radix sort of a few sorted runs
+        ids = np.sort(np.concatenate(arrays), kind="stable")
+        return _unique_sorted(ids)
+
+    def intersection(self, accessions: Iterable[str]) -> "np.ndarray":
+        """Get the proteins matched by all the signatures."""
+        arrays = sorted((self.proteins(acc) for acc in accessions), key=len)
+        if not arrays:
+            return np.empty(0, dtype="<u4")
+
+        ids = arrays[0]
+        for other in arrays[1:]:
+            ids = ids[isin_sorted(ids, other)]
+
+        return ids
+
+    def difference(self, accession: str,
+                   others: Iterable[str]) -> "np.ndarray":
+        """Get the proteins matched by a signature but none of the others."""
+        ids = self.proteins(accession)
+        for other in others:
+            ids = ids[~isin_sorted(ids, self.proteins(other))]
+
+        return ids
+
+    def matched_by(self, accessions: Iterable[str],
+                   min_signatures: int) -> "np.ndarray":
+        """Get the proteins matched by at least `min_signatures` signatures."""
+        arrays = [self.proteins(acc) for acc in set(accessions)]
+        if not arrays:
+            return np.empty(0, dtype="<u4")
+
+        ids = np.sort(np.concatenate(arrays), kind="stable")
+        ids, counts = _count_sorted(ids)
+        return ids[counts >= min_signatures]
+
+    def compare(self, accessions: list[str]) -> tuple["np.ndarray",
+                                                      "np.ndarray"]:
+        """
+        Compare signatures in one pass over their proteins.
+
+        :return: the N×N matrix of collocations (proteins matched by both
+                 signatures, or by each signature on the diagonal), and
+                 the number of proteins matched by each signature but
+                 none of the others, in the order of `accessions`
+        """
+        n = len(accessions)
+        arrays = [self.proteins(acc) for acc in accessions]
+        collocations = np.zeros(n * n, dtype=np.int64)
+        exclusive = np.zeros(n, dtype=np.int64)
+        if not n:
+            return collocations.reshape(n, n), exclusive
+
+        # Signatures of each protein, in ascending order
+        ids = np.concatenate(arrays)
+        signatures = np.repeat(np.arange(n), [len(a) for a in arrays])
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        signatures = signatures[order]
+
+        # Proteins matched by k signatures: (proteins, k) matrix of signatures
+        _, counts = _count_sorted(ids)
+        sizes = np.repeat(counts, counts)
+        for k in np.unique(counts):
+            matrix = signatures[sizes == k].reshape(-1, k)
+            if k == 1:
+                exclusive = np.bincount(matrix[:, 0], minlength=n)
+                continue
+
+            # Pairs (i, j) with i < j, for the upper triangle only
+            i, j = np.triu_indices(k, 1)
+            step = max(_MAX_PAIRS // len(i), 1)
+            for start in range(0, len(matrix), step):
+                block = matrix[start:start + step]
+                pairs = block[:, i] * n + block[:, j]
+                collocations += np.bincount(pairs.ravel(), minlength=n * n)
+
+        collocations = collocations.reshape(n, n)
+        collocations += collocations.T
+        collocations[np.diag_indices(n)] = [len(a) for a in arrays]
+        return collocations, exclusive
+
+    def ids(self, accessions: Iterable[str]) -> "np.ndarray":
+        """Get the IDs of proteins (unknown accessions are ignored)."""
+        keys = np.array([acc.encode("ascii") for acc in accessions],
+                        dtype=f"S{_ACCESSION_SIZE}")
+        ids = np.searchsorted(self._accessions, keys)
+        found = ids < self.num_proteins
+        found[found] = self._accessions[ids[found]] == keys[found]
+        return np.unique(ids[found]).astype("<u4")
+
+    def accessions(self, ids: "np.ndarray") -> list[str]:
+        return [acc.decode("ascii") for acc in self._accessions[ids]]
+
+    def is_reviewed(self, ids: "np.ndarray") -> "np.ndarray":
+        return self._reviewed[ids].astype(bool)
+
+    def in_taxon(self, ids: "np.ndarray", left_number: int,
+                 right_number: int) -> "np.ndarray":
+        left = self._taxon_left[ids]
+        return (left >= left_number) & (left <= right_number)
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            "release": self.release,
+            "proteins": self.num_proteins,
+            "signatures": len(self._signatures),
+            "size": len(self._mm),
+        }
+
+
+def isin_sorted(values: "np.ndarray", ids: "np.ndarray") -> "np.ndarray":
+    """
+    Test whether each value is in `ids`, a sorted array,
+    without sorting `values` (unlike `numpy.isin`).
+    """
+    if not len(ids):
+        return np.zeros(len(values), dtype=bool)
+
+    i = np.searchsorted(ids, values)
+    i[i == len(ids)] = 0
+    return ids[i] == values
+
+
+def _unique_sorted(ids: "np.ndarray") -> "np.ndarray":
+    if not len(ids):
+        return ids
+
+    mask = np.empty(len(ids), dtype=bool)
+    mask[0] = True
+    np.not_equal(ids[1:], ids[:-1], out=mask[1:])
+    return ids[mask]
+
+
+def _count_sorted(ids: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    if not len(ids):
+        return ids, np.empty(0, dtype=np.intp)
+
+    mask = np.empty(len(ids), dtype=bool)
+    mask[0] = True
+    np.not_equal(ids[1:], ids[:-1], out=mask[1:])
+    starts = np.flatnonzero(mask)
+    counts = np.diff(np.append(starts, len(ids)))
+    return ids[starts], counts
+
+
+class IndexLoader:
+    def __init__(self):
+        self.path = None
+        self._app = None
+        self._lock = threading.Lock()
+        self._index = None
+        self._missing = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def init_app(self, app: Flask):
+        self._app = app
+        self.path = app.config.get("PROTEIN_INDEX_PATH", app.instance_path)
+        if not self.path or np is None:
+            self.path = None
+
+        app.cli.command("build-index")(_build_command)
+
+    def get_file(self, release: str) -> str:
+        return os.path.join(self.path, f"proteins-{release}.idx")
+
+    def get(self) -> ProteinIndex | None:
+        """
+        Get the index of the current release, or None if it is not built.
+        """
+        if not self.enabled:
+            return None
+        elif not has_app_context():
+            # Background tasks (e.g. sanity checks)
+            with self._app.app_context():
+                return self.get()
+
+        release = cache.release.get()
+        index = self._index
+        if index is not None and index.release == release:
+            return index
+
+        path = self.get_file(release)
+        if not os.path.isfile(path):
+            if self._missing != release:
+                current_app.logger.info(f"protein index: {path} not found")
+                self._missing = release
+            return None
+
+        with self._lock:
+            if self._index is None or self._index.release != release:
+                try:
+                    # The previous index is unmapped once no longer used
+                    self._index = ProteinIndex(path)
+                except ValueError as exc:
+                    # e.g. built by a previous version: must be rebuilt
+                    if self._missing != release:
+                        current_app.logger.warning(f"protein index: {exc}")
+                        self._missing = release
+                    return None
+
+            return self._index
+
+    def get_stats(self) -> dict:
+        index = self.get()
+        return {
+            "enabled": self.enabled,
+            "index": index.get_stats() if index is not None else None,
+        }
+
+
+protein_index = IndexLoader()
+
+
+def build(con: psycopg.Connection, path: str, release: str):
+    """
+    Write the index of the data in PostgreSQL to `path`.
+    The file is written next to its final path, then moved.
+
+    Proteins are numbered by the two queries reading them (per-protein
+    arrays, then proteins of each signature), so both must read the same
+    proteins, in the same order, from the same snapshot.
+    """
+    directory = {
+        "version": _VERSION,
+        "release": release,
+        "proteins": 0,
+        "sections": {},
+        "signatures": {},
+    }
+
+    con.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                    suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh, \
+                tempfile.TemporaryFile() as taxon_fh, \
+                tempfile.TemporaryFile() as reviewed_fh:
+            cur = con.cursor()
+
+            # Per-protein arrays, in the order of accessions (i.e. IDs)
+            directory["sections"]["accessions"] = fh.tell()
+            accessions = []
+            taxon_left = []
+            reviewed = []
+            for acc, is_reviewed, left_number in utils.copy_rows(
+                cur,
+                """
+                SELECT p.accession::text, p.is_reviewed, t.left_number::int4
+                FROM interpro.protein p
+                LEFT OUTER JOIN interpro.taxon t ON p.taxon_id = t.id
+                ORDER BY p.accession COLLATE "C"
+                """,
+                None,
+                ["text", "bool", "int4"]
+            ):
+                accessions.append(acc)
+                if left_number is None:
+                    left_number = _NO_TAXON
+
+                taxon_left.append(left_number)
+                reviewed.append(is_reviewed)
+                if len(accessions) == _BATCH_SIZE:
+                    _write_proteins(fh, taxon_fh, reviewed_fh, accessions,
+                                    taxon_left, reviewed)
+                    directory["proteins"] += len(accessions)
+                    accessions.clear()
+                    taxon_left.clear()
+                    reviewed.clear()
+
+            _write_proteins(fh, taxon_fh, reviewed_fh, accessions,
+                            taxon_left, reviewed)
+            directory["proteins"] += len(accessions)
+
+            for name, tmp_fh in [("taxon_left", taxon_fh),
+                                 ("reviewed", reviewed_fh)]:
+                _align(fh)
+                directory["sections"][name] = fh.tell()
+                tmp_fh.seek(0)
+                while chunk := tmp_fh.read(1024 * 1024):
+                    fh.write(chunk)
+
+            # Proteins of each signature, as sorted IDs
+            _align(fh)
+            for acc, ids in utils.copy_rows(
+                cur,
+                """
+                WITH ids AS (
+                    SELECT accession,
+                           (ROW_NUMBER() OVER (
+                              ORDER BY accession COLLATE "C"
+                           ) - 1)::int4 AS id
+                    FROM interpro.protein
+                )
+                SELECT sp.signature_acc::text, array_agg(ids.id ORDER BY ids.id)
+                FROM interpro.signature2protein sp
+                INNER JOIN ids ON sp.protein_acc = ids.accession
+                GROUP BY sp.signature_acc
+                """,
+                None,
+                ["text", "int4[]"]
+            ):
+                ids = np.asarray(ids, dtype="<u4")
+                directory["signatures"][acc] = [fh.tell(), len(ids)]
+                fh.write(ids.tobytes())
+
+            cur.close()
+            con.rollback()
+
+            data = json.dumps(directory, separators=(",", ":")).encode()
+            fh.write(data)
+            fh.write(_FOOTER.pack(len(data), _MAGIC))
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_proteins(fh, taxon_fh, reviewed_fh, accessions: list[str],
+                    taxon_left: list[int], reviewed: list[bool]):
+    fh.write(np.array(accessions, dtype=f"S{_ACCESSION_SIZE}").tobytes())
+    taxon_fh.write(np.array(taxon_left, dtype="<u4").tobytes())
+    reviewed_fh.write(np.array(reviewed, dtype="u1").tobytes())
+
+
+def _align(fh, size: int = 4):
+    fh.write(b"\0" * (-fh.tell() % size))
+
+
+@click.option("--force", is_flag=True,
+              help="Rebuild the index if it already exists.")
+def _build_command(force: bool):
+    """Build the protein index of the current release."""
+    if np is None:
+        raise click.ClickException("NumPy is required")
+    elif not protein_index.enabled:
+        raise click.ClickException("PROTEIN_INDEX_PATH is not set")
+
+    release = cache.release.get()
+    path = protein_index.get_file(release)
+    if os.path.isfile(path) and not force:
+        try:
+            ProteinIndex(path)
+        except ValueError as exc:
+            click.echo(f"{exc}: rebuilding")
+        else:
+            click.echo(f"{path} already exists")
+            return
+
+    os.makedirs(protein_index.path, exist_ok=True)
+    url = utils.get_pg_url()
+    with psycopg.connect(**utils.parse_pg_url(url)) as con:
+        build(con, path, release)
+
+    # Indexes of previous releases
+    for other in glob.glob(protein_index.get_file("*")):
+        if other != path:
+            os.unlink(other)
+
+    index = ProteinIndex(path)
+    stats = index.get_stats()
+    click.echo(f"{path}: {stats['proteins']} proteins, "
+               f"{stats['signatures']} signatures, "
+               f"{stats['size'] / 1024 ** 2:.0f} MB")
+
+
+def init_app(app: Flask):
+    protein_index.init_app(app)
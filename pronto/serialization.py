@@ -0,0 +1,155 @@
+"""
+JSON serialization of API responses.
+
+`ProntoJSONProvider` uses orjson when it is installed, and falls back
+to Flask's default provider (standard library) otherwise.
+The output is the same with both: keys are sorted, and dates,
+dataclasses, etc. are converted as Flask does.
+
+`stream_jsonify()` sends a document whose large lists are encoded,
+and sent, item by item rather than built as one string in memory.
+"""
+
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from flask import Flask, Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from pronto import tracing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Size of the chunks sent by `stream_jsonify()`
+_CHUNK_SIZE = 64 * 1024
+
+
+class ProntoJSONProvider(DefaultJSONProvider):
+    def __init__(self, app: Flask):
+        super().__init__(app)
+        serializer = app.config.get("JSON_SERIALIZER", "orjson")
+        self.use_orjson = serializer == "orjson" and orjson is not None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumpb(obj, **kwargs).decode("utf-8")
+
+    def dumpb(self, obj: Any, **kwargs: Any) -> bytes:
+        if not kwargs and self._is_compact():
+            if self.use_orjson:
+                return orjson.dumps(obj, default=self.default,
+                                    option=self._orjson_options())
+
+            kwargs["separators"] = (",", ":")
+
+        return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        with tracing.span("serialize"):
+            if not self.use_orjson or not self._is_compact():
+                return super().response(*args, **kwargs)
+
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(self.dumpb(obj) + b"\n",
+                                            mimetype=self.mimetype)
+
+    def _is_compact(self) -> bool:
+        # Indented output (debug mode) is left to json
+        return (self.compact or
+                (self.compact is None and not self._app.debug))
+
+    def _orjson_options(self) -> int:
+        # Let `default()` handle dates and dataclasses, as Flask does
+        option = (orjson.OPT_NON_STR_KEYS |
+                  orjson.OPT_PASSTHROUGH_DATETIME |
+                  orjson.OPT_PASSTHROUGH_DATACLASS)
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        return option
+
+
+class Stream:
+    """
+    List whose items are encoded one at a time by `stream_jsonify()`.
+    """
+
+    def __init__(self, items: Iterable):
+        self.items = items
+
+    def __iter__(self) -> Iterator:
+        return iter(self.items)
+
+
+def stream_jsonify(obj: dict, status: int = 200) -> Response:
+    """
+    Like `flask.jsonify()`, but encode `Stream` values item by item,
+    and send the document in chunks as it is encoded.
+
+    :param obj: document, with `Stream` objects in place of large lists
+    :param status: HTTP status code
+    :return: streamed response
+    """
+    provider = current_app.json
+    dumpb = provider.dumpb
+    sort_keys = provider.sort_keys
+
+    def _encode(o: Any) -> Iterator[bytes]:
+        if isinstance(o, Stream):
+            yield b"["
+            for i, item in enumerate(o):
+                if i:
+                    yield b","
+
+                yield dumpb(item)
+
+            yield b"]"
+        elif isinstance(o, dict) and _contains_stream(o):
+            keys = sorted(o) if sort_keys else list(o)
+            yield b"{"
+            for i, key in enumerate(keys):
+                if i:
+                    yield b","
+
+                yield dumpb(str(key)) + b":"
+                yield from _encode(o[key])
+
+            yield b"}"
+        else:
+            yield dumpb(o)
+
+    def _generate() -> Iterator[bytes]:
+        # Includes the time spent producing `Stream` items
+        with tracing.span("serialize", streamed=True):
+            chunk = bytearray()
+            for data in _encode(obj):
+                chunk += data
+                if len(chunk) >= _CHUNK_SIZE:
+                    yield bytes(chunk)
+                    chunk.clear()
+
+            chunk += b"\n"
+            yield bytes(chunk)
+
+    return current_app.response_class(stream_with_context(_generate()),
+                                      status=status,
+                                      mimetype=provider.mimetype)
+
+
+def _contains_stream(obj: dict) -> bool:
+    for value in obj.values():
+        if isinstance(value, Stream):
+            return True
+        elif isinstance(value, dict) and _contains_stream(value):
+            return True
+
+    return False
@@ -0,0 +1,279 @@
+"""
+Coalescing of identical concurrent requests.
+
+When several identical requests for an expensive view arrive at the same
+time, only the first one runs the view: the others wait for its response,
+and reuse it. Requests are coalesced across threads and workers with file
+locks, in the `flights` directory of the instance folder:
+
+* the leader holds an exclusive lock on `<key>.lock` while it runs
+  the view and sends its response, which is written to `<key>.json`
+  as it is sent (streamed responses stay streamed);
+* followers hold a shared lock on `<key>.wait` from the time they start
+  waiting for the leader until they have opened its response,
+  which they then stream from the file.
+
+Once done, the leader or follower that finds no other follower
+(i.e. can lock `<key>.wait` exclusively) deletes the flight's files.
+"""
+
+import fcntl
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from functools import wraps
+from typing import BinaryIO, TextIO
+
+from flask import Flask, Response, current_app, request
+
+from pronto.diskcache import normalize_view_args
+from pronto.httpcache import is_incomplete
+
+
+# Seconds between two attempts to acquire a lock held by another request
+_POLL_INTERVAL = 0.1
+# Size of the chunks of responses sent to followers
+_CHUNK_SIZE = 64 * 1024
+
+
+class SingleFlight:
+    def __init__(self):
+        self.directory = None
+        self.timeout = 300
+
+    def init_app(self, app: Flask):
+        self.timeout = app.config.get("COALESCE_TIMEOUT", 300)
+        self.directory = os.path.join(app.instance_path, "flights")
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Remove files left by previous runs (e.g. killed workers)
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if time.time() - os.path.getmtime(path) > 24 * 3600:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+    def run(self, key: str, fn) -> Response:
+        path = os.path.join(self.directory, key)
+        # Taken before checking the leader, so it cannot delete its response
+        # between the check and the time we start waiting
+        wait_fh = open(f"{path}.wait", "a")
+        fcntl.flock(wait_fh, fcntl.LOCK_SH)
+        lock_fh = open(f"{path}.lock", "a")
+        try:
+            fcntl.flock(lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Same request running in another thread or worker
+            return self._follow(path, fn, lock_fh, wait_fh)
+
+        fcntl.flock(wait_fh, fcntl.LOCK_UN)
+        wait_fh.close()
+        return self._lead(path, fn, lock_fh)
+
+    def _lead(self, path: str, fn, lock_fh: TextIO) -> Response:
+        try:
+            response = current_app.make_response(fn())
+        except BaseException:
+            _land(path, lock_fh)
+            raise
+
+        if not _is_shareable(response):
+            _land(path, lock_fh)
+        elif response.is_streamed:
+            # The flight ends once the response is sent
+            app = current_app._get_current_object()
+            response.response = _tee(response.response, app, path, lock_fh)
+        else:
+            _write(current_app, path, response.get_data())
+            _land(path, lock_fh)
+
+        return response
+
+    def _follow(self, path: str, fn, lock_fh: TextIO,
+                wait_fh: TextIO) -> Response:
+        started = time.time()
+        fh = None
+        try:
+            if self._wait(lock_fh):
+                fcntl.flock(lock_fh, fcntl.LOCK_UN)
+                fh = _open(f"{path}.json", started)
+        finally:
+            lock_fh.close()
+            fcntl.flock(wait_fh, fcntl.LOCK_UN)
+            wait_fh.close()
+            _cleanup(path)
+
+        if fh is None:
+            # Leader failed, or timed out
+            return current_app.make_response(fn())
+
+        return current_app.response_class(_read(fh),
+                                          mimetype="application/json")
+
+    def _wait(self, fh: TextIO) -> bool:
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            time.sleep(_POLL_INTERVAL)
+            try:
+                # Shared: all followers get the response at the same time
+                fcntl.flock(fh, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            else:
+                return True
+
+        return False
+
+
+def _is_shareable(response: Response) -> bool:
+    # Followers would cache incomplete responses: they run the view instead
+    return (response.status_code == 200 and
+            response.mimetype == "application/json" and
+            not is_incomplete())
+
+
+def _tee(chunks: Iterable[bytes], app: Flask, path: str,
+         lock_fh: TextIO) -> Iterator[bytes]:
+    tmp_path = _get_tmp_path(path)
+    try:
+        fh = open(tmp_path, "wb")
+    except OSError as exc:
+        app.logger.warning(f"coalescing: {exc}")
+        fh = None
+
+    try:
+        for chunk in chunks:
+            if fh is not None:
+                try:
+                    fh.write(chunk)
+                except OSError as exc:
+                    app.logger.warning(f"coalescing: {exc}")
+                    fh.close()
+                    fh = None
+                    _unlink(tmp_path)
+
+            yield chunk
+
+        if fh is not None:
+            fh.close()
+            fh = None
+            _publish(app, tmp_path, path)
+    finally:
+        if fh is not None:
+            # Response not sent entirely (e.g. client disconnected)
+            fh.close()
+            _unlink(tmp_path)
+
+        # Release the application context of `stream_with_context()`
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+        _land(path, lock_fh)
+
+
+def _write(app: Flask, path: str, body: bytes):
+    tmp_path = _get_tmp_path(path)
+    try:
+        with open(tmp_path, "wb") as fh:
+            fh.write(body)
+    except OSError as exc:
+        app.logger.warning(f"coalescing: {exc}")
+        _unlink(tmp_path)
+    else:
+        _publish(app, tmp_path, path)
+
+
+def _publish(app: Flask, tmp_path: str, path: str):
+    try:
+        # Followers only accept responses published after they started
+        os.utime(tmp_path)
+        os.replace(tmp_path, f"{path}.json")
+    except OSError as exc:
+        app.logger.warning(f"coalescing: {exc}")
+        _unlink(tmp_path)
+
+
+def _land(path: str, lock_fh: TextIO):
+    fcntl.flock(lock_fh, fcntl.LOCK_UN)
+    lock_fh.close()
+    _cleanup(path)
+
+
+def _cleanup(path: str):
+    # Delete the flight's files, unless followers still need them
+    try:
+        with open(f"{path}.wait", "a") as fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+
+            for suffix in (".json", ".lock", ".wait"):
+                _unlink(path + suffix)
+    except OSError:
+        pass
+
+
+def _open(path: str, not_before: float) -> BinaryIO | None:
+    try:
+        fh = open(path, "rb")
+    except OSError:
+        return None
+
+    if os.fstat(fh.fileno()).st_mtime < not_before:
+        # Response of an earlier request
+        fh.close()
+        return None
+
+    return fh
+
+
+def _read(fh: BinaryIO) -> Iterator[bytes]:
+    # The file may be deleted: it is read through its open descriptor
+    with fh:
+        while chunk := fh.read(_CHUNK_SIZE):
+            yield chunk
+
+
+def _get_tmp_path(path: str) -> str:
+    return f"{path}.{os.getpid()}.{threading.get_ident()}"
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(fn):
+    """
+    Coalesce identical concurrent requests to a view.
+
+    Requests are identical if they have the same endpoint,
+    view arguments (with sorted accessions), and query string
+    parameters (in any order).
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if single_flight.directory is None or request.method != "GET":
+            return fn(*args, **kwargs)
+
+        view_args = normalize_view_args(kwargs)
+        query = sorted(request.args.items(multi=True))
+        key = hashlib.sha1(repr((request.endpoint, view_args,
+                                 query)).encode("utf-8")).hexdigest()
+        return single_flight.run(key, lambda: fn(*args, **kwargs))
+
+    return wrapper
+
+
+def init_app(app: Flask):
+    single_flight.init_app(app)
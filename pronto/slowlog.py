@@ -0,0 +1,197 @@
+"""
+Log of slow SQL statements.
+
+Statements taking more than SLOW_QUERY_THRESHOLD seconds (including the
+time spent fetching rows) are logged as JSON objects, with their
+fingerprint (see `instrumentation.fingerprint()`), the shape of their
+bind parameters, their duration, and their number of rows.
+
+The first time a fingerprint is logged, and then at most once every
+SLOW_QUERY_PLAN_INTERVAL seconds, the execution plan of the statement is
+captured: with EXPLAIN for PostgreSQL, and with EXPLAIN PLAN and
+DBMS_XPLAN for Oracle. Statements are not executed again. Plans are
+captured by a background thread, on connections of their own (never
+the connection, possibly a curator's session, that ran the statement),
+and the statement is logged once its plan is known.
+
+Records go to the application logger, and to SLOW_QUERY_LOG if set.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, g
+
+from pronto import instrumentation, utils
+
+
+# Maximum number of fingerprints whose last plan time is remembered
+_MAX_FINGERPRINTS = 10000
+
+_COPY = re.compile(r"^\s*COPY\s*\((.+)\)\s*TO\s+STDOUT\b", re.I | re.S)
+_SELECT = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.threshold = 0
+        self.plan_interval = 3600
+        self.logger = None
+        self._app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._planned = {}
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def init_app(self, app: Flask):
+        self.threshold = app.config.get("SLOW_QUERY_THRESHOLD", 5)
+        self.plan_interval = app.config.get("SLOW_QUERY_PLAN_INTERVAL", 3600)
+        if not self.enabled:
+            return
+
+        self.logger = app.logger.getChild("slowqueries")
+        self.logger.setLevel(logging.WARNING)
+        path = app.config.get("SLOW_QUERY_LOG")
+        if path:
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.logger.addHandler(handler)
+
+        self._app = app
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="explain")
+        instrumentation.add_listener(self.record)
+
+    def record(self, event: instrumentation.QueryEvent):
+        if (event.duration < self.threshold
+                or getattr(self._local, "explaining", False)):
+            return
+
+        fingerprint = instrumentation.fingerprint(event.statement)
+        entry = {
+            "backend": event.backend,
+            "fingerprint": fingerprint,
+            "binds": _get_shape(event.params),
+            "duration": round(event.duration, 3),
+            "fetch_time": round(event.fetch_time, 3),
+            "rows": event.rows,
+        }
+
+        if self._should_plan(event.backend, fingerprint):
+            # Not in the request that was already slow
+            self._executor.submit(self._explain, entry, event.backend,
+                                  event.statement, event.params)
+        else:
+            self._log(entry)
+
+    def _explain(self, entry: dict, backend: str, statement: str, params):
+        self._local.explaining = True
+        try:
+            with self._app.app_context():
+                # Not from the pool of web requests
+                g.pg_pool = "tasks"
+                entry["plan"] = _explain(backend, statement, params)
+        except Exception as exc:
+            entry["plan_error"] = str(exc)
+        finally:
+            self._local.explaining = False
+
+        self._log(entry)
+
+    def _log(self, entry: dict):
+        self.logger.warning(json.dumps(entry, default=str))
+
+    def _should_plan(self, backend: str, fingerprint: str) -> bool:
+        if backend not in ("oracle", "postgresql"):
+            return False
+
+        now = time.monotonic()
+        key = (backend, fingerprint)
+        with self._lock:
+            last_time = self._planned.get(key)
+            if last_time is not None and now - last_time < self.plan_interval:
+                return False
+            elif len(self._planned) >= _MAX_FINGERPRINTS:
+                self._planned.clear()
+
+            self._planned[key] = now
+            return True
+
+
+def _get_shape(params):
+    if params is None:
+        return None
+    elif isinstance(params, dict):
+        return {name: _get_type(value) for name, value in params.items()}
+    elif isinstance(params, (list, tuple)):
+        return [_get_type(value) for value in params]
+
+    return _get_type(params)
+
+
+def _get_type(value) -> str:
+    name = type(value).__name__
+    if isinstance(value, (list, tuple, set, dict)):
+        return f"{name}[{len(value)}]"
+
+    try:
+        # Oracle collections (e.g. SYS.ODCIVARCHAR2LIST)
+        return f"{value.type.name}[{value.size()}]"
+    except (AttributeError, TypeError):
+        return name
+
+
+def _explain(backend: str, statement: str, params) -> str | None:
+    match = _COPY.match(statement)
+    if match:
+        statement = match.group(1)
+
+    if not _SELECT.match(statement):
+        # Only queries are explained
+        return None
+
+    if backend == "postgresql":
+        con = utils.connect_pg()
+        cur = con.cursor()
+        try:
+            cur.execute(f"EXPLAIN {statement}", params)
+            return "\n".join(row[0] for row in cur.fetchall())
+        finally:
+            cur.close()
+            con.close()
+
+    con = utils.connect_oracle()
+    cur = con.cursor()
+    try:
+        # Binds are not needed to explain a statement
+        statement_id = uuid.uuid4().hex[:30]
+        cur.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' "
+                    f"FOR {statement}")
+        cur.execute(
+            """
+            SELECT PLAN_TABLE_OUTPUT
+            FROM TABLE(DBMS_XPLAN.DISPLAY(NULL, :1, 'TYPICAL'))
+            """, [statement_id]
+        )
+        return "\n".join(row[0] for row in cur.fetchall())
+    finally:
+        # Rows of PLAN_TABLE are not kept
+        con.rollback()
+        cur.close()
+        con.close()
+
+
+slow_queries = SlowQueryLog()
+
+
+def init_app(app: Flask):
+    slow_queries.init_app(app)
@@ -5,18 +5,35 @@ import { selector } from "../ui/signatures.js";
 
 function getMatrices(accessions) {
     dimmer.on();
-    fetch('/api' + location.pathname + location.search)
+    const params = new URLSearchParams(location.search);
+    params.set('layout', 'matrix');
+    fetch('/api' + location.pathname + '?' + params.toString())
         .then(response => response.json())
         .then((results,) => {
             const thead = `<thead><tr><th></th>${accessions.map(acc => '<th class="center aligned">' + acc + '</th>').join('')}</tr></thead>`;
             let tbody1 = '';
             let tbody2 = '';
 
-            const signatures = new Map(Object.entries(results.signatures));
+            const signatures = new Map();
             const comparisons = new Map();
-            for (const [key, entries] of Object.entries(results.comparisons)) {
-                comparisons.set(key, new Map(Object.entries(entries)));
-            }
+            const exclusive = {};
+            results.accessions.forEach((key1, i) => {
+                if (results.proteins[i] !== null)
+                    signatures.set(key1, results.proteins[i]);
+                if (results.exclusive[i] !== null)
+                    exclusive[key1] = results.exclusive[i];
+
+                const entries = new Map();
+                results.accessions.forEach((key2, j) => {
+                    if (results.collocations[i][j] > 0)
+                        entries.set(key2, {
+                            collocations: results.collocations[i][j],
+                            overlaps: results.overlaps[i][j]
+                        });
+                });
+                if (entries.size > 0)
+                    comparisons.set(key1, entries);
+            });
 
 
             for (const key1 of accessions) {
@@ -69,7 +86,7 @@ function getMatrices(accessions) {
                         </a>`;
             };
 
-            Object.entries(results.exclusive).forEach(([signature, count]) => {
+            Object.entries(exclusive).forEach(([signature, count]) => {
                 exclusiveTableRows += `
                     <tr>
                     <td>${signature}</td>
@@ -224,62 +224,19 @@ function copyProteins() {
 }
 
 function downloadProteins() {
-    const modal = document.getElementById('progress-modal');
-    const progress = modal.querySelector('.progress');
-    $(progress).progress({
-        value: 0,
-        total: Number.parseInt(document.querySelector('#count .value').dataset.count, 10),
-        text : {
-            percent: '{percent}%',
-            active  : '{value} of {total} proteins downloaded',
-            success : '{total} proteins downloaded!'
-        }
-    });
-    $(modal).modal({
-        closable: false
-    }).modal('show');
-
+    // Streamed by the server: the browser saves the file as it is received
     const url = new URL(location.href);
-    url.searchParams.set('page_size', '0');
-    fetch(`/api${url.pathname}${url.search}`)
-        .then(response => response.json())
-        .then(object => {
-            (async function() {
-                let content = 'Accession\tIdentifier\tName\tLength\tSource\tOrganism\n';
-                for (let i = 0; i < object.results.length; i += 10) {
-                    const promises = [];
-                    for (const protein of object.results.slice(i, i+10)) {
-                        promises.push(fetchProtein(protein.accession, false));
-                    }
-                    const rows = [];
-                    for await (const obj of promises) {
-                        $(progress).progress('increment');
-                        rows.push([
-                            obj.accession,
-                            obj.identifier,
-                            obj.name,
-                            obj.length,
-                            obj.is_reviewed ? 'UniProtKB/Swiss-Prot' : 'UniProtKB/TrEMBL',
-                            obj.organism.name
-                        ]);
-                    }
-                    for (const row of rows) {
-                        content += row.join('\t') + '\n';
-                    }
-                }
-
-                const blob = new Blob([content], {type: 'text/tab-separated-values;charset=utf-8;'});
-
-                const link = document.createElement("a");
-                link.href = URL.createObjectURL(blob);
-                link.download = 'proteins.tsv';
-                link.style.display = 'none';
-                document.body.appendChild(link);
-                link.click();
-                document.body.removeChild(link);
-                $(modal).modal('hide');
-            })();
-        });
+    url.searchParams.delete('page');
+    url.searchParams.delete('page_size');
+    url.searchParams.set('format', 'tsv');
+
+    const link = document.createElement("a");
+    link.href = `/api${url.pathname}${url.search}`;
+    link.download = 'proteins.tsv';
+    link.style.display = 'none';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
 }
 
 document.addEventListener('DOMContentLoaded', () => {
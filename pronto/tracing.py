@@ -0,0 +1,228 @@
+"""
+Per-request tracing.
+
+Each API request is traced as a tree of spans: SQL statements (reported
+by `pronto.instrumentation`, with the time spent fetching rows),
+queries run concurrently by `utils.fan_out()`, and JSON serialization.
+Traces of the slowest requests (TRACE_SIZE, by default 50) are kept
+in memory, and can be browsed at /api/traces/.
+"""
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from flask import Flask, g, request
+
+from pronto import instrumentation
+
+
+# Maximum number of children of a span (e.g. statements run in a loop)
+_MAX_CHILDREN = 1000
+
+
+class Span:
+    __slots__ = ("name", "started", "duration", "attrs", "children")
+
+    def __init__(self, name: str, started: float | None = None, **attrs):
+        self.name = name
+        # time.time() when the span started
+        self.started = time.time() if started is None else started
+        self.duration = None
+        self.attrs = attrs
+        self.children = []
+
+    def as_dict(self, origin: float) -> dict:
+        # Times in milliseconds, relative to the start of the trace
+        return {
+            "name": self.name,
+            "start": round((self.started - origin) * 1000, 3),
+            "duration": round((self.duration or 0) * 1000, 3),
+            "attrs": self.attrs,
+            "children": [child.as_dict(origin) for child in self.children]
+        }
+
+    def add_child(self, child: "Span") -> bool:
+        if len(self.children) < _MAX_CHILDREN:
+            self.children.append(child)
+            return True
+
+        self.attrs["dropped"] = self.attrs.get("dropped", 0) + 1
+        return False
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "span", default=None
+)
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span | None]:
+    """
+    Time a block of code as a child of the current span.
+    Does nothing if the current request is not traced.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, **attrs)
+    parent.add_child(child)
+    token = _current.set(child)
+    start = time.perf_counter()
+    try:
+        yield child
+    finally:
+        child.duration = time.perf_counter() - start
+        _current.reset(token)
+
+
+def _record_query(event: instrumentation.QueryEvent):
+    parent = _current.get()
+    if parent is None:
+        return
+
+    child = Span("sql", started=event.started,
+                 backend=event.backend,
+                 fingerprint=instrumentation.fingerprint(event.statement),
+                 binds=instrumentation.count_binds(event.params),
+                 rows=event.rows)
+    child.duration = event.duration
+    if event.fetch_time:
+        fetch = Span("fetch",
+                     started=event.started + event.duration - event.fetch_time)
+        fetch.duration = event.fetch_time
+        child.add_child(fetch)
+
+    parent.add_child(child)
+
+
+class Trace:
+    def __init__(self, trace_id: int, root: Span, method: str, path: str,
+                 endpoint: str | None):
+        self.id = trace_id
+        self.root = root
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.status = None
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "date": self.root.started,
+            "duration": round(self.root.duration * 1000, 3),
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            **self.summary(),
+            "spans": self.root.as_dict(self.root.started)
+        }
+
+
+class TraceBuffer:
+    """
+    Bounded buffer keeping the slowest traces.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._lock = threading.Lock()
+        self._heap = []
+        self._ids = itertools.count(1)
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def init_app(self, app: Flask):
+        self.size = app.config.get("TRACE_SIZE", 50)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, trace: Trace):
+        item = (trace.root.duration, trace.id, trace)
+        with self._lock:
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+
+    def get_traces(self) -> list[Trace]:
+        with self._lock:
+            items = sorted(self._heap, reverse=True)
+
+        return [trace for _, _, trace in items]
+
+    def get_trace(self, trace_id: int) -> Trace | None:
+        for trace in self.get_traces():
+            if trace.id == trace_id:
+                return trace
+
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+
+traces = TraceBuffer()
+
+
+def get_context() -> contextvars.Context:
+    """
+    Copy of the current context, for running code in another thread
+    under the current span.
+    """
+    return contextvars.copy_context()
+
+
+def _start_trace():
+    if (not request.path.startswith("/api/")
+            or request.path.startswith(("/api/metrics", "/api/traces/"))):
+        return
+
+    root = Span("request")
+    g.trace = Trace(traces.next_id(), root, request.method,
+                    request.full_path.rstrip("?"), request.endpoint)
+    _current.set(root)
+
+
+def _record_status(response):
+    trace = g.get("trace")
+    if trace is not None:
+        trace.status = response.status_code
+
+    return response
+
+
+def _end_trace(exc: BaseException | None = None):
+    # Torn down once the (possibly streamed) response is sent
+    trace = g.pop("trace", None)
+    _current.set(None)
+    if trace is not None:
+        trace.root.duration = time.time() - trace.root.started
+        if exc is not None:
+            trace.status = 500
+
+        traces.add(trace)
+
+
+def init_app(app: Flask):
+    traces.init_app(app)
+    if traces.enabled:
+        instrumentation.add_listener(_record_query)
+        app.before_request(_start_trace)
+        app.after_request(_record_status)
+        app.teardown_request(_end_trace)
@@ -1,8 +1,14 @@
 import gzip
 import json
+import os
 import re
+import threading
+import time
 import uuid
-from typing import Callable
+import weakref
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Iterable, Iterator, Sequence
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -10,7 +16,13 @@ from datetime import datetime, timedelta
 import oracledb
 import MySQLdb
 import psycopg
-from flask import current_app
+from flask import Flask, current_app, g, has_app_context
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
+
+from pronto import tracing
+from pronto.instrumentation import (MySQLCursor, OracleConnection, PgCursor,
+                                    QueryEvent, notify)
 
 
 SIGNATURES = {
@@ -55,6 +67,20 @@ class Executor:
     def __init__(self):
         self._executor = ThreadPoolExecutor()
         self._submit = self._executor.submit
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def _run(self, *args, **kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        try:
+            self._run_task(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
 
     @staticmethod
     def _run_task(info: dict, task_id: str, fn: Callable, *args, **kwargs):
@@ -68,7 +94,7 @@ class Executor:
 
         result_obj = gzip.compress(json.dumps(result).encode("utf-8"))
 
-        con = oracledb.connect(**info)
+        con = connect_oracle_info(info)
         cur = con.cursor()
         cur.execute(
             """
@@ -168,7 +194,7 @@ class Executor:
         task_id = uuid.uuid1().hex
 
         # Insert task in database
-        con = oracledb.connect(**info)
+        con = connect_oracle_info(info)
         cur = con.cursor()
         cur.execute(
             """
@@ -184,26 +210,579 @@ class Executor:
         tasks = self.get_tasks(task_name=name, get_result=False)
 
         # Submit task to thread pool
-        f = self._submit(self._run_task, info, task_id, fn, *args, **kwargs)
+        with self._lock:
+            self._queued += 1
+        f = self._submit(self._run, info, task_id, fn, *args, **kwargs)
         return tasks[-1]
 
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queued, "running": self._running}
+
 
 executor = Executor()
 
 
+class OraclePool:
+    """
+    Process-wide pools of Oracle sessions.
+
+    Read-only connections come from a single pool opened with the
+    ORACLE_IP credentials. Curator connections use proxy authentication
+    (PRONTO_PROXY[dbuser]): each database user gets its own small pool,
+    created on first use, so proxy sessions are reused across requests.
+    Idle pools of the least recently active curators are closed
+    when there are more than ORACLE_PROXY_POOLS of them.
+
+    Pools are created on first use in each process, so workers forked
+    after the application is loaded do not share sessions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._dsn = None
+        self._default = None
+        self._password = None
+        self._min = 0
+        self._max = 0
+        self._proxy_max = 0
+        self._max_proxies = 0
+        self._timeout = 0
+        self._pools: OrderedDict[str, oracledb.ConnectionPool] = OrderedDict()
+        self._stats: dict[str, list[int | float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._default is not None
+
+    def init_app(self, app: Flask):
+        url = app.config.get("ORACLE_IP")
+        max_size = app.config.get("ORACLE_POOL_MAX", 8)
+        if not url or max_size <= 0:
+            return
+
+        self._default, self._password, self._dsn = parse_oracle_url(url)
+        self._min = min(app.config.get("ORACLE_POOL_MIN", 1), max_size)
+        self._max = max_size
+        self._proxy_max = app.config.get("ORACLE_PROXY_POOL_MAX", 2)
+        self._max_proxies = app.config.get("ORACLE_PROXY_POOLS", 16)
+        self._timeout = app.config.get("ORACLE_POOL_TIMEOUT", 30)
+
+    def _create(self, user: str, password: str, min_size: int,
+                max_size: int) -> oracledb.ConnectionPool:
+        pool = oracledb.create_pool(
+            user=user,
+            password=password,
+            dsn=self._dsn,
+            min=min_size,
+            max=max_size,
+            increment=1,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=self._timeout * 1000,
+            # Close sessions idle for more than 10 minutes
+            timeout=600,
+            connectiontype=OracleConnection
+        )
+        self._pools[user] = pool
+        # number of acquisitions, total wait time, maximum wait time
+        self._stats[user] = [0, 0.0, 0.0]
+        return pool
+
+    def _get(self, user: str, password: str) -> oracledb.ConnectionPool:
+        # Must be called with the lock held
+        if self._pid != os.getpid():
+            # Forked: sessions of the parent's pools are not ours to use
+            self._pid = os.getpid()
+            self._pools = OrderedDict()
+            self._stats = {}
+
+        try:
+            pool = self._pools[user]
+        except KeyError:
+            if user == self._default:
+                return self._create(user, password, self._min, self._max)
+
+            self._evict()
+            return self._create(user, password, 0, self._proxy_max)
+
+        self._pools.move_to_end(user)
+        return pool
+
+    def _evict(self):
+        # Must be called with the lock held
+        proxies = [user for user in self._pools if user != self._default]
+        for user in proxies[:max(0, len(proxies) - self._max_proxies + 1)]:
+            pool = self._pools[user]
+            if pool.busy == 0:
+                del self._pools[user]
+                del self._stats[user]
+                pool.close(force=True)
+
+    def acquire(self, info: dict | None = None) -> oracledb.Connection:
+        """
+        Get a connection from the pool. Calling `close()` on the connection
+        releases it back to the pool.
+
+        :param info: proxy authentication information,
+                     as returned by `get_oracle_auth_info()`;
+                     if None, a read-only connection is returned
+        :return: Oracle connection
+        """
+        if info is None:
+            user = self._default
+            password = self._password
+        else:
+            user = info["user"]
+            password = info["password"]
+
+        with self._lock:
+            pool = self._get(user, password)
+
+        start = time.perf_counter()
+        try:
+            con = pool.acquire()
+        except oracledb.DatabaseError:
+            if info is not None and pool.opened == 0:
+                # Do not keep pools for users that cannot authenticate
+                with self._lock:
+                    if self._pools.get(user) is pool:
+                        del self._pools[user]
+                        del self._stats[user]
+                pool.close(force=True)
+            raise
+
+        wait_time = time.perf_counter() - start
+        with self._lock:
+            stats = self._stats.get(user)
+            if stats is not None:
+                stats[0] += 1
+                stats[1] += wait_time
+                stats[2] = max(stats[2], wait_time)
+
+        return con
+
+    def get_stats(self) -> list[dict]:
+        results = []
+        with self._lock:
+            if self._pid != os.getpid():
+                return results
+
+            for user, pool in self._pools.items():
+                acquired, wait_time, max_wait_time = self._stats[user]
+                results.append({
+                    "name": user,
+                    "proxy": user != self._default,
+                    "size": {
+                        "min": pool.min,
+                        "max": pool.max,
+                        "opened": pool.opened,
+                        "busy": pool.busy,
+                    },
+                    "acquired": acquired,
+                    "wait_time": {
+                        "total": wait_time,
+                        "mean": wait_time / acquired if acquired else 0,
+                        "max": max_wait_time
+                    }
+                })
+
+        return results
+
+
+oracle_pool = OraclePool()
+
+
+class PostgresPool:
+    """
+    Pools of PostgreSQL connections.
+
+    Web requests check out one connection from the "web" pool and keep it
+    until the end of the request (see `get_pg()`). Background tasks run
+    outside of the application context and use the "tasks" pool, sized
+    separately so that long tasks cannot starve web requests.
+
+    Queries run concurrently by `fan_out()` use the "queries" pool,
+    with one connection per worker thread: requests waiting for their
+    queries keep their own connection, so if workers shared the "web"
+    pool, busy requests could hold every connection while their queries
+    wait for one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._url = None
+        self._conninfo = None
+        self._timeout = 0
+        self._sizes: dict[str, tuple[int, int]] = {}
+        self._pools: dict[str, ConnectionPool] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return len(self._sizes) > 0
+
+    def init_app(self, app: Flask):
+        url = app.config.get("POSTGRESQL")
+        max_size = app.config.get("PG_POOL_MAX", 8)
+        if not url or max_size <= 0:
+            return
+
+        self._url = url
+        self._conninfo = make_conninfo(**parse_pg_url(url))
+        self._timeout = app.config.get("PG_POOL_TIMEOUT", 30)
+        sizes = {
+            "web": (min(app.config.get("PG_POOL_MIN", 1), max_size),
+                    max_size),
+            "tasks": (0, app.config.get("PG_TASK_POOL_MAX", 4)),
+            "queries": (0, app.config.get("QUERY_WORKERS", 8)),
+        }
+        self._sizes = {name: size
+                       for name, size in sizes.items()
+                       if size[1] > 0}
+
+        app.teardown_appcontext(release_pg)
+
+    def handles(self, url: str) -> bool:
+        return self.enabled and url == self._url
+
+    def _get(self, name: str) -> ConnectionPool:
+        # Pools are created on first use in each process (see `OraclePool`)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pools = {}
+
+            try:
+                return self._pools[name]
+            except KeyError:
+                min_size, max_size = self._sizes[name]
+                pool = self._pools[name] = ConnectionPool(
+                    self._conninfo,
+                    min_size=min_size,
+                    max_size=max_size,
+                    # Pronto never writes to PostgreSQL
+                    kwargs={"autocommit": True, "cursor_factory": PgCursor},
+                    name=name,
+                    timeout=self._timeout,
+                    max_idle=600
+                )
+                return pool
+
+    def getconn(self, name: str) -> psycopg.Connection:
+        return self._get(name).getconn()
+
+    def putconn(self, name: str, con: psycopg.Connection):
+        self._get(name).putconn(con)
+
+    def get_stats(self) -> list[dict]:
+        with self._lock:
+            if self._pid != os.getpid():
+                return []
+
+            pools = list(self._pools.items())
+
+        return [{"name": name, **pool.get_stats()} for name, pool in pools]
+
+
+class _PooledConnection:
+    """
+    Proxy to a pooled PostgreSQL connection,
+    so `close()` releases the connection instead of closing it.
+    """
+
+    def __init__(self, con: psycopg.Connection, release: Callable | None):
+        self._con = con
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._release is not None:
+            self._release(self._con)
+            self._release = None
+
+
+pg_pool = PostgresPool()
+
+
+class PreparedStatements:
+    """
+    Execute statements as server-side prepared statements, so PostgreSQL
+    parses and plans each statement once per pooled connection
+    instead of once per request.
+
+    Psycopg keeps track of the statements prepared on each connection;
+    this class only counts, for each named statement, how many executions
+    reused a prepared statement (hits) or had to prepare it (misses).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prepared = weakref.WeakKeyDictionary()
+        self._stats = {}
+
+    def execute(self, cur: psycopg.Cursor, name: str, query: str,
+                params: Sequence | dict | None = None) -> psycopg.Cursor:
+        con = cur.connection
+        with self._lock:
+            try:
+                prepared = self._prepared[con]
+            except KeyError:
+                prepared = self._prepared[con] = set()
+
+            if query in prepared:
+                hit = True
+            else:
+                hit = False
+                max_size = con.prepared_max
+                if max_size is not None and len(prepared) >= max_size:
+                    # Psycopg evicts statements beyond `prepared_max`
+                    prepared.clear()
+
+                prepared.add(query)
+
+            try:
+                stats = self._stats[name]
+            except KeyError:
+                stats = self._stats[name] = [0, 0]
+
+            stats[0 if hit else 1] += 1
+
+        return cur.execute(query, params, prepare=True)
+
+    def get_stats(self) -> list[dict]:
+        with self._lock:
+            return [{"name": name, "hits": hits, "misses": misses}
+                    for name, (hits, misses) in sorted(self._stats.items())]
+
+
+prepared_statements = PreparedStatements()
+
+
+def execute_prepared(cur: psycopg.Cursor, name: str, query: str,
+                     params: Sequence | dict | None = None) -> psycopg.Cursor:
+    """
+    Execute a query as a prepared statement (see `PreparedStatements`).
+
+    :param cur: PostgreSQL cursor
+    :param name: name under which executions are counted
+    :param query: SQL query
+    :param params: query parameters
+    :return: the cursor
+    """
+    return prepared_statements.execute(cur, name, query, params)
+
+
+def copy_rows(cur: psycopg.Cursor, query: str,
+              params: Sequence | dict | None,
+              types: Sequence[str]) -> Iterator[tuple]:
+    """
+    Stream the rows of a query with `COPY (...) TO STDOUT (FORMAT BINARY)`.
+    Values are decoded straight from the binary format, which is much
+    cheaper than fetching large result sets through a cursor.
+
+    Binary COPY does not describe its columns, so they must be of
+    the given types exactly: cast them in the query (e.g. `accession::text`).
+
+    :param cur: PostgreSQL cursor
+    :param query: SQL query (parameters are merged client-side)
+    :param params: query parameters
+    :param types: PostgreSQL type of each column (e.g. "text", "int8[]")
+    :return: rows, as tuples
+    """
+    statement = f"COPY ({query}) TO STDOUT (FORMAT BINARY)"
+    started = time.time()
+    start = time.perf_counter()
+    # Time spent by the caller processing rows is not counted
+    duration = fetch_time = 0.0
+    rows = 0
+    try:
+        with cur.copy(statement, params) as copy:
+            copy.set_types(types)
+            it = copy.rows()
+            duration = time.perf_counter() - start
+            while True:
+                start = time.perf_counter()
+                try:
+                    row = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    fetch_time += time.perf_counter() - start
+
+                rows += 1
+                yield row
+    finally:
+        notify(QueryEvent("postgresql", statement, params, started,
+                          duration + fetch_time, fetch_time, rows, cur))
+
+
+class QueryTimeout(TimeoutError):
+    pass
+
+
+class Query:
+    """
+    Function call, typically running one or more database queries,
+    to be run concurrently with others (see `fan_out()`).
+    """
+
+    def __init__(self, fn: Callable, *args, timeout: float | None = None,
+                 **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+
+    def __call__(self):
+        return self.fn(*self.args, **self.kwargs)
+
+
+class QueryExecutor:
+    def __init__(self):
+        self._executor = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.timeout = None
+
+    def init_app(self, app: Flask):
+        max_workers = app.config.get("QUERY_WORKERS", 8)
+        self.timeout = app.config.get("QUERY_TIMEOUT")
+        if max_workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                thread_name_prefix="query")
+
+    def run(self, *queries: Query) -> list:
+        if (self._executor is None or len(queries) < 2
+                or not has_app_context()
+                or getattr(self._local, "active", False)):
+            # Nested calls run serially so workers never wait for workers
+            return [query() for query in queries]
+
+        app = current_app._get_current_object()
+        start = time.monotonic()
+        with self._lock:
+            self._queued += len(queries)
+        # Queries are traced as children of the current span
+        futures = [self._executor.submit(tracing.get_context().run,
+                                         self._run, app, query)
+                   for query in queries]
+        results = []
+        try:
+            for query, future in zip(queries, futures):
+                timeout = query.timeout or self.timeout
+                if timeout is None:
+                    results.append(future.result())
+                    continue
+
+                remaining = max(timeout - (time.monotonic() - start), 0)
+                try:
+                    results.append(future.result(timeout=remaining))
+                except TimeoutError:
+                    if future.done():
+                        # Raised by the query itself
+                        raise
+
+                    raise QueryTimeout(f"{query.fn.__name__} did not "
+                                       f"complete in {timeout} seconds")
+        except BaseException:
+            for future in futures:
+                if future.cancel():
+                    with self._lock:
+                        self._queued -= 1
+            raise
+
+        return results
+
+    def _run(self, app: Flask, query: Query):
+        # Each query gets its own application context, hence connections
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        self._local.active = True
+        try:
+            with app.app_context(), tracing.span("query",
+                                                 function=query.fn.__name__):
+                g.pg_pool = "queries"
+                return query()
+        finally:
+            self._local.active = False
+            with self._lock:
+                self._running -= 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queued, "running": self._running}
+
+
+query_executor = QueryExecutor()
+
+
+def fan_out(*queries: Query) -> list:
+    """
+    Run independent queries concurrently.
+
+    :param queries: queries to run
+    :return: the queries' results, in the same order
+    """
+    return query_executor.run(*queries)
+
+
+def init_pools(app: Flask):
+    oracle_pool.init_app(app)
+    pg_pool.init_app(app)
+    query_executor.init_app(app)
+
+
+def get_pool_stats() -> dict:
+    return {
+        "oracle": oracle_pool.get_stats(),
+        "postgresql": pg_pool.get_stats(),
+        "prepared_statements": prepared_statements.get_stats(),
+    }
+
+
+def parse_oracle_url(url: str) -> tuple[str, str, str]:
+    # input format:  app_user/app_passwd@[host:port]/service
+    parts = url.rsplit('@', 1)
+    user, password = parts[0].split("/")
+    return user, password, parts[1]
+
+
 def connect_oracle() -> oracledb.Connection:
-    return oracledb.connect(current_app.config["ORACLE_IP"])
+    if oracle_pool.enabled:
+        return oracle_pool.acquire()
+
+    return oracledb.connect(current_app.config["ORACLE_IP"],
+                            conn_class=OracleConnection)
 
 
 def connect_oracle_auth(user: dict) -> oracledb.Connection:
-    return oracledb.connect(**get_oracle_auth_info(user))
+    return connect_oracle_info(get_oracle_auth_info(user))
+
+
+def connect_oracle_info(info: dict) -> oracledb.Connection:
+    if oracle_pool.enabled:
+        return oracle_pool.acquire(info)
+
+    return oracledb.connect(**info, conn_class=OracleConnection)
 
 
 def get_oracle_auth_info(user: dict) -> dict:
-    # input format:  app_user/app_passwd@[host:port]/service
-    parts = current_app.config["ORACLE_IP"].rsplit('@', 1)
-    proxy_user, proxy_password = parts[0].split("/")
-    dsn = parts[1]
+    proxy_user, proxy_password, dsn = parse_oracle_url(
+        current_app.config["ORACLE_IP"]
+    )
     session_user = user["dbuser"]
     return {
         "user": f"{proxy_user}[{session_user}]",
@@ -216,7 +795,8 @@ def connect_oracle_auth_noproxy(username: str, password: str) -> oracledb.Connec
     dsn = current_app.config["ORACLE_IP"].rsplit('@', 1)[-1]
     return oracledb.connect(user=username,
                             password=password,
-                            dsn=dsn)
+                            dsn=dsn,
+                            conn_class=OracleConnection)
 
 
 def get_oracle_dsn():
@@ -231,14 +811,46 @@ def connect_pg(url: str | None = None):
     if url is None:
         url = get_pg_url()
 
+    if not pg_pool.handles(url):
+        return psycopg.connect(**parse_pg_url(url), cursor_factory=PgCursor)
+    elif has_app_context():
+        # Closed when the request ends (see `release_pg()`)
+        return _PooledConnection(get_pg(), None)
+
+    con = pg_pool.getconn("tasks")
+    return _PooledConnection(con, partial(pg_pool.putconn, "tasks"))
+
+
+def get_pg() -> psycopg.Connection:
+    """
+    Get the PostgreSQL connection of the current request.
+    The connection is checked out of the pool on first use,
+    and returned to it when the application context is torn down.
+    """
+    if "pg_con" not in g:
+        # Contexts not serving requests (e.g. `fan_out()` workers)
+        # select their own pool
+        g.pg_con_pool = g.get("pg_pool", "web")
+        g.pg_con = pg_pool.getconn(g.pg_con_pool)
+
+    return g.pg_con
+
+
+def release_pg(exc: BaseException | None = None):
+    con = g.pop("pg_con", None)
+    if con is not None:
+        pg_pool.putconn(g.pop("pg_con_pool"), con)
+
+
+def parse_pg_url(url: str) -> dict:
     m = re.match(r'([^/]+)/([^@]+)@([^:]+):(\d+)/(\w+)', url)
-    return psycopg.connect(
-        user=m.group(1),
-        password=m.group(2),
-        host=m.group(3),
-        port=int(m.group(4)),
-        dbname=m.group(5)
-    )
+    return {
+        "user": m.group(1),
+        "password": m.group(2),
+        "host": m.group(3),
+        "port": int(m.group(4)),
+        "dbname": m.group(5)
+    }
 
 
 def get_pg_url():
@@ -253,10 +865,50 @@ def connect_mysql():
         passwd=m.group(2),
         host=m.group(3),
         port=int(m.group(4)),
-        db=m.group(5)
+        db=m.group(5),
+        cursorclass=MySQLCursor
     )
 
 
+# Maximum number of elements of SYS.ODCI*LIST collections
+ORACLE_ARRAY_MAX = 32767
+
+
+def oracle_array(cur: oracledb.Cursor, values: Iterable) -> oracledb.DbObject:
+    """
+    Bind values as a single collection, so the statement's text does not
+    depend on the number of values (no hard parse per list length,
+    no ORA-01795). Use as `IN (SELECT COLUMN_VALUE FROM TABLE(:arr))`.
+
+    On PostgreSQL, pass a list and use `= ANY(%s)` instead.
+
+    :param cur: Oracle cursor
+    :param values: integers, or strings
+    :return: SYS.ODCINUMBERLIST or SYS.ODCIVARCHAR2LIST object
+    """
+    values = list(values)
+    if len(values) > ORACLE_ARRAY_MAX:
+        raise ValueError(f"more than {ORACLE_ARRAY_MAX} values "
+                         f"(use oracle_arrays())")
+
+    if values and all(isinstance(v, int) for v in values):
+        obj_type = cur.connection.gettype("SYS.ODCINUMBERLIST")
+    else:
+        obj_type = cur.connection.gettype("SYS.ODCIVARCHAR2LIST")
+
+    return obj_type.newobject(values)
+
+
+def oracle_arrays(cur: oracledb.Cursor,
+                  values: Iterable) -> Iterator[oracledb.DbObject]:
+    """
+    Like `oracle_array()`, for lists that may exceed ORACLE_ARRAY_MAX values.
+    """
+    values = list(values)
+    for i in range(0, max(len(values), 1), ORACLE_ARRAY_MAX):
+        yield oracle_array(cur, values[i:i+ORACLE_ARRAY_MAX])
+
+
 def split_path(path: str) -> list[str]:
     items = []
     for item in map(str.strip, path.split('/')):
@@ -500,36 +1152,3 @@ class ProntoState:
                 else None
             ),
         }
-
-
-def get_states() -> ProntoState:
-    is_updating = is_frozen = False
-    freeze_on = None
-    con = connect_oracle()
-    cur = con.cursor()
-    cur.execute(
-        """
-        UPDATE INTERPRO.PRONTO_STATES
-        SET ACTIVE = 'Y', ACTIVE_FROM = NULL
-        WHERE NAME = 'FROZEN'
-        AND ACTIVE = 'N'
-        AND ACTIVE_FROM IS NOT NULL
-        AND SYSDATE >= ACTIVE_FROM
-        """
-    )
-    if cur.rowcount:
-        print("updated!")
-        con.commit()
-
-    cur.execute("SELECT NAME, ACTIVE, ACTIVE_FROM FROM INTERPRO.PRONTO_STATES")
-    for name, active, active_from in cur.fetchall():
-        if name == "UPDATING":
-            is_updating = active == "Y"
-        elif name == "FROZEN":
-            is_frozen = active == "Y"
-            freeze_on = active_from
-
-    cur.close()
-    con.close()
-
-    return ProntoState(is_updating, is_frozen, freeze_on)